@@ -0,0 +1,102 @@
+# benchmarks/bench_capture.py
+"""
+So sánh chụp màn hình dạng PNG và raw framebuffer
+
+Ghi lại dữ liệu từ thiết bị:
+    python -m benchmarks.bench_capture --record --index 1 --ldplayer C:\\LDPlayer\\LDPlayer4.0
+
+Chạy benchmark trên dữ liệu đã ghi:
+    python -m benchmarks.bench_capture --png recordings/screencap.png --raw recordings/screencap.raw
+"""
+import os
+import sys
+import time
+import argparse
+from types import SimpleNamespace
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from utils.screencap import decode_screencap, screencap_command
+
+# Các ROI của màn hình profile dùng trong GovernorScanner
+ROIS = [
+    ('preprocess_image', (398, 177, 280, 38)),
+    ('preprocess_image2', (720, 176, 200, 34)),
+    ('preprocess_image2', (856, 320, 240, 40)),
+    ('preprocess_image', (916, 420, 215, 26)),
+    ('preprocess_image3', (1130, 443, 183, 40)),
+]
+
+
+def record(index, ldplayer_path, output_dir):
+    """Ghi lại dữ liệu screencap ở cả hai định dạng và đo thời gian chụp trên thiết bị"""
+    from utils.device import Device
+
+    device = Device(index, ldplayer_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    for capture_format, ext in (('png', 'png'), ('raw', 'raw')):
+        start = time.perf_counter()
+        data = device.exec_out(screencap_command(capture_format))
+        elapsed = time.perf_counter() - start
+
+        output_file = os.path.join(output_dir, f"screencap.{ext}")
+        with open(output_file, 'wb') as f:
+            f.write(data)
+        print(f"{capture_format:>4}: {len(data) / 1024:.0f} KiB captured in {elapsed * 1000:.1f} ms -> {output_file}")
+
+
+def bench(label, data, capture_format, scanner, iterations):
+    """Đo thời gian giải mã và tiền xử lý các ROI cho một định dạng"""
+    decode_total = 0.0
+    roi_total = 0.0
+    for _ in range(iterations):
+        start = time.perf_counter()
+        img = decode_screencap(data, capture_format)
+        decode_total += time.perf_counter() - start
+        if img is None:
+            print(f"{label}: failed to decode recorded data")
+            return
+
+        start = time.perf_counter()
+        for method, roi in ROIS:
+            getattr(scanner, method)(img, roi)
+        roi_total += time.perf_counter() - start
+
+    decode_ms = decode_total * 1000 / iterations
+    roi_ms = roi_total * 1000 / iterations
+    print(f"{label:>4}: {len(data) / 1024:8.0f} KiB | decode {decode_ms:7.2f} ms | "
+          f"{len(ROIS)} ROIs {roi_ms:6.2f} ms | total {decode_ms + roi_ms:7.2f} ms/frame")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark PNG vs raw screencap')
+    parser.add_argument('--record', action='store_true', help='Record byte streams from a device')
+    parser.add_argument('--index', type=int, default=0, help='LDPlayer instance index')
+    parser.add_argument('--ldplayer', type=str, default=r'C:\LDPlayer\LDPlayer4.0', help='LDPlayer path')
+    parser.add_argument('--out', type=str, default='recordings', help='Output directory for recordings')
+    parser.add_argument('--png', type=str, help='Recorded `screencap -p` output')
+    parser.add_argument('--raw', type=str, help='Recorded `screencap` output')
+    parser.add_argument('--iterations', type=int, default=50)
+    args = parser.parse_args()
+
+    if args.record:
+        record(args.index, args.ldplayer, args.out)
+        return
+
+    if not args.png and not args.raw:
+        parser.error('Provide --png and/or --raw recordings, or use --record')
+
+    from scanner.governor_scanner import GovernorScanner
+    scanner = GovernorScanner(None, SimpleNamespace(tesseract_path='tesseract'))
+
+    for label, path in (('png', args.png), ('raw', args.raw)):
+        if not path:
+            continue
+        with open(path, 'rb') as f:
+            data = f.read()
+        bench(label, data, label, scanner, args.iterations)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# benchmarks/bench_governor_store.py
+"""
+So sánh bộ nhớ khi nạp lịch sử snapshot: danh sách dict, Governor dataclass và GovernorStore
+
+    python -m benchmarks.bench_governor_store --rows 100000
+    python -m benchmarks.bench_governor_store --db data/snapshots.sqlite3 --scan-id 12
+"""
+import os
+import sys
+import time
+import random
+import argparse
+import tempfile
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from models.governor import Governor, STAT_FIELDS
+from scanner.snapshot_store import SnapshotStore
+
+
+def create_sample(path, rows):
+    """Tạo một lần quét giả gồm rows governor"""
+    store = SnapshotStore(path, batch_size=5000)
+    scan_id = store.begin_scan('0000', 1, scan_time=time.time())
+    for rank in range(1, rows + 1):
+        data = {'id': str(10000000 + rank), 'name': f"Governor {rank % 5000}", 'alliance': f"A{rank % 50}"}
+        for field in STAT_FIELDS:
+            data[field] = str(random.randint(0, 10 ** 9))
+        store.add_snapshot(scan_id, '0000', time.time(), rank, data)
+    store.flush()
+    return store, scan_id
+
+
+def measure(label, load):
+    """Đo bộ nhớ Python giữ lại sau khi nạp (tracemalloc) và thời gian nạp"""
+    tracemalloc.start()
+    start = time.perf_counter()
+    result = load()
+    elapsed = time.perf_counter() - start
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    print(f"{label:>12}: {len(result):7d} rows | {current / 1e6:7.1f} MB | {elapsed * 1000:8.1f} ms")
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark memory of historical governor loads')
+    parser.add_argument('--rows', type=int, default=100000, help='Rows of the generated sample scan')
+    parser.add_argument('--db', type=str, help='Existing snapshot database')
+    parser.add_argument('--scan-id', type=int, help='Scan to load from --db')
+    args = parser.parse_args()
+
+    if args.db:
+        store, scan_id = SnapshotStore(args.db), args.scan_id
+    else:
+        path = os.path.join(tempfile.mkdtemp(), 'snapshots.sqlite3')
+        store, scan_id = create_sample(path, args.rows)
+
+    dicts = measure('dicts', lambda: store.scan_snapshots(scan_id))
+    measure('dataclasses', lambda: [Governor(name=row['name'], id=str(row['governor_id']), alliance=row['alliance'] or "",
+                                             **{field: row[field] or 0 for field in STAT_FIELDS})
+                                    for row in store.scan_snapshots(scan_id)])
+    columns = measure('store', lambda: store.load_governors(scan_id))
+    print(f"GovernorStore uses {dicts / max(columns, 1):.1f}x less memory than dict rows")
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,56 @@
 # models/governor.py
+import re
 from dataclasses import dataclass
 from typing import Optional
 
+# Numeric stats of a governor (column order of the full scan)
+STAT_FIELDS = (
+    'power', 'kill_points', 'deads',
+    'tier1_kills', 'tier2_kills', 'tier3_kills', 'tier4_kills', 'tier5_kills',
+    'rss_assistance', 'alliance_helps', 'kvk_kills', 'kvk_deads', 'kvk_severely_wounded'
+)
+
+# Result file headers (ExcelManager._get_headers_for_option) -> Governor field
+HEADER_FIELDS = {
+    'Governor Name': 'name',
+    'Governor ID': 'id',
+    'Power': 'power',
+    'Kill Points': 'kill_points',
+    'Deads': 'deads',
+    'Tier 1 Kills': 'tier1_kills',
+    'Tier 2 Kills': 'tier2_kills',
+    'Tier 3 Kills': 'tier3_kills',
+    'Tier 4 Kills': 'tier4_kills',
+    'Tier 5 Kills': 'tier5_kills',
+    'Rss Assistance': 'rss_assistance',
+    'Alliance Helps': 'alliance_helps',
+    'Alliance': 'alliance',
+    'KvK Kills High': 'kvk_kills',
+    'KvK Deads High': 'kvk_deads',
+    'KvK Severely Wounds High': 'kvk_severely_wounded'
+}
+
 @dataclass
 class Governor:
+    # Stats are None when the OCR text had no digits (misread, not a real 0)
     name: str
     id: str
-    power: int = 0
-    kill_points: int = 0
-    deads: int = 0
-    tier1_kills: int = 0
-    tier2_kills: int = 0
-    tier3_kills: int = 0
-    tier4_kills: int = 0
-    tier5_kills: int = 0
-    rss_assistance: int = 0
-    alliance_helps: int = 0
+    power: Optional[int] = 0
+    kill_points: Optional[int] = 0
+    deads: Optional[int] = 0
+    tier1_kills: Optional[int] = 0
+    tier2_kills: Optional[int] = 0
+    tier3_kills: Optional[int] = 0
+    tier4_kills: Optional[int] = 0
+    tier5_kills: Optional[int] = 0
+    rss_assistance: Optional[int] = 0
+    alliance_helps: Optional[int] = 0
     alliance: str = ""
-    kvk_kills: int = 0
-    kvk_deads: int = 0
-    kvk_severely_wounded: int = 0
-    
+    kvk_kills: Optional[int] = 0
+    kvk_deads: Optional[int] = 0
+    kvk_severely_wounded: Optional[int] = 0
+    refreshed: bool = True
+
     @classmethod
     def from_basic_scan(cls, name: str, id_str: str, power: str, kill_points: str):
         """Create Governor from basic scan data."""
@@ -30,7 +60,7 @@ class Governor:
             power=cls._parse_int(power),
             kill_points=cls._parse_int(kill_points)
         )
-    
+
     @classmethod
     def from_pkd_scan(cls, name: str, id_str: str, power: str, kill_points: str, dead: str):
         """Create Governor from Power + Kill Points + Dead scan data."""
@@ -41,11 +71,34 @@ class Governor:
             kill_points=cls._parse_int(kill_points),
             deads=cls._parse_int(dead)
         )
-    
+
+    @classmethod
+    def from_scan_data(cls, data: dict):
+        """
+        Create Governor from GovernorScanner.analyze_governor data (OCR text per field).
+
+        Fields whose text has no digits (OCR failed) become None, not 0.
+        """
+        return cls(
+            name=data.get('name') or "",
+            id=str(cls._parse_int(data.get('id')) or ""),
+            alliance=data.get('alliance') or "",
+            refreshed=data.get('refreshed', True) is not False,
+            **{field: cls._parse_stat(data[field]) for field in STAT_FIELDS if field in data}
+        )
+
     @classmethod
     def _parse_int(cls, value):
-        """Parse integer with error handling."""
-        try:
-            return int(value)
-        except (ValueError, TypeError):
-            return 0
\ No newline at end of file
+        """Parse integer with error handling (OCR text such as "12,345,678")."""
+        if isinstance(value, int):
+            return value
+        digits = re.sub(r'\D', '', str(value or ''))
+        return int(digits) if digits else 0
+
+    @classmethod
+    def _parse_stat(cls, value):
+        """Parse an OCR stat; None when there are no digits (unreadable field)."""
+        if value is None or isinstance(value, int):
+            return value
+        digits = re.sub(r'\D', '', str(value))
+        return int(digits) if digits else None
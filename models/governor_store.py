@@ -0,0 +1,283 @@
+# models/governor_store.py
+import sys
+import threading
+
+import numpy as np
+
+from models.governor import Governor, STAT_FIELDS
+
+# Giá trị thiếu trong các cột số (trường không có trong loại quét)
+MISSING = -1
+
+_STAT_INDEX = {field: idx for idx, field in enumerate(STAT_FIELDS)}
+
+
+class StringPool:
+    def __init__(self):
+        """
+        Chuỗi dùng chung: mỗi chuỗi khác nhau chỉ lưu một lần, các dòng giữ mã int32
+
+        Tên alliance lặp lại ở hàng trăm governor, tên governor lặp lại qua
+        các lần quét.
+        """
+        self.strings = [""]
+        self.codes = {"": 0}
+
+    def __len__(self):
+        return len(self.strings)
+
+    def __getitem__(self, code):
+        return self.strings[code]
+
+    def code(self, value):
+        """Mã của chuỗi (thêm vào pool nếu chưa có)"""
+        value = value or ""
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.strings)
+            value = sys.intern(value)
+            self.strings.append(value)
+            self.codes[value] = code
+        return code
+
+    def lookup(self, codes):
+        """Mảng object các chuỗi của codes (chỉ chép tham chiếu)"""
+        return np.array(self.strings, dtype=object)[codes]
+
+
+class GovernorRow:
+    __slots__ = ('store', 'index')
+
+    def __init__(self, store, index):
+        """
+        Một dòng của GovernorStore, đọc thẳng từ các cột (không chép dữ liệu)
+
+        Args:
+            store: GovernorStore
+            index: Vị trí dòng
+        """
+        self.store = store
+        self.index = index
+
+    def __getattr__(self, name):
+        return self.store.value(self.index, name)
+
+    def __repr__(self):
+        return f"GovernorRow({self.store.value(self.index, 'id')}, {self.store.value(self.index, 'name')!r})"
+
+    def to_governor(self):
+        """Governor dataclass của dòng (trường thiếu là None)"""
+        return self.store.to_governor(self.index)
+
+
+class GovernorStore:
+    def __init__(self, capacity=1024):
+        """
+        Kho governor dạng cột: mỗi chỉ số là một cột int64 cấp phát trước,
+        tên và tag alliance là mã vào StringPool
+
+        Mỗi dòng tốn khoảng 8 byte cho mỗi chỉ số cộng vài mã int32, thay vì
+        một dict/dataclass với các đối tượng int và str riêng. Các cột
+        (column) là view nên báo cáo (delta_report) và sink kết quả đọc được
+        không cần chép.
+
+        Args:
+            capacity: Số dòng cấp phát ban đầu (tự tăng gấp đôi khi đầy)
+        """
+        self.size = 0
+        self.strings = StringPool()
+        # Dòng của file kết quả -> vị trí trong kho (các governor ghi bằng put)
+        self._positions = {}
+        self._lock = threading.RLock()
+        self._allocate(max(int(capacity), 1))
+
+    def _allocate(self, capacity):
+        self.capacity = capacity
+        self.ids = np.zeros(capacity, dtype=np.int64)
+        self.ranks = np.full(capacity, MISSING, dtype=np.int64)
+        # Một dòng mảng 2 chiều cho mỗi chỉ số: column(field) là vùng nhớ liền
+        self.stats = np.full((len(STAT_FIELDS), capacity), MISSING, dtype=np.int64)
+        self.name_codes = np.zeros(capacity, dtype=np.int32)
+        self.alliance_codes = np.zeros(capacity, dtype=np.int32)
+        self.refreshed = np.ones(capacity, dtype=bool)
+
+    def _grow(self, needed):
+        if needed <= self.capacity:
+            return
+        capacity = self.capacity
+        while capacity < needed:
+            capacity *= 2
+        old = (self.ids, self.ranks, self.stats, self.name_codes, self.alliance_codes, self.refreshed)
+        size = self.size
+        self._allocate(capacity)
+        self.ids[:size] = old[0][:size]
+        self.ranks[:size] = old[1][:size]
+        self.stats[:, :size] = old[2][:, :size]
+        self.name_codes[:size] = old[3][:size]
+        self.alliance_codes[:size] = old[4][:size]
+        self.refreshed[:size] = old[5][:size]
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        for index in range(self.size):
+            yield GovernorRow(self, index)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += self.size
+        if not 0 <= index < self.size:
+            raise IndexError(index)
+        return GovernorRow(self, index)
+
+    def append(self, governor, rank=None, fields=None):
+        """
+        Thêm một governor
+
+        Args:
+            governor: Governor, hoặc dict (kết quả analyze_governor / snapshot)
+            rank: Hạng của governor (None nếu không rõ)
+            fields: Các chỉ số có trong loại quét (None để lấy tất cả);
+                chỉ số khác được ghi là MISSING
+
+        Returns:
+            int: Vị trí dòng
+        """
+        with self._lock:
+            index = self.size
+            self._grow(index + 1)
+            self._set(index, governor, rank, fields)
+            self.size = index + 1
+            return index
+
+    def put(self, row, governor, rank=None, fields=None):
+        """
+        Ghi governor của một dòng file kết quả; ghi lại cùng dòng thì thay dòng cũ
+
+        Dòng là dòng của sheet mà governor được ghi vào (đã tính dời dòng khi
+        quét tiếp từ nhật ký, vị trí của shard/đoạn hạng), nên sheet_rows trả
+        về đúng các dòng như khi ghi từng ô.
+
+        Args:
+            row: Dòng trong file kết quả (1 là governor đầu tiên)
+            governor: Governor, hoặc dict (kết quả analyze_governor)
+            rank: Hạng của governor (None nếu không rõ)
+            fields: Các chỉ số có trong loại quét (None để lấy tất cả)
+
+        Returns:
+            int: Vị trí dòng trong kho
+        """
+        with self._lock:
+            index = self._positions.get(row)
+            if index is None:
+                index = self.append(governor, rank, fields)
+                self._positions[row] = index
+            else:
+                self.stats[:, index] = MISSING
+                self._set(index, governor, rank, fields)
+            return index
+
+    def _set(self, index, governor, rank, fields):
+        if isinstance(governor, dict):
+            governor = Governor.from_scan_data(governor)
+        self.ids[index] = Governor._parse_int(governor.id)
+        self.ranks[index] = MISSING if rank is None else rank
+        for field in STAT_FIELDS if fields is None else fields:
+            stat = _STAT_INDEX.get(field)
+            value = getattr(governor, field, None)
+            # Trường không đọc được (None) giữ MISSING, không thành 0
+            if stat is not None and value is not None:
+                self.stats[stat, index] = value
+        self.name_codes[index] = self.strings.code(governor.name)
+        self.alliance_codes[index] = self.strings.code(governor.alliance)
+        self.refreshed[index] = governor.refreshed
+
+    def sheet_rows(self):
+        """
+        Các governor đã ghi bằng put theo thứ tự dòng
+
+        Returns:
+            list: Danh sách (dòng, vị trí trong kho)
+        """
+        with self._lock:
+            return sorted(self._positions.items())
+
+    def column(self, field):
+        """
+        View (không chép) của một cột số: chỉ số trong STAT_FIELDS, 'id' hoặc 'rank'
+        """
+        if field == 'id':
+            return self.ids[:self.size]
+        if field == 'rank':
+            return self.ranks[:self.size]
+        return self.stats[_STAT_INDEX[field], :self.size]
+
+    def present_fields(self):
+        """Các chỉ số có ít nhất một giá trị"""
+        return [field for field in STAT_FIELDS if (self.column(field) != MISSING).any()]
+
+    def names(self):
+        return self.strings.lookup(self.name_codes[:self.size])
+
+    def alliances(self):
+        return self.strings.lookup(self.alliance_codes[:self.size])
+
+    def value(self, index, field):
+        """Giá trị một ô: int cho cột số (None nếu thiếu), str cho tên/alliance"""
+        if field == 'name':
+            return self.strings[self.name_codes[index]]
+        if field == 'alliance':
+            return self.strings[self.alliance_codes[index]]
+        if field == 'refreshed':
+            return bool(self.refreshed[index])
+        if field == 'id':
+            return int(self.ids[index])
+        if field == 'rank':
+            rank = int(self.ranks[index])
+            return None if rank == MISSING else rank
+        stat = _STAT_INDEX.get(field)
+        if stat is None:
+            raise AttributeError(field)
+        number = int(self.stats[stat, index])
+        return None if number == MISSING else number
+
+    def to_governor(self, index):
+        """Dòng index dưới dạng Governor dataclass (chỉ số thiếu là None)"""
+        return Governor(
+            name=self.value(index, 'name'),
+            id=str(self.value(index, 'id')),
+            alliance=self.value(index, 'alliance'),
+            refreshed=self.value(index, 'refreshed'),
+            **{field: self.value(index, field) for field in STAT_FIELDS}
+        )
+
+    @property
+    def nbytes(self):
+        """Bộ nhớ của các cột (không gồm StringPool)"""
+        return sum(array.nbytes for array in (self.ids, self.ranks, self.stats, self.name_codes,
+                                              self.alliance_codes, self.refreshed))
+
+    @classmethod
+    def from_snapshot_rows(cls, rows, capacity=1024):
+        """
+        Nạp các dòng snapshot (SnapshotStore, sqlite3.Row hoặc dict) vào kho
+
+        Mỗi dòng được đọc thẳng vào các cột, không giữ lại dict nào.
+        """
+        store = cls(capacity)
+        with store._lock:
+            for row in rows:
+                index = store.size
+                store._grow(index + 1)
+                store.ids[index] = row['governor_id']
+                store.ranks[index] = MISSING if row['rank'] is None else row['rank']
+                for stat, field in enumerate(STAT_FIELDS):
+                    value = row[field]
+                    if value is not None:
+                        store.stats[stat, index] = value
+                store.name_codes[index] = store.strings.code(row['name'])
+                store.alliance_codes[index] = store.strings.code(row['alliance'])
+                store.refreshed[index] = bool(row['refreshed'])
+                store.size = index + 1
+        return store
@@ -0,0 +1,423 @@
+# scanner/async_orchestrator.py
+import asyncio
+import threading
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from scanner.progress_handler import ProgressHandler
+from scanner.excel_manager import ExcelManager
+from scanner.pipeline import OrderedResultWriter
+from utils.frame import Frame
+from utils.input_macro import jitter_time
+from utils.screencap import decode_screencap, screencap_command
+
+
+class AsyncGovernorSession:
+    def __init__(self, scanner, device, lock=None):
+        """
+        Phần điều hướng/chụp ảnh của GovernorScanner chạy trên asyncio
+
+        Các thao tác với thiết bị và các lần chờ đều là await nên hủy task
+        có hiệu lực ngay giữa lúc đang quét một governor. Việc nặng CPU (OCR,
+        giải mã ảnh) và các hàm đồng bộ còn lại chạy trong executor.
+
+        Args:
+            scanner: GovernorScanner (cấu hình, OCR, ghi kết quả)
+            device: Thiết bị bất đồng bộ (AsyncAdbDevice/AsyncLdconsoleDevice)
+            lock: Lock giữ khi ghi một governor (dùng chung với lúc lưu workbook)
+        """
+        self.scanner = scanner
+        self.device = device
+        self.lock = lock or threading.RLock()
+
+    async def blocking(self, func, *args):
+        """
+        Chạy hàm đồng bộ trong executor của event loop
+
+        Hủy task không dừng được luồng executor: khi bị hủy, scanner.stop_event
+        được đặt để các thao tác dài (seek, quét lại) dừng ở bước kế tiếp, và
+        task chờ luồng đó xong rồi mới hủy tiếp, để phần dọn dẹp (đóng profile)
+        không chạy song song với một lần swipe còn dở.
+        """
+        future = asyncio.get_running_loop().run_in_executor(None, partial(func, *args))
+        try:
+            return await asyncio.shield(future)
+        except asyncio.CancelledError:
+            self.scanner.stop_event.set()
+            while not future.done():
+                try:
+                    await asyncio.wait([future])
+                except asyncio.CancelledError:
+                    pass
+            raise
+
+    async def capture(self, filename, max_attempts=3):
+        """Chụp màn hình (bất đồng bộ ở chế độ 'memory', qua executor ở chế độ 'file')"""
+        scanner = self.scanner
+        if scanner.capture_mode != 'memory':
+            return await self.blocking(scanner.capture_image, filename)
+
+        for attempt in range(1, max_attempts + 1):
+            data = await self.device.exec_out(screencap_command(scanner.capture_format))
+            image = await self.blocking(decode_screencap, data, scanner.capture_format)
+            if image is not None:
+                return Frame(image)
+            print(f"In-memory capture attempt {attempt}/{max_attempts} failed. Retrying...")
+            await asyncio.sleep(0.3)
+        return None
+
+    async def sleep(self, seconds):
+        await asyncio.sleep(jitter_time(seconds))
+
+    async def wait_for_state(self, state, seconds, filename=None):
+        """Bản bất đồng bộ của GovernorScanner.wait_for_state"""
+        scanner = self.scanner
+        if not scanner.screen.can_detect(state):
+            await self.sleep(seconds)
+            return None
+
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + max(scanner.state_timeout, seconds)
+        while True:
+            if filename is None:
+                scanner._poll_seq += 1
+                shot = await self.capture(f"{self.device.id}/state_{state}_{scanner._poll_seq}.png")
+            else:
+                shot = await self.capture(filename)
+
+            frame = shot if isinstance(shot, Frame) else await self.blocking(Frame.from_file, shot)
+            if scanner.screen.is_state(frame, state):
+                if isinstance(shot, str):
+                    scanner.frame_cache.put(shot, frame)
+                return shot
+
+            if loop.time() >= deadline:
+                print(f"Timed out waiting for screen '{state}'")
+                return None
+            await asyncio.sleep(scanner.state_poll_interval)
+
+    async def open_governor(self, i, j):
+        """Bản bất đồng bộ của GovernorScanner.open_governor"""
+        scanner = self.scanner
+        k = scanner.list_row(i, j)
+        print(f"Scanning governor {i-j} at Y={scanner.Y[k]}")
+
+        await self.device.shell(f'input tap 690 {scanner.Y[k]}')
+        check_filename = f"{self.device.id}/gov_{i-j}_check.png"
+        if scanner.screen.can_detect('profile'):
+            screenshot = await self.wait_for_state('profile', 1.3, check_filename)
+            if screenshot is not None:
+                return screenshot
+        else:
+            await self.sleep(1.3)
+
+        for attempt in range(5):
+            screenshot = await self.capture(check_filename)
+            if await self.blocking(scanner.is_profile_open, screenshot):
+                return screenshot
+
+            await self.device.shell('input swipe 690 605 690 540')
+            await asyncio.sleep(0.5)
+            await self.device.shell(f'input tap 690 {scanner.Y[k]}')
+            await self.sleep(1.2)
+
+        print(f"Warning: Could not verify governor profile opened for governor {i-j}")
+        return screenshot
+
+    async def capture_governor(self, i, j, main_img, fast_only=False):
+        """Bản bất đồng bộ của GovernorScanner.capture_governor"""
+        scanner = self.scanner
+        capture = {'option': scanner.scan_option, 'frames': {'main': main_img}, 'name': None}
+        if main_img is None:
+            return capture
+        capture.update(await self.blocking(scanner.profile_context, main_img, fast_only))
+
+        async def capture_label(label):
+            return await self.capture(f"{self.device.id}/gov_{i-j}_{label}.png")
+
+        if scanner.scan_option == 3:
+            frames = await scanner._pkd_scan_macro().run_async(
+                self.device, capture=capture_label, batch=scanner.batch_navigation)
+            capture['frames'].update(frames)
+        elif scanner.scan_option not in (2, 3):
+            try:
+                # Clipboard dùng thiết bị đồng bộ của scanner, chạy trong executor
+                copy_macro = scanner._copy_name_macro()
+                name = await self.blocking(
+                    scanner.get_clip_board,
+                    lambda: copy_macro.run(scanner.device, batch=scanner.batch_navigation))
+                if name and name != "Null":
+                    capture['name'] = name
+            except Exception as e:
+                print(f"Error getting governor name: {e}")
+
+            frames = await scanner._full_scan_macro().run_async(
+                self.device,
+                capture=capture_label,
+                batch=scanner.batch_navigation,
+                wait=self.wait_for_state if scanner.screen.is_ready else None
+            )
+            capture['frames'].update(frames)
+        return capture
+
+    def _report(self, sheet, i, j, data):
+        with self.lock:
+            self.scanner.report_governor(sheet, i, j, data)
+
+    async def close_governor(self):
+        await self.device.shell('input tap 1453 88')
+        await self.wait_for_state('rankings', 0.8)
+
+    async def scan_governor(self, i, j, sheet, pipeline=None, writer=None):
+        """
+        Quét một governor: điều hướng/chụp ảnh rồi OCR (trong executor hoặc pipeline)
+
+        Returns:
+            bool: True nếu thành công
+        """
+        # report_governor (nhật ký fsync, SQLite, sink) chạy trong executor để
+        # không chặn event loop của các thiết bị khác
+        carried = await self.blocking(self.scanner.carry_forward_governor, i, j)
+        if carried is not None:
+            if writer is not None:
+                await self.blocking(writer.put, i, carried)
+            else:
+                await self.blocking(self._report, sheet, i, j, carried)
+            return True
+
+        main_img = await self.open_governor(i, j)
+        if main_img is None:
+            print(f"Failed to capture main screenshot for governor {i-j}")
+            await self.close_governor()
+            if writer is not None:
+                await self.blocking(writer.skip, i)
+            return False
+        # Với pipeline, ID chỉ được đọc bằng bảng mẫu số (không OCR ngoài pipeline)
+        fast_only = writer is not None
+        if await self.blocking(self.scanner.check_duplicate, i, j, main_img, fast_only):
+            if writer is not None:
+                await self.blocking(writer.skip, i)
+            return False
+
+        capture = await self.capture_governor(i, j, main_img, fast_only)
+        await self.close_governor()
+
+        if writer is not None:
+            writer.reserve(i)
+            # submit có thể chặn khi hàng đợi OCR đầy
+            await self.blocking(pipeline.submit, capture, lambda data: writer.put(i, data))
+            return True
+
+        data = await self.blocking(self.scanner.analyze_governor, capture)
+        await self.blocking(self._report, sheet, i, j, data)
+        return True
+
+
+async def async_scan_worker(device_id, device, scanner, wb, sheet, output_file,
+                            scan_params, results_queue, active_scans, get_device_manager,
+                            pipeline=None, on_finished=None):
+    """
+    Task quét kingdom của một thiết bị (bản asyncio của scan_thread_worker)
+
+    Hủy task (ScanManager.stop_scan) dừng ngay cả khi đang quét dở một
+    governor: profile đang mở được đóng và kết quả đã có được lưu lại.
+
+    Args:
+        device: Thiết bị bất đồng bộ
+        (các tham số khác giống scan_thread_worker)
+    """
+    device_id = str(device_id)
+    progress_handler = ProgressHandler(results_queue)
+    progress_handler.start_tracking()
+    excel_manager = ExcelManager()
+    save_lock = threading.RLock()
+    session = AsyncGovernorSession(scanner, device, save_lock)
+    writer = None
+    finish_status = "error"
+
+    def save(final=False):
+        # Sink streaming (wb là None): fsync khi đang quét, xuất Excel một lần khi kết thúc
+        with save_lock:
+            if wb is not None:
+                excel_manager.save_workbook(wb, output_file)
+            elif final:
+                sheet.close()
+                sheet.export_excel(output_file)
+            else:
+                sheet.flush()
+
+    async def save_progress(final=False):
+        await session.blocking(save, final)
+
+    try:
+        kingdom = scan_params['kingdom']
+        search_range = scan_params['search_range']
+        resume_scanning = scan_params.get('resume_scanning', False)
+
+        print(f"Starting scan for kingdom {kingdom} on device {device_id}")
+
+        j = 4 if resume_scanning and isinstance(resume_scanning, int) else 0
+        start_rank = scan_params.get('start_rank')
+        if start_rank:
+            j = await session.blocking(scanner.seek_to_rank, start_rank)
+            if j is None:
+                raise RuntimeError(f"Could not reach rank {start_rank}")
+
+        scanner.rank_base = start_rank or 1
+        progress_handler.update_progress(device_id, 0, search_range, f"Starting scan in kingdom {kingdom}")
+
+        if pipeline is not None:
+            option = scanner.scan_option
+            writer = OrderedResultWriter(
+                lambda index, data: scanner.report_governor(sheet, index, j, data, option),
+                start=j,
+                lock=save_lock
+            )
+
+        for i in range(j, j + search_range):
+            if device_id in active_scans and active_scans[device_id]["status"] == "stopping":
+                raise asyncio.CancelledError()
+
+            try:
+                progress_handler.update_progress(device_id, i - j + 1, search_range)
+                success = await session.scan_governor(i, j, sheet, pipeline, writer)
+                if not success:
+                    print(f"Error scanning governor {i-j+1}")
+
+                if wb is not None and (i - j + 1) % 5 == 0:
+                    await save_progress()
+                    print(f"Saved progress to {output_file}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Error in scan loop at governor {i-j+1}: {e}")
+                await save_progress()
+
+        if writer is not None:
+            await session.blocking(writer.drain)
+        if scanner.skipped_ranks:
+            await session.blocking(scanner.retry_skipped, sheet, save_lock)
+        await save_progress(final=True)
+        finish_status = "completed"
+
+        progress_handler.notify_completed(device_id, output_file, f"Scanning completed for kingdom {kingdom}")
+        print(f"Scan completed for device {device_id}, kingdom {kingdom}")
+
+    except asyncio.CancelledError:
+        finish_status = "stopped"
+        print(f"Scanning on device {device_id} was stopped")
+        try:
+            # Đóng profile nếu đang mở dở
+            await device.shell('input tap 1453 88')
+            if writer is not None:
+                await session.blocking(writer.drain, 30)
+            await save_progress(final=True)
+        except Exception as e:
+            print(f"Error while stopping scan: {e}")
+        progress_handler.notify_completed(device_id, output_file, "Scanning stopped")
+        raise
+
+    except Exception as e:
+        print(f"Error in scan task: {e}")
+        traceback.print_exc()
+        try:
+            await save_progress(final=True)
+        except Exception as save_error:
+            print(f"Error saving results: {save_error}")
+        progress_handler.notify_error(device_id, str(e))
+
+    finally:
+        if device_id in active_scans:
+            del active_scans[device_id]
+
+        device_manager = get_device_manager()
+        if device_manager and hasattr(device_manager, 'mark_device_in_use'):
+            device_manager.mark_device_in_use(device_id, False)
+
+        if on_finished:
+            try:
+                on_finished(device_id, finish_status, sheet)
+            except Exception as e:
+                print(f"Error in scan finished callback: {e}")
+
+
+class AsyncScanOrchestrator:
+    def __init__(self, max_blocking_workers=32):
+        """
+        Một event loop (trong một luồng nền) điều khiển tất cả thiết bị
+
+        Mỗi thiết bị là một task; các hàm đồng bộ (OCR, clipboard, chụp ảnh
+        kiểu file) chạy trong một thread pool dùng chung.
+
+        Args:
+            max_blocking_workers: Số luồng tối đa cho các hàm đồng bộ
+        """
+        self.loop = asyncio.new_event_loop()
+        self.executor = ThreadPoolExecutor(max_workers=max_blocking_workers, thread_name_prefix="scan-blocking")
+        self.loop.set_default_executor(self.executor)
+        self._tasks = {}
+        self._thread = threading.Thread(target=self._run_loop, name="scan-orchestrator", daemon=True)
+        self._thread.start()
+
+    def _run_loop(self):
+        asyncio.set_event_loop(self.loop)
+        self.loop.run_forever()
+
+    async def _spawn(self, device_id, coro):
+        task = asyncio.ensure_future(coro)
+        self._tasks[device_id] = task
+
+        def _forget(done, device_id=device_id):
+            if self._tasks.get(device_id) is done:
+                del self._tasks[device_id]
+        task.add_done_callback(_forget)
+        return task
+
+    def start(self, device_id, coro):
+        """
+        Chạy coroutine quét của một thiết bị
+
+        Args:
+            device_id: ID thiết bị
+            coro: Coroutine (ví dụ async_scan_worker(...))
+
+        Returns:
+            asyncio.Task: Task của thiết bị
+        """
+        return asyncio.run_coroutine_threadsafe(self._spawn(str(device_id), coro), self.loop).result()
+
+    def cancel(self, device_id):
+        """
+        Hủy task của thiết bị (có hiệu lực ở lần await tiếp theo)
+
+        Returns:
+            bool: True nếu có task để hủy
+        """
+        task = self._tasks.get(str(device_id))
+        if task is None:
+            return False
+        self.loop.call_soon_threadsafe(task.cancel)
+        return True
+
+    def is_running(self, device_id):
+        return str(device_id) in self._tasks
+
+    async def _cancel_all(self, timeout):
+        tasks = list(self._tasks.values())
+        for task in tasks:
+            task.cancel()
+        if tasks:
+            await asyncio.wait(tasks, timeout=timeout)
+
+    def shutdown(self, timeout=5.0):
+        """Hủy tất cả task, chờ dọn dẹp rồi dừng event loop"""
+        if not self.loop.is_running():
+            return
+        try:
+            asyncio.run_coroutine_threadsafe(self._cancel_all(timeout), self.loop).result(timeout + 1)
+        except Exception as e:
+            print(f"Error cancelling scan tasks: {e}")
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join(2.0)
+        self.executor.shutdown(wait=False)
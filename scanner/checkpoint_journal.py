@@ -0,0 +1,195 @@
+# scanner/checkpoint_journal.py
+import glob
+import json
+import os
+import threading
+import time
+
+
+class ScanJournal:
+    def __init__(self, path, header, records=None, status=None):
+        """
+        Nhật ký quét chỉ ghi thêm (JSON Lines), fsync sau mỗi governor
+
+        Dòng đầu là thông tin lần quét (kingdom, scan_option, start_rank,
+        search_range, output_file); dòng {"type": "scan_update"} bổ sung
+        thông tin cho dòng đầu (ví dụ snapshot_scan_id); mỗi dòng sau là một
+        governor đã quét {"rank", "id", "data"}; dòng cuối {"type": "end"}
+        khi quét xong.
+        Khi máy/giả lập bị sập, lần quét có thể tiếp tục đúng từ hạng kế tiếp.
+
+        Dùng ScanJournal.create hoặc ScanJournal.open thay vì gọi trực tiếp.
+
+        Args:
+            path: Đường dẫn file nhật ký
+            header: Thông tin lần quét
+            records: Dict {hạng: dữ liệu} đã ghi
+            status: Trạng thái kết thúc đã ghi (None nếu chưa kết thúc)
+        """
+        self.path = path
+        self.header = header
+        self.records = records or {}
+        self.ids = {}
+        for rank, data in self.records.items():
+            if data.get('id'):
+                self.ids[str(data['id'])] = rank
+        self.status = status
+        self._lock = threading.Lock()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    @classmethod
+    def create(cls, path, kingdom, scan_option, start_rank, search_range, output_file):
+        """Tạo nhật ký mới cho một lần quét"""
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        header = {
+            "type": "scan",
+            "kingdom": kingdom,
+            "scan_option": scan_option,
+            "start_rank": start_rank,
+            "search_range": search_range,
+            "output_file": output_file,
+            "created": time.time()
+        }
+        journal = cls(path, header)
+        journal._append(header)
+        return journal
+
+    @classmethod
+    def open(cls, path):
+        """
+        Mở nhật ký đã có để quét tiếp
+
+        Dòng cuối bị ghi dở (sập giữa lúc ghi) được bỏ qua.
+        """
+        header = None
+        records = {}
+        status = None
+        with open(path, 'r', encoding='utf-8') as f:
+            content = f.read()
+        for line in content.splitlines():
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue
+            if entry.get('type') == 'scan':
+                header = entry
+            elif entry.get('type') == 'scan_update' and header is not None:
+                header.update({key: value for key, value in entry.items() if key != 'type'})
+            elif entry.get('type') == 'governor':
+                records[entry['rank']] = entry['data']
+            elif entry.get('type') == 'end':
+                status = entry.get('status')
+        if header is None:
+            raise ValueError(f"Not a scan journal: {path}")
+
+        journal = cls(path, header, records, status)
+        if content and not content.endswith("\n"):
+            # Kết thúc dòng ghi dở để dòng mới không bị nối vào
+            journal._file.write("\n")
+        return journal
+
+    def _append(self, entry):
+        with self._lock:
+            if self._file.closed:
+                return
+            self._file.write(json.dumps(entry, ensure_ascii=False, default=str) + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def update_header(self, **fields):
+        """Bổ sung thông tin lần quét (ghi một dòng scan_update, đọc lại khi mở nhật ký)"""
+        self.header.update(fields)
+        self._append(dict(fields, type="scan_update"))
+
+    @property
+    def start_rank(self):
+        return self.header.get('start_rank') or 1
+
+    @property
+    def end_rank(self):
+        """Hạng cuối cùng của lần quét"""
+        return self.start_rank + self.header['search_range'] - 1
+
+    def next_rank(self):
+        """Hạng tiếp theo cần quét (sau hạng lớn nhất đã ghi)"""
+        if not self.records:
+            return self.start_rank
+        return max(self.records) + 1
+
+    def is_duplicate(self, rank, data):
+        """
+        True nếu governor đã có trong nhật ký (cùng hạng, hoặc cùng ID ở hạng khác
+        do bảng xếp hạng thay đổi giữa hai lần chạy)
+        """
+        if rank in self.records:
+            return True
+        gov_id = str(data.get('id') or '')
+        return bool(gov_id) and gov_id in self.ids
+
+    def append(self, rank, data):
+        """
+        Ghi một governor (fsync trước khi trả về)
+
+        Returns:
+            bool: False nếu governor đã có trong nhật ký (không ghi lại)
+        """
+        if self.is_duplicate(rank, data):
+            return False
+        self._append({"type": "governor", "rank": rank, "id": data.get('id'), "data": data})
+        self.records[rank] = data
+        if data.get('id'):
+            self.ids[str(data['id'])] = rank
+        return True
+
+    def close(self, status=None):
+        """Đóng nhật ký; ghi dòng kết thúc nếu có status"""
+        if status:
+            self._append({"type": "end", "status": status, "time": time.time()})
+            self.status = status
+        with self._lock:
+            self._file.close()
+
+
+class OffsetSheet:
+    def __init__(self, sheet, offset):
+        """
+        Ghi dời xuống offset dòng (quét tiếp sau các dòng đã dựng lại từ nhật ký)
+
+        Args:
+            sheet: Sheet xlwt
+            offset: Số dòng dời xuống
+        """
+        self.sheet = sheet
+        self.offset = offset
+
+    def write(self, row, col, value, *args, **kwargs):
+        return self.sheet.write(row + self.offset if row > 0 else row, col, value, *args, **kwargs)
+
+    def put_governor(self, row, *args, **kwargs):
+        put_governor = getattr(self.sheet, 'put_governor', None)
+        if put_governor is not None:
+            put_governor(row + self.offset, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+
+def find_resumable_journal(journal_dir, kingdom):
+    """
+    Tìm nhật ký mới nhất chưa quét xong của kingdom
+
+    Returns:
+        str: Đường dẫn nhật ký, hoặc None
+    """
+    paths = sorted(glob.glob(os.path.join(journal_dir, f"{kingdom}_*.jsonl")), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            last = json.loads(lines[-1]) if lines else {}
+        except (OSError, ValueError):
+            # Dòng cuối ghi dở: nhật ký chưa kết thúc
+            return path
+        if not (last.get('type') == 'end' and last.get('status') == 'completed'):
+            return path
+    return None
@@ -0,0 +1,320 @@
+# scanner/chunk_scheduler.py
+import threading
+import time
+from collections import deque
+
+from scanner.excel_manager import ExcelManager
+from models.governor_store import GovernorStore
+
+
+class ChunkSheet:
+    def __init__(self, scheduler, sheet, start_rank):
+        """
+        Sheet của một đoạn hạng: dòng 1 là hạng start_rank
+
+        Mỗi ô được ghi vào kết quả chung của scheduler (theo hạng) và vào
+        workbook riêng của thiết bị tại vị trí hạng trong toàn bộ lần quét.
+
+        Args:
+            scheduler: ChunkScheduler
+            sheet: Sheet xlwt của thiết bị
+            start_rank: Hạng đầu của đoạn
+        """
+        self.scheduler = scheduler
+        self.sheet = sheet
+        self.start_rank = start_rank
+
+    def write(self, row, col, value, *args, **kwargs):
+        rank = self.start_rank + row - 1
+        if self.scheduler.record(rank, col, value, self.sheet):
+            self.sheet.write(rank - self.scheduler.start_rank + 1, col, value, *args, **kwargs)
+
+    def put_governor(self, row, *args, **kwargs):
+        rank = self.start_rank + row - 1
+        self.scheduler.record_governor(rank, *args, **kwargs)
+        put_governor = getattr(self.sheet, 'put_governor', None)
+        if put_governor is not None:
+            put_governor(rank - self.scheduler.start_rank + 1, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+
+class ChunkScheduler:
+    def __init__(self, scan_id, kingdom, scan_option, output_file, start_rank, total,
+                 chunk_size=20, stall_timeout=90.0, max_retries=2, refreshed=False):
+        """
+        Chia một lần quét kingdom thành các đoạn hạng nhỏ cho nhiều thiết bị
+
+        Thiết bị rảnh lấy đoạn tiếp theo trong hàng đợi chung nên thiết bị
+        chậm không giữ cả lần quét. Thiết bị không tiến triển trong
+        stall_timeout giây bị thu hồi phần còn lại của đoạn; kết quả được gộp
+        theo hạng khi tất cả thiết bị kết thúc.
+
+        Args:
+            scan_id: ID của lần quét
+            kingdom: Tên kingdom
+            scan_option: Loại quét (quyết định header)
+            output_file: File Excel gộp
+            start_rank: Hạng đầu tiên
+            total: Số governor cần quét
+            chunk_size: Số hạng mỗi đoạn
+            stall_timeout: Số giây không tiến triển trước khi thu hồi đoạn
+            max_retries: Số lần giao lại một hạng quét lỗi
+            refreshed: Thêm cột Refreshed (quét tăng dần)
+        """
+        self.scan_id = scan_id
+        self.kingdom = kingdom
+        self.scan_option = scan_option
+        self.output_file = output_file
+        self.start_rank = start_rank
+        self.total = total
+        self.stall_timeout = stall_timeout
+        self.max_retries = max_retries
+        self.refreshed = refreshed
+        self.status = "running"
+
+        chunk_size = max(1, chunk_size)
+        self.pending = deque(
+            (rank, min(chunk_size, start_rank + total - rank))
+            for rank in range(start_rank, start_rank + total, chunk_size)
+        )
+        self.leases = {}
+        self.workers = {}
+        self.scanned = set()
+        # Hạng quét lỗi: {hạng: số lần lỗi}; được đưa lại vào hàng đợi
+        self.failed = {}
+        self.rows = {}
+        # Governor theo dòng của file gộp (dòng 1 là start_rank)
+        self.governors = GovernorStore()
+        self._written = {}
+        self._cond = threading.Condition()
+
+    def add_worker(self, device_id):
+        """Đăng ký thiết bị tham gia lần quét"""
+        with self._cond:
+            self.workers[str(device_id)] = {
+                "status": "running",
+                "scanned": 0,
+                "chunks": 0,
+                "stalls": 0,
+                "started": time.time(),
+                "last": None
+            }
+
+    def remove_worker(self, device_id):
+        """Bỏ thiết bị không khởi động được"""
+        with self._cond:
+            self.workers.pop(str(device_id), None)
+            self._release(str(device_id))
+        self._merge_if_done()
+
+    def _release(self, device_id):
+        """Trả phần chưa quét của đoạn đang giữ về đầu hàng đợi (gọi khi giữ lock)"""
+        lease = self.leases.pop(device_id, None)
+        if lease is None:
+            return
+        end = lease["start"] + lease["count"]
+        if lease["next_rank"] < end:
+            self.pending.appendleft((lease["next_rank"], end - lease["next_rank"]))
+        self._cond.notify_all()
+
+    def _reclaim_stalled(self):
+        now = time.time()
+        for device_id, lease in list(self.leases.items()):
+            if now - lease["heartbeat"] > self.stall_timeout:
+                print(f"Device {device_id} stalled at rank {lease['next_rank']}, reassigning its chunk")
+                self.workers[device_id]["stalls"] += 1
+                self._release(device_id)
+
+    def acquire(self, device_id, should_stop=None, poll_interval=1.0):
+        """
+        Lấy đoạn hạng tiếp theo (đoạn trước của thiết bị được coi là xong)
+
+        Khi hàng đợi rỗng nhưng thiết bị khác còn đang quét, chờ để nhận lại
+        đoạn bị thu hồi nếu thiết bị đó bị treo.
+
+        Args:
+            device_id: ID thiết bị
+            should_stop: Hàm trả về True khi thiết bị cần dừng
+            poll_interval: Chu kỳ kiểm tra khi chờ (giây)
+
+        Returns:
+            tuple: (hạng đầu, số lượng), hoặc None khi hết việc hoặc cần dừng
+        """
+        device_id = str(device_id)
+        with self._cond:
+            self._release(device_id)
+            while True:
+                if should_stop and should_stop():
+                    return None
+                self._reclaim_stalled()
+
+                while self.pending:
+                    start, count = self.pending.popleft()
+                    # Bỏ các hạng đã quét (đoạn thu hồi từ thiết bị chậm nhưng còn chạy)
+                    ranks = [rank for rank in range(start, start + count) if rank not in self.scanned]
+                    if not ranks:
+                        continue
+                    start, count = ranks[0], ranks[-1] - ranks[0] + 1
+                    self.leases[device_id] = {
+                        "start": start,
+                        "count": count,
+                        "next_rank": start,
+                        "heartbeat": time.time()
+                    }
+                    self.workers[device_id]["chunks"] += 1
+                    return start, count
+
+                if not self.leases:
+                    return None
+                self._cond.wait(poll_interval)
+
+    def heartbeat(self, device_id, rank, success=True):
+        """
+        Báo thiết bị đã xử lý xong hạng rank
+
+        Hạng quét lỗi (success=False) không được tính là đã quét mà được đưa
+        về cuối hàng đợi (tối đa max_retries lần) để thiết bị rảnh quét lại.
+
+        Returns:
+            bool: False nếu đoạn đã bị thu hồi (thiết bị nên bỏ phần còn lại)
+        """
+        device_id = str(device_id)
+        with self._cond:
+            now = time.time()
+            worker = self.workers.get(device_id)
+            if success:
+                self.scanned.add(rank)
+                self.failed.pop(rank, None)
+                if worker is not None:
+                    worker["scanned"] += 1
+            elif rank not in self.scanned:
+                attempts = self.failed[rank] = self.failed.get(rank, 0) + 1
+                if attempts <= self.max_retries:
+                    self.pending.append((rank, 1))
+                    self._cond.notify_all()
+                else:
+                    print(f"Rank {rank} failed {attempts} times, giving up")
+            if worker is not None:
+                worker["last"] = now
+
+            lease = self.leases.get(device_id)
+            if lease is None or not lease["start"] <= rank < lease["start"] + lease["count"]:
+                return False
+            lease["next_rank"] = max(lease["next_rank"], rank + 1)
+            lease["heartbeat"] = now
+            return True
+
+    def release(self, device_id):
+        """Thiết bị dừng giữa chừng: trả phần còn lại của đoạn về hàng đợi"""
+        with self._cond:
+            self._release(str(device_id))
+
+    def record(self, rank, col, value, sheet=None):
+        """
+        Ghi một ô của hạng rank vào kết quả chung
+
+        Returns:
+            bool: True nếu ô chưa được ghi vào sheet này (xlwt không cho ghi đè)
+        """
+        with self._cond:
+            self.rows.setdefault(rank, {})[col] = value
+            written = self._written.setdefault(id(sheet), set())
+            if (rank, col) in written:
+                return False
+            written.add((rank, col))
+            return True
+
+    def record_governor(self, rank, governor, *args, **kwargs):
+        """Lưu governor của hạng rank vào kết quả chung (ghi lại thì thay bản cũ)"""
+        self.governors.put(rank - self.start_rank + 1, governor, *args, **kwargs)
+
+    def chunk_sheet(self, sheet, start_rank):
+        """Sheet để GovernorScanner ghi các governor của đoạn bắt đầu từ start_rank"""
+        return ChunkSheet(self, sheet, start_rank)
+
+    def progress(self):
+        """Số hạng đã quét và tổng số hạng"""
+        with self._cond:
+            return len(self.scanned), self.total
+
+    def worker_stats(self, device_id):
+        """
+        Thống kê của một thiết bị
+
+        Returns:
+            dict: governors, chunks, stalls, governors_per_minute, chunk (hạng đầu, hạng cuối)
+        """
+        with self._cond:
+            worker = self.workers.get(str(device_id))
+            if worker is None:
+                return None
+            elapsed = (worker["last"] or time.time()) - worker["started"]
+            lease = self.leases.get(str(device_id))
+            return {
+                "governors": worker["scanned"],
+                "chunks": worker["chunks"],
+                "stalls": worker["stalls"],
+                "governors_per_minute": worker["scanned"] * 60.0 / elapsed if elapsed > 0 else 0.0,
+                "chunk": (lease["start"], lease["start"] + lease["count"] - 1) if lease else None
+            }
+
+    def worker_finished(self, device_id, status, sheet=None):
+        """
+        Gọi khi thread của một thiết bị kết thúc; gộp kết quả khi thiết bị cuối xong
+
+        Args:
+            device_id: ID thiết bị
+            status: 'completed', 'stopped' hoặc 'error'
+            sheet: Sheet của thiết bị (không dùng, kết quả đã ghi theo hạng)
+        """
+        with self._cond:
+            self._release(str(device_id))
+            worker = self.workers.get(str(device_id))
+            if worker is not None:
+                worker["status"] = status
+        self._merge_if_done()
+
+    def _merge_if_done(self):
+        with self._cond:
+            if self.status != "running" or not self.workers:
+                return
+            if any(w["status"] == "running" for w in self.workers.values()):
+                return
+            self.status = "merging"
+
+        self.merge()
+
+    def merge(self):
+        """
+        Ghi kết quả theo thứ tự hạng vào một workbook (sang sheet mới khi
+        vượt giới hạn dòng của .xls)
+
+        Returns:
+            bool: True nếu lưu thành công
+        """
+        with self._cond:
+            rows = {rank: dict(cells) for rank, cells in self.rows.items() if cells}
+
+        missing = [rank for rank in range(self.start_rank, self.start_rank + self.total) if rank not in rows]
+
+        if missing:
+            print(f"Chunked scan {self.scan_id}: {len(missing)} rank(s) missing, first {missing[:10]}")
+            failed = [rank for rank in missing if rank in self.failed]
+            if failed:
+                print(f"Chunked scan {self.scan_id}: {len(failed)} of them failed after retries, first {failed[:10]}")
+
+        if len(self.governors):
+            saved = ExcelManager().export_governors(self.governors, self.scan_option, self.output_file, self.refreshed)
+        else:
+            # Quét danh sách: không có bản ghi governor, gộp theo từng ô
+            saved = ExcelManager().export_rows(
+                [(rank - self.start_rank + 1, [rows[rank].get(col, "") for col in range(max(rows[rank]) + 1)])
+                 for rank in sorted(rows)],
+                self.scan_option, self.output_file, self.refreshed
+            )
+        self.status = "completed" if saved else "error"
+        if saved:
+            print(f"Chunked scan {self.scan_id} merged into {self.output_file}")
+        return saved
@@ -0,0 +1,274 @@
+# scanner/delta_report.py
+import argparse
+import csv
+import json
+import os
+import sys
+
+import numpy as np
+import xlwt
+
+from models.governor import HEADER_FIELDS
+from models.governor_store import MISSING
+from scanner.snapshot_store import NUMERIC_FIELDS, parse_number
+
+FIELD_HEADERS = {field: header for header, field in HEADER_FIELDS.items()}
+
+
+class ScanTable:
+    def __init__(self, ids, names, alliances, columns):
+        """
+        Kết quả một lần quét dạng cột: mỗi trường số là một mảng int64
+
+        Args:
+            ids: Mảng int64 ID governor
+            names: Mảng object tên governor
+            alliances: Mảng object alliance ("" nếu không có)
+            columns: Dict {tên trường: mảng int64}, MISSING nếu không đọc được
+        """
+        self.ids = ids
+        self.names = names
+        self.alliances = alliances
+        self.columns = columns
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        Tạo bảng từ các dict trường (ví dụ kết quả analyze_governor hoặc snapshot)
+
+        Governor không có ID hợp lệ bị bỏ; ID trùng lặp giữ dòng đầu tiên.
+        """
+        ids, names, alliances = [], [], []
+        values = {field: [] for field in NUMERIC_FIELDS}
+        seen = set()
+        for record in records:
+            gov_id = parse_number(record.get('id', record.get('governor_id')))
+            if not gov_id or gov_id in seen:
+                continue
+            seen.add(gov_id)
+            ids.append(gov_id)
+            names.append(record.get('name') or "")
+            alliances.append(record.get('alliance') or "")
+            for field in NUMERIC_FIELDS:
+                number = parse_number(record.get(field))
+                values[field].append(MISSING if number is None else number)
+
+        present = [field for field in NUMERIC_FIELDS if any(v != MISSING for v in values[field])]
+        return cls(
+            np.array(ids, dtype=np.int64),
+            np.array(names, dtype=object),
+            np.array(alliances, dtype=object),
+            {field: np.array(values[field], dtype=np.int64) for field in present}
+        )
+
+    @classmethod
+    def from_file(cls, path):
+        """Đọc file kết quả của ResultSink (.csv hoặc .jsonl)"""
+        records = []
+        if path.endswith('.jsonl'):
+            with open(path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except ValueError:
+                        continue
+                    records.append({HEADER_FIELDS.get(key, key): value for key, value in entry.items()})
+        elif path.endswith('.csv'):
+            with open(path, 'r', encoding='utf-8', newline='') as f:
+                for entry in csv.DictReader(f):
+                    records.append({HEADER_FIELDS.get(key, key): value for key, value in entry.items()})
+        else:
+            raise ValueError(f"Unsupported scan file (use the .csv/.jsonl written next to the .xls): {path}")
+        return cls.from_records(records)
+
+    @classmethod
+    def from_governor_store(cls, records):
+        """
+        Tạo bảng từ GovernorStore: các cột số là view của kho, không chép
+
+        Governor không có ID hợp lệ bị bỏ; ID trùng lặp giữ dòng đầu tiên.
+        """
+        ids = records.column('id')
+        _, first = np.unique(ids, return_index=True)
+        keep = np.sort(first[ids[first] > 0])
+        if len(keep) == len(ids):
+            # Không phải lọc dòng nào: dùng thẳng các cột của kho
+            select = slice(None)
+        else:
+            select = keep
+        return cls(
+            ids[select],
+            records.names()[select],
+            records.alliances()[select],
+            {field: records.column(field)[select] for field in records.present_fields()}
+        )
+
+    @classmethod
+    def from_store(cls, store, scan_id):
+        """Đọc một lần quét từ SnapshotStore"""
+        return cls.from_governor_store(store.load_governors(scan_id))
+
+
+class ScanDelta:
+    def __init__(self, old, new):
+        """
+        So sánh hai lần quét của cùng một kingdom
+
+        Nối hai bảng theo ID bằng chỉ mục băm rồi tính chênh lệch mọi cột số
+        trong một lượt trên mảng; governor chỉ có ở một lần quét được đánh
+        dấu 'new' hoặc 'gone'.
+
+        Args:
+            old: ScanTable lần quét trước
+            new: ScanTable lần quét sau
+        """
+        self.old = old
+        self.new = new
+        self.fields = [field for field in NUMERIC_FIELDS if field in old.columns and field in new.columns]
+
+        # Chỉ mục băm ID -> vị trí trong lần quét trước
+        index = {gov_id: pos for pos, gov_id in enumerate(old.ids.tolist())}
+        self.old_pos = np.fromiter((index.get(gov_id, -1) for gov_id in new.ids.tolist()),
+                                   dtype=np.int64, count=len(new))
+        self.matched = self.old_pos >= 0
+        gone_mask = np.ones(len(old), dtype=bool)
+        gone_mask[self.old_pos[self.matched]] = False
+        self.gone = np.flatnonzero(gone_mask)
+
+        self.deltas = {}
+        for field in self.fields:
+            before = np.where(self.matched, old.columns[field][np.maximum(self.old_pos, 0)], MISSING)
+            after = new.columns[field]
+            valid = self.matched & (before != MISSING) & (after != MISSING)
+            self.deltas[field] = (np.where(valid, after - before, 0), valid)
+
+    def governor_rows(self):
+        """
+        Dòng báo cáo theo governor: các governor của lần sau, rồi các governor đã mất
+
+        Returns:
+            tuple: (headers, danh sách dòng)
+        """
+        headers = ['Governor ID', 'Governor Name', 'Alliance', 'Status']
+        for field in self.fields:
+            headers += [FIELD_HEADERS[field], f"{FIELD_HEADERS[field]} Delta"]
+
+        rows = []
+        status = np.where(self.matched, 'both', 'new')
+        for pos in range(len(self.new)):
+            row = [int(self.new.ids[pos]), self.new.names[pos], self.new.alliances[pos], status[pos]]
+            for field in self.fields:
+                value = int(self.new.columns[field][pos])
+                delta, valid = self.deltas[field]
+                row += [value if value != MISSING else "", int(delta[pos]) if valid[pos] else ""]
+            rows.append(row)
+
+        for pos in self.gone:
+            row = [int(self.old.ids[pos]), self.old.names[pos], self.old.alliances[pos], 'gone']
+            for field in self.fields:
+                value = int(self.old.columns[field][pos])
+                row += [value if value != MISSING else "", ""]
+            rows.append(row)
+        return headers, rows
+
+    def alliance_rows(self):
+        """
+        Tổng chênh lệch theo alliance (alliance ở lần quét sau)
+
+        Returns:
+            tuple: (headers, danh sách dòng sắp xếp theo chênh lệch kill points giảm dần)
+        """
+        alliances, group = np.unique(self.new.alliances.astype(str), return_inverse=True)
+        counts = np.bincount(group, minlength=len(alliances))
+        matched = np.bincount(group, weights=self.matched, minlength=len(alliances))
+
+        headers = ['Alliance', 'Governors', 'Matched']
+        sums = []
+        for field in self.fields:
+            delta, valid = self.deltas[field]
+            sums.append(np.bincount(group, weights=delta, minlength=len(alliances)).astype(np.int64))
+            headers.append(f"{FIELD_HEADERS[field]} Delta")
+
+        rows = [[alliances[idx] or "(none)", int(counts[idx]), int(matched[idx])] + [int(total[idx]) for total in sums]
+                for idx in range(len(alliances))]
+        if 'kill_points' in self.fields:
+            column = 3 + self.fields.index('kill_points')
+            rows.sort(key=lambda row: row[column], reverse=True)
+        return headers, rows
+
+    def write_report(self, path):
+        """
+        Ghi báo cáo trong một lần: .xls gồm hai sheet (Governors, Alliances),
+        hoặc .csv cho governor kèm file _alliances.csv
+
+        Returns:
+            bool: True nếu thành công
+        """
+        reports = [('Governors', self.governor_rows()), ('Alliances', self.alliance_rows())]
+        try:
+            if path.endswith('.csv'):
+                alliance_path = f"{os.path.splitext(path)[0]}_alliances.csv"
+                for (name, (headers, rows)), target in zip(reports, (path, alliance_path)):
+                    with open(target, 'w', encoding='utf-8', newline='') as f:
+                        writer = csv.writer(f)
+                        writer.writerow(headers)
+                        writer.writerows(rows)
+                return True
+
+            wb = xlwt.Workbook()
+            style = xlwt.XFStyle()
+            font = xlwt.Font()
+            font.bold = True
+            style.font = font
+            for name, (headers, rows) in reports:
+                sheet = wb.add_sheet(name)
+                for col, header in enumerate(headers):
+                    sheet.write(0, col, header, style)
+                for row_index, row in enumerate(rows, start=1):
+                    for col, value in enumerate(row):
+                        if value != "":
+                            sheet.write(row_index, col, value)
+            wb.save(path)
+            return True
+        except Exception as e:
+            print(f"Error writing delta report: {e}")
+            return False
+
+
+def load_scan(source, store=None):
+    """
+    Đọc một lần quét từ file (.csv/.jsonl) hoặc "db:<scan_id>" trong SnapshotStore
+    """
+    if source.startswith('db:'):
+        if store is None:
+            raise ValueError("A snapshot database is required for db:<scan_id> sources")
+        return ScanTable.from_store(store, int(source[3:]))
+    return ScanTable.from_file(source)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Compare two scans of a kingdom (KvK progress report)')
+    parser.add_argument('old', help='Earlier scan: .csv/.jsonl result file or db:<scan_id>')
+    parser.add_argument('new', help='Later scan: .csv/.jsonl result file or db:<scan_id>')
+    parser.add_argument('-o', '--output', default='delta_report.xls', help='Report file (.xls or .csv)')
+    parser.add_argument('--db', default=os.path.join('data', 'snapshots.sqlite3'), help='Snapshot database')
+    args = parser.parse_args()
+
+    store = None
+    if args.old.startswith('db:') or args.new.startswith('db:'):
+        from scanner.snapshot_store import SnapshotStore
+        store = SnapshotStore(args.db)
+
+    delta = ScanDelta(load_scan(args.old, store), load_scan(args.new, store))
+    if not delta.write_report(args.output):
+        sys.exit(1)
+    print(f"Compared {len(delta.old)} -> {len(delta.new)} governors "
+          f"({int(delta.matched.sum())} matched, {len(delta.new) - int(delta.matched.sum())} new, "
+          f"{len(delta.gone)} gone) -> {args.output}")
+
+
+if __name__ == "__main__":
+    main()
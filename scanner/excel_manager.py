@@ -2,19 +2,33 @@
 import xlwt
 from datetime import date
 
+from models.governor import HEADER_FIELDS
+
+# Số dòng tối đa của một sheet .xls (gồm dòng header)
+MAX_XLS_ROWS = 65536
+
+# Cột cuối khi quét tăng dần: "No" nếu governor được dùng lại từ lần quét trước
+REFRESHED_HEADER = 'Refreshed'
+
 class ExcelManager:
-    def setup_excel(self, scan_option):
+    def setup_excel(self, scan_option, refreshed=False):
         """
         Chuẩn bị file Excel cho kết quả quét
         
         Args:
-            scan_option (int): Loại quét (1=đầy đủ, 2=basic, 3=power+kills+dead)
+            scan_option (int): Loại quét (1=đầy đủ, 2=basic, 3=power+kills+dead, 4=danh sách)
+            refreshed (bool): Thêm cột Refreshed (quét tăng dần)
             
         Returns:
             tuple: (workbook, sheet)
         """
         wb = xlwt.Workbook()
-        sheet1 = wb.add_sheet(str(date.today()))
+        sheet1 = self._add_sheet(wb, str(date.today()), scan_option, refreshed)
+        return wb, sheet1
+    
+    def _add_sheet(self, wb, name, scan_option, refreshed=False):
+        """Thêm sheet có dòng header theo scan_option"""
+        sheet = wb.add_sheet(name)
         
         # Tạo style cho header
         style = xlwt.XFStyle()
@@ -23,16 +37,97 @@ class ExcelManager:
         style.font = font
         
         # Chọn headers phù hợp với scan_option
-        headers = self._get_headers_for_option(scan_option)
+        headers = self._get_headers_for_option(scan_option, refreshed)
             
         # Thêm headers vào sheet
         for col, header in enumerate(headers):
-            sheet1.write(0, col, header, style)
+            sheet.write(0, col, header, style)
+        return sheet
+    
+    def export_rows(self, rows, scan_option, filepath, refreshed=False):
+        """
+        Ghi toàn bộ kết quả vào file Excel trong một lần
+        
+        Khi vượt giới hạn dòng của .xls, các dòng tiếp theo sang sheet mới.
+        
+        Args:
+            rows: Danh sách (dòng, [giá trị theo cột]) sắp xếp theo dòng (dòng 1 là governor đầu tiên)
+            scan_option (int): Loại quét (quyết định header)
+            filepath: Đường dẫn file Excel
+            refreshed (bool): Thêm cột Refreshed (quét tăng dần)
             
-        return wb, sheet1
+        Returns:
+            bool: True nếu thành công, False nếu lỗi
+        """
+        wb, sheet = self.setup_excel(scan_option, refreshed)
+        base = 0
+        for row, values in rows:
+            while row - base >= MAX_XLS_ROWS:
+                base += MAX_XLS_ROWS - 1
+                sheet = self._add_sheet(wb, f"{date.today()} ({base // (MAX_XLS_ROWS - 1) + 1})", scan_option, refreshed)
+            for col, value in enumerate(values):
+                if value != "" and value is not None:
+                    sheet.write(row - base, col, value)
+        return self.save_workbook(wb, filepath)
+    
+    def governor_rows(self, governors, scan_option, refreshed=False, rows=None):
+        """
+        Các dòng kết quả đọc từ GovernorStore (các governor ghi bằng put)
+        
+        Args:
+            governors: GovernorStore
+            scan_option (int): Loại quét (quyết định các cột)
+            refreshed (bool): Thêm cột Refreshed (quét tăng dần)
+            rows: Chỉ lấy các dòng trong range này (None để lấy tất cả)
+            
+        Returns:
+            generator: (dòng, [giá trị theo cột]) theo thứ tự dòng, như export_rows nhận
+        """
+        headers = self._get_headers_for_option(scan_option, refreshed)
+        fields = [HEADER_FIELDS.get(header) for header in headers]
+        for row, index in governors.sheet_rows():
+            if rows is not None and row not in rows:
+                continue
+            values = []
+            for header, field in zip(headers, fields):
+                if header == REFRESHED_HEADER:
+                    value = "Yes" if governors.value(index, 'refreshed') else "No"
+                elif field is None:
+                    value = None
+                else:
+                    value = governors.value(index, field)
+                    # ID 0 là ID không đọc được
+                    if field == 'id' and not value:
+                        value = None
+                values.append("" if value is None else value)
+            yield row, values
+    
+    def export_governors(self, governors, scan_option, filepath, refreshed=False):
+        """
+        Ghi các governor của GovernorStore vào file Excel (xem export_rows)
+        
+        Returns:
+            bool: True nếu thành công, False nếu lỗi
+        """
+        return self.export_rows(self.governor_rows(governors, scan_option, refreshed),
+                                scan_option, filepath, refreshed)
+    
+    def refreshed_column(self, scan_option):
+        """
+        Vị trí cột Refreshed trong sheet của loại quét
+
+        Returns:
+            int: Chỉ số cột, hoặc None nếu loại quét không có cột này
+        """
+        headers = self._get_headers_for_option(scan_option, True)
+        if headers[-1] != REFRESHED_HEADER:
+            return None
+        return len(headers) - 1
     
-    def _get_headers_for_option(self, scan_option):
-        """Lấy danh sách headers phù hợp với loại quét"""
+    def _get_headers_for_option(self, scan_option, refreshed=False):
+        """Lấy danh sách headers phù hợp với loại quét (refreshed: thêm cột Refreshed)"""
+        if refreshed and scan_option != 4:
+            return self._get_headers_for_option(scan_option) + [REFRESHED_HEADER]
         if scan_option == 1:
             # Full scan
             return [
@@ -44,6 +139,9 @@ class ExcelManager:
         elif scan_option == 3:
             # Power, kills, deads only
             return ['Governor Name', 'Governor ID', 'Power', 'Kill Points', 'Deads']
+        elif scan_option == 4:
+            # Rankings list only (không mở profile nên không có ID)
+            return ['Rank', 'Governor Name', 'Alliance', 'Power']
         else:  # Option 2 or default
             # Basic scan
             return ['Governor Name', 'Governor ID', 'Power', 'Kill Points']
@@ -6,8 +6,63 @@ import pytesseract
 import tkinter as tk
 import random
 import threading
+from collections import namedtuple
 from datetime import date
 
+from utils.input_macro import InputMacro
+from utils.frame import Frame, FrameCache
+from utils.ocr_engine import get_ocr_engine, parse_tesseract_config, BATCH_DIGITS_CONFIG
+from scanner.resource_governor import get_resource_governor
+from utils.digit_recognizer import DigitRecognizer
+from utils.screen_state import ScreenRecognizer
+from utils.clipboard_manager import get_clipboard_service
+from scanner.rank_seek import RankSeeker, ROW_PITCH
+from models.governor import Governor, STAT_FIELDS
+from scanner.record_validator import RecordValidator
+from scanner.snapshot_store import parse_number
+
+DIGITS_CONFIG = "-c tessedit_char_whitelist=0123456789"
+DIGITS_PSM6_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789"
+
+# Một trường cần OCR: màn hình chứa nó, vùng ảnh, hàm tiền xử lý, cấu hình
+# tesseract khi đọc riêng lẻ và có được ghép vào ảnh batch số hay không
+OcrField = namedtuple('OcrField', ['name', 'screen', 'roi', 'preprocess', 'config', 'batch'])
+
+FULL_SCAN_FIELDS = [
+    OcrField('id', 'main', (720, 176, 200, 34), 'preprocess_image2', "--psm 7 -c tessedit_char_whitelist=0123456789", True),
+    OcrField('power', 'main', (856, 320, 240, 40), 'preprocess_image2', DIGITS_PSM6_CONFIG, True),
+    OcrField('kill_points', 'main', (1120, 320, 280, 40), 'preprocess_image2', DIGITS_CONFIG, True),
+    OcrField('alliance', 'main', (580, 320, 250, 40), 'preprocess_image', "", False),
+    OcrField('kvk_kills', 'kvk', (1000, 380, 180, 50), 'preprocess_image', DIGITS_PSM6_CONFIG, True),
+    OcrField('kvk_deads', 'kvk', (1020, 460, 200, 35), 'preprocess_image', DIGITS_CONFIG, True),
+    OcrField('kvk_severely_wounded', 'kvk', (1020, 510, 200, 35), 'preprocess_image', DIGITS_CONFIG, True),
+] + [
+    OcrField(f'tier{idx + 1}_kills', 'kills', (916, y, 215, 26), 'preprocess_image', DIGITS_PSM6_CONFIG, True)
+    for idx, y in enumerate(range(420, 620, 45))
+] + [
+    OcrField('deads', 'more', (1130, 443, 183, 40), 'preprocess_image3', DIGITS_PSM6_CONFIG, True),
+    OcrField('rss_assistance', 'more', (1130, 668, 183, 40), 'preprocess_image3', DIGITS_PSM6_CONFIG, True),
+    OcrField('alliance_helps', 'more', (1148, 732, 164, 44), 'preprocess_image3', DIGITS_PSM6_CONFIG, True),
+]
+
+# Tên governor đọc bằng OCR khi không lấy được từ clipboard
+NAME_FIELD = OcrField('name', 'main', (398, 177, 280, 38), 'preprocess_image', "", False)
+
+BASIC_SCAN_FIELDS = [
+    NAME_FIELD,
+    OcrField('id', 'main', (402, 221, 134, 34), 'preprocess_image', "--psm 7 -c tessedit_char_whitelist=0123456789", True),
+    OcrField('power', 'main', (636, 221, 164, 34), 'preprocess_image', "--psm 7 -c tessedit_char_whitelist=0123456789,", True),
+    OcrField('kill_points', 'main', (415, 267, 170, 38), 'preprocess_image', "--psm 7 -c tessedit_char_whitelist=0123456789,", True),
+]
+
+PKD_SCAN_FIELDS = BASIC_SCAN_FIELDS + [
+    OcrField('deads', 'pkd2', (415, 267, 170, 38), 'preprocess_image', "--psm 7 -c tessedit_char_whitelist=0123456789,", True),
+]
+
+SCAN_FIELDS = {1: FULL_SCAN_FIELDS, 2: BASIC_SCAN_FIELDS, 3: PKD_SCAN_FIELDS}
+
+_memory_capture_reported = False
+
 class GovernorScanner:
     def __init__(self, device, config):
         """
@@ -26,6 +81,63 @@ class GovernorScanner:
         self.Y = [285, 390, 490, 590, 605]
         # Set default scan option
         self.scan_option = getattr(config, 'scan_option', 1)
+        # Chế độ chụp ảnh: 'file' (screencap + pull) hoặc 'memory' (exec-out, giải mã trong bộ nhớ)
+        self.capture_mode = getattr(config, 'capture_mode', 'file')
+        # Định dạng ảnh ở chế độ 'memory': 'png' hoặc 'raw' (framebuffer RGBA, không nén)
+        self.capture_format = getattr(config, 'capture_format', 'png')
+        # Gộp các bước điều hướng thành một script shell cho mỗi lần gọi thiết bị
+        self.batch_navigation = getattr(config, 'batch_navigation', True)
+        # Mỗi ảnh chỉ giải mã một lần; giữ tối đa vài khung hình gần nhất
+        self.frame_cache = FrameCache(getattr(config, 'frame_cache_size', 4))
+        # Backend OCR: 'auto' dùng engine tesseract thường trú nếu có, nếu không thì pytesseract
+        self.ocr_backend = getattr(config, 'ocr_backend', 'auto')
+        # Ghép các trường số của cùng một màn hình thành một ảnh để OCR một lần
+        self.batch_ocr = getattr(config, 'batch_ocr', True)
+        # Nhận diện số theo mẫu font game; chỉ gọi Tesseract khi độ tin cậy thấp
+        atlas_path = getattr(config, 'digit_atlas_path', None)
+        if atlas_path is None and hasattr(config, 'data_dir'):
+            atlas_path = os.path.join(config.data_dir, 'digit_atlas.npz')
+        self.digit_recognizer = DigitRecognizer.load(atlas_path)
+        self.digit_confidence = getattr(config, 'digit_confidence', 0.8)
+        # Thư mục lưu ảnh số đã đọc bằng Tesseract để học bảng mẫu (tùy chọn)
+        self.digit_samples_dir = getattr(config, 'digit_samples_dir', None)
+        # Nhận diện màn hình bằng ảnh mẫu để chờ đúng trạng thái thay vì ngủ cố định
+        templates_dir = getattr(config, 'screen_templates_dir', None)
+        if templates_dir is None and hasattr(config, 'data_dir'):
+            templates_dir = os.path.join(config.data_dir, 'screen_templates')
+        self.screen = ScreenRecognizer(templates_dir, getattr(config, 'screen_anchors', None))
+        self.state_timeout = getattr(config, 'state_timeout', 3.0)
+        self.state_poll_interval = getattr(config, 'state_poll_interval', 0.1)
+        self._poll_seq = 0
+        # Giới hạn số lần OCR chạy cùng lúc để không tranh lõi CPU với giả lập
+        self.resource_governor = get_resource_governor(config)
+        # Hàm on_report(i, j, data, sheet) gọi trước khi ghi mỗi governor (ví dụ
+        # ghi nhật ký quét); trả về False để bỏ qua governor đã ghi
+        self.on_report = None
+        # Quét tăng dần: IncrementalIndex của lần quét trước (None để luôn mở profile)
+        self.incremental = None
+        # Chỉ số cột Refreshed của sheet (None nếu sheet không có cột này)
+        self.refreshed_column = None
+        self._list_reader = None
+        self._list_rank = None
+        # (index, dòng) sau khi danh sách được đưa lại về một hạng: governor
+        # index nằm ở dòng đó (xem list_row)
+        self._resync = None
+        # Chỉ mục ID của lần quét (GovernorIdIndex) để phát hiện profile mở trùng
+        self.id_index = None
+        # Hạng của governor i == j (hạng đầu của lần quét/đoạn hạng đang quét)
+        self.rank_base = 1
+        # Hạng bị bỏ qua do mở trùng governor, quét lại bằng retry_skipped
+        self.skipped_ranks = []
+        # Đặt khi dừng quét: các thao tác dài chạy đồng bộ (seek, quét lại) dừng ở bước kế tiếp
+        self.stop_event = threading.Event()
+        # Kiểm tra ràng buộc giữa các trường và đọc lại trường sai từ khung hình đã chụp
+        self.validator = None
+        if getattr(config, 'validate_records', True):
+            self.validator = RecordValidator(self, getattr(config, 'kp_tolerance', 0.002))
+        # Snapshot trước của kingdom {governor_id: snapshot} để kiểm tra chỉ số không giảm
+        self.previous_snapshots = None
+        self._profile_id = (None, None)
         
     def set_scan_option(self, scan_option):
         """
@@ -33,6 +145,7 @@ class GovernorScanner:
         1 = full scan
         2 = power + kill points only 
         3 = power + kill points + dead
+        4 = rank + name + alliance + power read from the rankings list (no profile)
         """
         self.scan_option = scan_option
         
@@ -55,16 +168,47 @@ class GovernorScanner:
             # Fallback to regular sleep
             time.sleep(base_time)
     
+    def capture_frame(self, max_attempts=3):
+        """
+        Chụp màn hình trực tiếp vào bộ nhớ qua `exec-out screencap`
+        
+        Args:
+            max_attempts: Số lần thử tối đa
+            
+        Returns:
+            Frame: Khung hình đã giải mã hoặc None nếu thất bại
+        """
+        for attempt in range(1, max_attempts + 1):
+            img = self.device.capture_frame(self.capture_format)
+            if img is not None:
+                return Frame(img)
+            
+            print(f"In-memory capture attempt {attempt}/{max_attempts} failed. Retrying...")
+            time.sleep(0.3)
+        
+        print(f"Failed to capture frame after {max_attempts} attempts.")
+        return None
+    
     def capture_image(self, filename):
         """
         Chụp ảnh màn hình từ thiết bị
         
         Args:
-            filename: Tên file để lưu
+            filename: Tên file để lưu (bỏ qua ở chế độ 'memory')
             
         Returns:
-            str: Đường dẫn đến file ảnh
+            str | Frame: Đường dẫn đến file ảnh, hoặc khung hình ở chế độ 'memory'
         """
+        global _memory_capture_reported
+        if self.capture_mode == 'memory':
+            if hasattr(self.device, 'capture_frame'):
+                return self.capture_frame()
+            if not _memory_capture_reported:
+                # Device của backend 'ldconsole' không chụp vào bộ nhớ: báo một lần
+                _memory_capture_reported = True
+                print(f"capture_mode 'memory' is not available for {type(self.device).__name__}, "
+                      f"using file capture (set device_backend to 'adb')")
+        
         try:
             # Đảm bảo rằng thư mục screenshots tồn tại
             screenshots_dir = getattr(self.config, 'screenshots_dir', 'screenshots')
@@ -113,109 +257,100 @@ class GovernorScanner:
             print(f"Error in capture_image: {e}")
             return None
         
-    def get_clip_board(self):
-        # Khởi tạo biến static cho lớp nếu chưa tồn tại
-        if not hasattr(GovernorScanner, '_clipboard_lock'):
-            GovernorScanner._clipboard_lock = threading.RLock()
-        
-        # Thử lấy khóa với timeout
-        max_attempts = 10
-        for attempt in range(max_attempts):
-            if GovernorScanner._clipboard_lock.acquire(blocking=False):
-                try:
-                    # Có quyền truy cập clipboard
-                    retry_attempts = 5
-                    for clipboard_attempt in range(retry_attempts):
-                        try:
-                            import tkinter as tk
-                            root = tk.Tk()
-                            root.withdraw()  # Ẩn cửa sổ Tkinter
-                            data = root.clipboard_get()
-                            root.destroy()
-                            return data
-                        except tk.TclError:
-                            print(f"Không thể truy cập clipboard, thử lại lần {clipboard_attempt+1}/{retry_attempts}...")
-                            time.sleep(0.5)  # Đợi 0.5 giây trước khi thử lại
-                        except Exception as e:
-                            print(f"Lỗi khi truy cập clipboard: {e}")
-                            break
-                    
-                    print("Không thể truy cập clipboard sau nhiều lần thử.")
-                    return "Null"
-                finally:
-                    # Đảm bảo luôn giải phóng khóa sau khi dùng xong
-                    GovernorScanner._clipboard_lock.release()
-        else:
-            # Không có quyền, đợi một chút và thử lại
-            print(f"Đang chờ quyền truy cập clipboard (lần {attempt+1}/{max_attempts})...")
-            time.sleep(1)
+    def wait_for_state(self, state, seconds, filename=None):
+        """
+        Chờ đến khi màn hình ở trạng thái state bằng cách chụp và nhận diện liên tục
+        
+        Nếu chưa có ảnh mẫu cho trạng thái này thì ngủ seconds như trước.
+        
+        Args:
+            state: Trạng thái cần chờ ('rankings', 'profile', 'more_info', 'kvk_stats', 'kills')
+            seconds: Thời gian chờ cố định khi không nhận diện được trạng thái
+            filename: Tên file ảnh chụp (chế độ 'file')
+            
+        Returns:
+            str | Frame: Ảnh chụp đúng trạng thái, hoặc None nếu hết thời gian/không nhận diện được
+        """
+        if not self.screen.can_detect(state):
+            self.randomize_time(seconds)
+            return None
+        
+        deadline = time.time() + max(self.state_timeout, seconds)
+        while True:
+            if filename is None:
+                # Mỗi lần chờ một file riêng vì ảnh có thể được OCR sau (pipeline)
+                self._poll_seq += 1
+                shot = self.capture_image(f"{self.device.id}/state_{state}_{self._poll_seq}.png")
+            else:
+                shot = self.capture_image(filename)
+            
+            frame = shot if isinstance(shot, Frame) else Frame.from_file(shot)
+            if self.screen.is_state(frame, state):
+                if isinstance(shot, str):
+                    self.frame_cache.put(shot, frame)
+                return shot
+            
+            if time.time() >= deadline:
+                print(f"Timed out waiting for screen '{state}'")
+                return None
+            time.sleep(self.state_poll_interval)
     
-        print("Không thể lấy quyền truy cập clipboard sau nhiều lần thử.")
-        return "Null"
+    def get_clip_board(self, copy=None):
+        """
+        Đọc clipboard của thiết bị (clipboard Android của giả lập nếu đọc được,
+        nếu không thì clipboard máy host qua broker dùng chung)
+        
+        Args:
+            copy: Hàm thực hiện thao tác copy trước khi đọc
+            
+        Returns:
+            str: Nội dung clipboard hoặc "Null" nếu không đọc được
+        """
+        data = get_clipboard_service().read(self.device, copy)
+        if data is None:
+            print("Không thể truy cập clipboard sau nhiều lần thử.")
+            return "Null"
+        return data
+    
+    def _get_frame(self, source):
+        """
+        Lấy khung hình đã giải mã từ đường dẫn file, ảnh trong bộ nhớ hoặc Frame
+        
+        Args:
+            source: Đường dẫn file ảnh, numpy.ndarray hoặc Frame
+            
+        Returns:
+            Frame: Khung hình hoặc None nếu không đọc được
+        """
+        if source is None:
+            print("Image file does not exist: None")
+            return None
+        return self.frame_cache.get(source)
     
     def preprocess_image(self, filename, roi):
         """
         Tiền xử lý ảnh cho OCR
         
         Args:
-            filename: Đường dẫn đến file ảnh
+            filename: Đường dẫn đến file ảnh, ảnh trong bộ nhớ hoặc Frame
             roi: Tuple (x, y, w, h) chỉ định vùng quan tâm
         
         Returns:
             numpy.ndarray: Ảnh đã tiền xử lý hoặc None nếu xử lý thất bại
         """
-        # Kiểm tra xem đường dẫn có tồn tại không
-        if filename is None or not os.path.exists(filename):
-            print(f"Image file does not exist: {filename}")
-            return None
-        
         try:
-            # Đọc ảnh
-            img = cv2.imread(filename)
-            if img is None:
-                print(f"Failed to load image: {filename}")
-                return None
-            
-            # Kiểm tra xem roi có hợp lệ không
-            x, y, w, h = roi
-            if x < 0 or y < 0 or w <= 0 or h <= 0:
-                print(f"Invalid ROI: {roi}")
+            frame = self._get_frame(filename)
+            if frame is None:
                 return None
             
-            # Kiểm tra xem roi có nằm trong ảnh không
-            height, width = img.shape[:2]
-            if x >= width or y >= height:
-                print(f"ROI outside image bounds: {roi}, image size: {width}x{height}")
-                return None
-            
-            # Điều chỉnh roi nếu nó vượt quá ranh giới ảnh
-            if x + w > width:
-                w = width - x
-            if y + h > height:
-                h = height - y
-            
-            # Cắt ảnh theo roi
-            try:
-                cropped = img[y:y+h, x:x+w]
-            except Exception as e:
-                print(f"Error cropping image: {e}")
-                return None
-            
-            # Chuyển đổi sang ảnh xám
-            try:
-                gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
-            except Exception as e:
-                print(f"Error converting to grayscale: {e}")
+            # Cắt vùng ảnh xám theo roi (view, không sao chép)
+            gray = frame.roi(roi)
+            if gray is None:
                 return None
             
             # Áp dụng ngưỡng
-            try:
-                _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-                return binary
-            except Exception as e:
-                print(f"Error applying threshold: {e}")
-                return None
-            
+            _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+            return binary
         except Exception as e:
             print(f"Error in preprocess_image: {e}")
             return None
@@ -225,27 +360,60 @@ class GovernorScanner:
         Tiền xử lý ảnh cho OCR
         
         Args:
-            filename: Đường dẫn đến file ảnh
+            filename: Đường dẫn đến file ảnh, ảnh trong bộ nhớ hoặc Frame
             roi: (x, y, w, h) vùng cần xử lý
             
         Returns:
             numpy.ndarray: Ảnh đã xử lý
         """
         try:
-            img = cv2.imread(filename)
-            if img is None:
-                print(f"Failed to load image: {filename}")
+            frame = self._get_frame(filename)
+            if frame is None:
+                return None
+            
+            gray = frame.roi(roi)
+            if gray is None:
                 return None
-                
-            x, y, w, h = roi
-            cropped = img[y:y+h, x:x+w]
-            gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
             _, binary = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY_INV + cv2.THRESH_OTSU)
             return binary
         except Exception as e:
             print(f"Error preprocessing image: {e}")
             return None
     
+    def _is_digits_config(self, config):
+        """Kiểm tra cấu hình OCR có chỉ cho phép chữ số hay không"""
+        whitelist = parse_tesseract_config(config)[1].get('tessedit_char_whitelist')
+        return bool(whitelist) and set(whitelist) <= set("0123456789,")
+    
+    def read_digits_fast(self, image):
+        """
+        Đọc số bằng bộ nhận diện theo mẫu
+        
+        Args:
+            image: Ảnh đã tiền xử lý
+            
+        Returns:
+            str: Số nhận diện được, hoặc None nếu không có bảng mẫu / độ tin cậy thấp
+        """
+        if self.digit_recognizer is None or image is None:
+            return None
+        try:
+            text, confidence = self.digit_recognizer.recognize(image)
+            if text and confidence >= self.digit_confidence:
+                return text
+        except Exception as e:
+            print(f"Digit recognizer error: {e}")
+        return None
+    
+    def _save_digit_sample(self, image, text):
+        """Lưu ảnh số đã đọc bằng Tesseract làm mẫu học (tên file '<giá trị>_<thời gian>.png')"""
+        try:
+            os.makedirs(self.digit_samples_dir, exist_ok=True)
+            filename = f"{text}_{getattr(self.device, 'id', 'x')}_{time.time_ns()}.png"
+            cv2.imwrite(os.path.join(self.digit_samples_dir, filename), image)
+        except Exception as e:
+            print(f"Error saving digit sample: {e}")
+    
     def read_ocr_from_image(self, image, config=""):
         """
         Đọc text từ ảnh sử dụng OCR
@@ -259,60 +427,559 @@ class GovernorScanner:
         """
         if image is None:
             return ""
+        
+        digits_only = self._is_digits_config(config)
+        if digits_only:
+            text = self.read_digits_fast(image)
+            if text is not None:
+                return text
             
         try:
-            text = pytesseract.image_to_string(image, config=config)
-            return text.strip()
+            # Engine giữ trong bộ nhớ theo từng luồng quét
+            engine = get_ocr_engine(self.config.tesseract_path, self.ocr_backend)
+            with self.resource_governor.ocr_slot():
+                text = engine.read(image, config)
+            if digits_only and self.digit_samples_dir and text.isdigit():
+                self._save_digit_sample(image, text)
+            return text
         except Exception as e:
             print(f"OCR error: {e}")
             return ""
     
     
-    def scan_governor(self, i, j, sheet, wb, output_file):
+    def read_ocr_batch(self, images, configs, batch_config=BATCH_DIGITS_CONFIG):
         """
-        Quét thông tin governor và lưu vào Excel
+        Đọc nhiều trường cùng lúc bằng một ảnh ghép
+        
+        Nếu số dòng nhận diện được không khớp số trường thì đọc lại từng
+        trường riêng lẻ với cấu hình của nó.
+        
+        Args:
+            images: Dict {tên trường: ảnh đã tiền xử lý}
+            configs: Dict {tên trường: cấu hình khi đọc riêng lẻ}
+            batch_config: Cấu hình cho ảnh ghép
+            
+        Returns:
+            dict: {tên trường: text}
+        """
+        results = {name: "" for name in images}
+        names = []
+        for name, image in images.items():
+            if image is None:
+                continue
+            # Thử nhận diện theo mẫu trước, chỉ các trường còn lại mới cần Tesseract
+            text = self.read_digits_fast(image)
+            if text is not None:
+                results[name] = text
+            else:
+                names.append(name)
+        if not names:
+            return results
+        
+        if self.batch_ocr and len(names) > 1:
+            try:
+                engine = get_ocr_engine(self.config.tesseract_path, self.ocr_backend)
+                with self.resource_governor.ocr_slot():
+                    lines = engine.read_batch([images[name] for name in names], batch_config)
+                if lines is not None:
+                    results.update(zip(names, lines))
+                    if self.digit_samples_dir:
+                        for name, text in zip(names, lines):
+                            if text.isdigit():
+                                self._save_digit_sample(images[name], text)
+                    return results
+                print(f"Batch OCR line count mismatch for {names}, reading fields one by one")
+            except Exception as e:
+                print(f"Batch OCR error: {e}")
+        
+        for name in names:
+            results[name] = self.read_ocr_from_image(images[name], configs.get(name, ""))
+        return results
+    
+    def read_fields(self, frames, fields):
+        """
+        Đọc các trường từ những khung hình đã chụp
+        
+        Các trường số của cùng một màn hình được đọc bằng một lần OCR ghép;
+        các trường còn lại được đọc riêng.
+        
+        Args:
+            frames: Dict {tên màn hình: khung hình/đường dẫn}
+            fields: Danh sách OcrField
+            
+        Returns:
+            dict: {tên trường: text} (chỉ gồm các trường đọc được)
+        """
+        results = {}
+        batches = {}
+        for field in fields:
+            frame = frames.get(field.screen)
+            if frame is None:
+                continue
+            image = getattr(self, field.preprocess)(frame, field.roi)
+            if field.batch:
+                batches.setdefault(field.screen, {})[field.name] = image
+            elif image is not None:
+                results[field.name] = self.read_ocr_from_image(image, field.config)
+        
+        configs = {field.name: field.config for field in fields}
+        for screen, images in batches.items():
+            try:
+                results.update(self.read_ocr_batch(images, configs))
+            except Exception as e:
+                print(f"Error reading {screen} fields: {e}")
+        
+        # Bỏ các trường không đọc được để giữ giá trị mặc định
+        return {name: text for name, text in results.items() if text}
+    
+    def seek_to_rank(self, rank):
+        """
+        Đưa danh sách xếp hạng đến hạng rank (đọc số hạng trên danh sách để xác nhận)
+        
+        Args:
+            rank: Hạng cần đến (bắt đầu từ 1)
+            
+        Returns:
+            int: Index dòng đang chứa hạng rank (dùng làm i và j khi quét tiếp),
+            hoặc None nếu thất bại
+        """
+        return RankSeeker(self).seek(rank)
+    
+    def list_row(self, i, j):
+        """
+        Dòng trên danh sách (chỉ số trong self.Y) của governor thứ i
+        
+        Sau khi seek_to_rank đưa danh sách về một hạng, các governor tiếp theo
+        được tính từ dòng mà seek trả về thay vì từ i.
         
         Args:
             i: Chỉ số của governor
             j: Chỉ số bắt đầu (cho phân trang)
-            sheet: Excel sheet
-            wb: Excel workbook
-            output_file: File đầu ra
             
         Returns:
-            bool: True nếu thành công, False nếu thất bại
+            int: Chỉ số dòng
         """
-        try:
-            # Tính toán vị trí dựa trên chỉ số
-            k = min(i, len(self.Y) - 1)
-            print(f"Scanning governor {i-j} at Y={self.Y[k]}")
+        if i == j:
+            self._resync = None
+        if self._resync is not None and i >= self._resync[0]:
+            index, row = self._resync
+            return min(row + i - index, len(self.Y) - 1)
+        return min(i, len(self.Y) - 1)
+    
+    def open_governor(self, i, j):
+        """
+        Mở profile governor trong danh sách và chụp màn hình chính
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
             
-            # Tap vào governor
-            self.device.shell(f'input tap 690 {self.Y[k]}')
+        Returns:
+            Ảnh màn hình profile (đường dẫn hoặc Frame)
+        """
+        # Tính toán vị trí dựa trên chỉ số
+        k = self.list_row(i, j)
+        print(f"Scanning governor {i-j} at Y={self.Y[k]}")
+        
+        # Tap vào governor
+        self.device.shell(f'input tap 690 {self.Y[k]}')
+        check_filename = f"{self.device.id}/gov_{i-j}_check.png"
+        if self.screen.can_detect('profile'):
+            screenshot_path = self.wait_for_state('profile', 1.3, check_filename)
+            if screenshot_path is not None:
+                return screenshot_path
+        else:
             self.randomize_time(1.3)
+        
+        # Đảm bảo tab thông tin đã mở đúng cách
+        check_info_opened = False
+        for attempt in range(5):
+            # Chụp màn hình để kiểm tra
+            screenshot_path = self.capture_image(check_filename)
+            
+            if self.is_profile_open(screenshot_path):
+                check_info_opened = True
+                break
+            
+            # Nếu chưa mở, thử lại
+            self.device.shell(f'input swipe 690 605 690 540')
+            time.sleep(0.5)
+            self.device.shell(f'input tap 690 {self.Y[k]}')
+            self.randomize_time(1.2)
+        
+        if not check_info_opened:
+            print(f"Warning: Could not verify governor profile opened for governor {i-j}")
+        return screenshot_path
+    
+    def carry_forward_governor(self, i, j):
+        """
+        Quét tăng dần: đọc dòng governor trên danh sách trước khi tap, dùng lại
+        snapshot trước nếu power không đổi
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
             
-            # Đảm bảo tab thông tin đã mở đúng cách
-            check_info_opened = False
-            for attempt in range(5):
-                # Chụp màn hình để kiểm tra
-                screenshot_path = self.capture_image(f"{self.device.id}/gov_{i-j}_check.png")
-                
-                # Kiểm tra xem profile đã mở chưa bằng cách tìm nút "More Info"
-                check_more_info_img = self.preprocess_image2(screenshot_path, (170, 775, 116, 29))
-                if check_more_info_img is not None:
-                    check_text = self.read_ocr_from_image(check_more_info_img)
-                    if 'MoreInfo' in check_text or 'Info' in check_text:
-                        check_info_opened = True
-                        break
-                
-                # Nếu chưa mở, thử lại
-                self.device.shell(f'input swipe 690 605 690 540')
-                time.sleep(0.5)
-                self.device.shell(f'input tap 690 {self.Y[k]}')
-                self.randomize_time(1.2)
+        Returns:
+            dict: Dữ liệu governor (refreshed=False) nếu không cần mở profile,
+            None nếu phải quét
+        """
+        if self.incremental is None:
+            return None
+        if i == j:
+            self._list_rank = None
+        if self._list_reader is None:
+            from scanner.list_reader import ListRowReader
+            self._list_reader = ListRowReader(self)
+        
+        k = self.list_row(i, j)
+        try:
+            frame = self.capture_image(f"{self.device.id}/list_{i-j}.png")
+            row = self._list_reader.read_row(frame, self.Y[k])
+        except Exception as e:
+            print(f"Error reading list row for governor {i-j}: {e}")
+            self._list_rank = None
+            return None
+        
+        expected = self._list_rank + 1 if self._list_rank else None
+        if expected and row['rank'] and row['rank'] != expected:
+            # Danh sách lệch sau các lần cuộn: đưa hạng cần quét về lại dòng quét
+            print(f"List drifted to rank {row['rank']} (expected {expected}), seeking back")
+            row_index = self.seek_to_rank(expected)
+            self._list_rank = expected if row_index is not None else None
+            if row_index is not None:
+                self._resync = (i, row_index)
+            return None
+        self._list_rank = row['rank'] or expected
+        
+        fields = [field.name for field in SCAN_FIELDS.get(self.scan_option, FULL_SCAN_FIELDS)]
+        data = self.incremental.carry_forward(row, fields, self.scan_option)
+        if data is None:
+            return None
+        
+        print(f"Governor {data['id']} unchanged (power {row['power']:,}), carried forward")
+        if self.id_index is not None:
+            self.id_index.claim(data['id'], self.rank_of(i, j))
+        if k == len(self.Y) - 1:
+            # Từ dòng 4 trở đi governor nào cũng nằm ở dòng Y[4]: cuộn đúng một dòng
+            RankSeeker(self).scroll(ROW_PITCH)
+        return data
+    
+    def rank_of(self, i, j):
+        """Hạng của governor thứ i trong lần quét bắt đầu ở rank_base"""
+        return self.rank_base + i - j
+    
+    def check_duplicate(self, i, j, main_img, fast_only=False):
+        """
+        Đọc ID ngay khi profile vừa mở; ID đã quét ở hạng khác nghĩa là
+        danh sách bị lệch (swipe trễ, lag) và profile này là governor cũ
+        
+        Governor trùng không được chụp tiếp: profile được đóng, danh sách
+        được đưa về hạng kế tiếp và hạng này được ghi lại để quét lại sau.
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
+            main_img: Ảnh màn hình profile
+            fast_only: Chỉ đọc ID bằng bảng mẫu số (khi OCR chạy ở pipeline,
+                không chạy Tesseract trên luồng điều hướng)
             
-            if not check_info_opened:
-                print(f"Warning: Could not verify governor profile opened for governor {i-j}")
+        Returns:
+            bool: True nếu là governor trùng (đã đóng profile)
+        """
+        if self.id_index is None or main_img is None:
+            return False
+        gov_id = self.read_profile_id(main_img, fast_only)
+        rank = self.rank_of(i, j)
+        previous = self.id_index.claim(gov_id, rank)
+        if previous is None:
+            return False
+        
+        print(f"Governor {gov_id} at rank {rank} was already scanned at rank {previous}, re-syncing the list")
+        self.close_governor()
+        self.skipped_ranks.append(rank)
+        if self.stop_event.is_set():
+            return True
+        row_index = self.seek_to_rank(rank + 1)
+        if row_index is None:
+            print(f"Could not re-sync the list at rank {rank + 1}")
+        else:
+            # Governor kế tiếp (i + 1) nằm ở dòng mà seek đưa hạng rank + 1 về
+            self._resync = (i + 1, row_index)
+        return True
+    
+    def read_profile_id(self, main_img, fast_only=False):
+        """
+        Đọc ID trên màn hình profile (nhớ kết quả của ảnh gần nhất)
+        
+        Args:
+            main_img: Ảnh màn hình profile
+            fast_only: Chỉ dùng bảng mẫu số, không gọi Tesseract
+            
+        Returns:
+            str: ID đọc được, hoặc None
+        """
+        image, gov_id = self._profile_id
+        if image is main_img and (gov_id is not None or fast_only):
+            return gov_id
+        id_field = next(field for field in SCAN_FIELDS.get(self.scan_option, FULL_SCAN_FIELDS) if field.name == 'id')
+        id_image = getattr(self, id_field.preprocess)(main_img, id_field.roi)
+        gov_id = self.read_digits_fast(id_image)
+        if gov_id is None and not fast_only and id_image is not None:
+            gov_id = self.read_ocr_from_image(id_image, id_field.config) or None
+        self._profile_id = (main_img, gov_id)
+        return gov_id
+    
+    def profile_context(self, main_img, fast_only=False):
+        """
+        Thông tin đã biết của profile đang mở, gửi kèm khung hình sang OCR
+        
+        - 'known': các trường đã đọc trên luồng điều hướng (ID), analyze_governor
+          không đọc lại
+        - 'previous': snapshot trước của governor để validator kiểm tra các
+          chỉ số không giảm
+        
+        Args:
+            main_img: Ảnh màn hình profile
+            fast_only: Chỉ đọc ID bằng bảng mẫu số (xem check_duplicate)
+            
+        Returns:
+            dict: {'known': {...}, 'previous': snapshot hoặc None}
+        """
+        context = {'known': {}, 'previous': None}
+        if main_img is None or (self.id_index is None and not self.previous_snapshots):
+            return context
+        try:
+            gov_id = self.read_profile_id(main_img, fast_only)
+        except Exception as e:
+            print(f"Error reading governor ID: {e}")
+            return context
+        if gov_id:
+            context['known']['id'] = gov_id
+            if self.previous_snapshots:
+                context['previous'] = self.previous_snapshots.get(parse_number(gov_id))
+        return context
+    
+    def retry_skipped(self, sheet, lock=None):
+        """
+        Quét lại các hạng bị bỏ qua do mở trùng governor (một lượt)
+        
+        Args:
+            sheet: Sheet của lần quét (dòng tính từ rank_base)
+            lock: Lock giữ trong khi quét mỗi governor (khi dùng chung workbook)
+            
+        Returns:
+            int: Số hạng quét lại thành công
+        """
+        ranks, self.skipped_ranks = sorted(set(self.skipped_ranks)), []
+        retried = 0
+        for rank in ranks:
+            if self.stop_event.is_set():
+                print(f"Scan stopped, not retrying ranks {ranks[ranks.index(rank):]}")
+                break
+            print(f"Retrying skipped rank {rank}")
+            row_index = self.seek_to_rank(rank)
+            if row_index is None:
+                print(f"Could not reach skipped rank {rank}")
+                continue
+            # Chọn i, j sao cho tap đúng dòng row_index và ghi đúng dòng của hạng
+            offset = rank - self.rank_base
+            i = max(row_index, offset) if row_index == len(self.Y) - 1 else row_index
+            self._resync = (i, row_index)
+            try:
+                if lock is not None:
+                    with lock:
+                        success = self.scan_governor(i, i - offset, sheet, None, None)
+                else:
+                    success = self.scan_governor(i, i - offset, sheet, None, None)
+            except Exception as e:
+                print(f"Error retrying rank {rank}: {e}")
+                success = False
+            retried += bool(success)
+        # Lượt quét lại cũng có thể trùng: giữ các hạng đó để báo cáo, không lặp lại
+        if self.skipped_ranks:
+            print(f"Ranks still skipped after retry: {self.skipped_ranks}")
+        return retried
+    
+    def is_profile_open(self, screenshot):
+        """
+        Kiểm tra profile governor đã mở (nhận diện màn hình nếu có ảnh mẫu,
+        nếu không thì OCR nút "More Info")
+        """
+        if self.screen.can_detect('profile'):
+            return self.screen.is_state(self._get_frame(screenshot), 'profile')
+        
+        check_more_info_img = self.preprocess_image2(screenshot, (170, 775, 116, 29))
+        if check_more_info_img is None:
+            return False
+        check_text = self.read_ocr_from_image(check_more_info_img)
+        return 'MoreInfo' in check_text or 'Info' in check_text
+    
+    def close_governor(self):
+        """Đóng governor info và chờ quay lại bảng xếp hạng"""
+        self.device.shell('input tap 1453 88')
+        self.wait_for_state('rankings', 0.8)
+    
+    def capture_governor(self, i, j, main_img, fast_only=False):
+        """
+        Phần điều hướng của một lần quét: chụp tất cả màn hình cần thiết
+        theo scan_option, chưa OCR
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
+            main_img: Ảnh màn hình profile
+            fast_only: Chỉ đọc ID bằng bảng mẫu số (OCR chạy ở pipeline)
+            
+        Returns:
+            dict: {'option', 'frames': {tên màn hình: ảnh}, 'name': tên từ clipboard hoặc None,
+            'known', 'previous'} (xem profile_context)
+        """
+        capture = {'option': self.scan_option, 'frames': {'main': main_img}, 'name': None}
+        if main_img is None:
+            return capture
+        capture.update(self.profile_context(main_img, fast_only))
+        
+        if self.scan_option == 3:
+            # Swipe để xem more info rồi chụp màn hình thứ hai
+            frames = self._pkd_scan_macro().run(
+                self.device,
+                capture=lambda label: self.capture_image(f"{self.device.id}/gov_{i-j}_{label}.png"),
+                batch=self.batch_navigation
+            )
+            capture['frames'].update(frames)
+        elif self.scan_option not in (2, 3):
+            # Lấy tên governor (thử copy từ clipboard)
+            try:
+                copy_macro = self._copy_name_macro()
+                gov_name_clip = self.get_clip_board(
+                    copy=lambda: copy_macro.run(self.device, batch=self.batch_navigation))
+                if gov_name_clip and gov_name_clip != "Null":
+                    capture['name'] = gov_name_clip
+            except Exception as e:
+                print(f"Error getting governor name: {e}")
+            
+            # Điều hướng qua các tab và chụp màn hình ở mỗi tab
+            frames = self._full_scan_macro().run(
+                self.device,
+                capture=lambda label: self.capture_image(f"{self.device.id}/gov_{i-j}_{label}.png"),
+                batch=self.batch_navigation,
+                wait=self.wait_for_state if self.screen.is_ready else None
+            )
+            capture['frames'].update(frames)
+        return capture
+    
+    def analyze_governor(self, capture):
+        """
+        Phần OCR của một lần quét: đọc các trường từ những khung hình đã chụp
+        
+        Không dùng đến thiết bị nên có thể chạy ở luồng/tiến trình khác.
+        
+        Args:
+            capture: Kết quả của capture_governor
+            
+        Returns:
+            dict: {tên trường: text}, các trường không đọc được giữ giá trị mặc định
+        """
+        option = capture.get('option', 1)
+        fields = list(SCAN_FIELDS.get(option, FULL_SCAN_FIELDS))
+        # Trường không đọc được để trống (ô trống, không phải 0)
+        data = {field.name: "" for field in fields}
+        data['name'] = "Unknown"
+        if option == 1:
+            data['alliance'] = "Unknown"
+        
+        if capture.get('name'):
+            data['name'] = capture['name']
+        elif NAME_FIELD not in fields:
+            # Thử đọc từ ảnh nếu clipboard không hoạt động
+            fields.append(NAME_FIELD)
+        
+        # Trường đã đọc trên luồng điều hướng (ID khi kiểm tra governor trùng) không OCR lại
+        known = capture.get('known') or {}
+        data.update(known)
+        data.update(self.read_fields(capture['frames'], [field for field in fields if field.name not in known]))
+        if self.validator is not None:
+            data = self.validator.validate(data, capture['frames'], fields, capture.get('previous'))
+        return data
+    
+    def report_governor(self, sheet, i, j, data, option=None):
+        """
+        In thông tin và ghi một governor vào sheet theo scan_option
+        
+        Args:
+            sheet: Excel sheet
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
+            data: Kết quả của analyze_governor
+            option: scan_option của dữ liệu (mặc định là scan_option hiện tại)
+        """
+        option = option or self.scan_option
+        if self.on_report is not None and self.on_report(i, j, data, sheet) is False:
+            print(f"Governor {data.get('id')} already recorded, skipping")
+            return
+        if option == 4:
+            self._print_governor_info_list(data['rank'], data['name'], data['alliance'], data['power'])
+            self._write_list_data(sheet, i, j, data['rank'], data['name'], data['alliance'], data['power'])
+        else:
+            # Bản ghi có kiểu: mọi chỉ số là int, không để lẫn chuỗi OCR vào sheet
+            gov = Governor.from_scan_data(data)
+            gov_id = gov.id
+            # Chỉ số không đọc được (None) ghi thành ô trống
+            stat = {field: "" if getattr(gov, field) is None else getattr(gov, field) for field in STAT_FIELDS}
+            if option == 2:
+                self._print_governor_info_basic(gov_id, gov.name, stat['power'], stat['kill_points'])
+                self._write_basic_data(sheet, i, j, gov.name, gov_id, stat['power'], stat['kill_points'])
+            elif option == 3:
+                self._print_governor_info_pkd(gov_id, gov.name, stat['power'], stat['kill_points'], stat['deads'])
+                self._write_pkd_data(sheet, i, j, gov.name, gov_id, stat['power'], stat['kill_points'], stat['deads'])
+            else:
+                kills_tiers = [stat['tier1_kills'], stat['tier2_kills'], stat['tier3_kills'],
+                               stat['tier4_kills'], stat['tier5_kills']]
+                self._print_governor_info_full(gov_id, gov.name, stat['power'], stat['kill_points'], stat['deads'],
+                                               kills_tiers, stat['rss_assistance'], stat['alliance_helps'],
+                                               gov.alliance, stat['kvk_kills'], stat['kvk_deads'],
+                                               stat['kvk_severely_wounded'])
+                self._write_full_data(sheet, i, j, gov.name, gov_id, stat['power'], stat['kill_points'], stat['deads'],
+                                      *kills_tiers, stat['rss_assistance'], stat['alliance_helps'], gov.alliance,
+                                      stat['kvk_kills'], stat['kvk_deads'], stat['kvk_severely_wounded'])
+            if self.refreshed_column is not None:
+                # "No" nếu governor được dùng lại từ snapshot trước
+                sheet.write(i - j + 1, self.refreshed_column, "Yes" if gov.refreshed else "No")
+            # Sink giữ bản ghi có kiểu trong GovernorStore theo dòng và xuất Excel từ đó
+            put_governor = getattr(sheet, 'put_governor', None)
+            if put_governor is not None:
+                fields = [field.name for field in SCAN_FIELDS.get(option, FULL_SCAN_FIELDS)]
+                put_governor(i - j + 1, gov, self.rank_of(i, j), fields)
+        
+        # Sink streaming ghi cả dòng ra file khi governor đã đủ các ô
+        end_row = getattr(sheet, 'end_row', None)
+        if end_row is not None:
+            end_row()
+    
+    def scan_governor(self, i, j, sheet, wb, output_file):
+        """
+        Quét thông tin governor và ghi vào sheet (luồng quét lo việc lưu file)
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
+            sheet: Excel sheet hoặc ResultSink
+            wb: Excel workbook (không dùng, giữ để tương thích)
+            output_file: File đầu ra (không dùng, giữ để tương thích)
+            
+        Returns:
+            bool: True nếu thành công, False nếu thất bại
+        """
+        try:
+            carried = self.carry_forward_governor(i, j)
+            if carried is not None:
+                self.report_governor(sheet, i, j, carried)
+                return True
+            
+            screenshot_path = self.open_governor(i, j)
+            if self.check_duplicate(i, j, screenshot_path):
+                return False
             
             # Dựa vào scan_option để thực hiện loại quét tương ứng
             if self.scan_option == 2:
@@ -323,16 +990,7 @@ class GovernorScanner:
                 success = self.scan_governor_full(i, j, sheet,screenshot_path)
             
             # Đảm bảo đóng governor info
-            self.device.shell('input tap 1453 88')
-            time.sleep(0.8)
-            
-            # Lưu workbook định kỳ
-            if i % 5 == 0:
-                try:
-                    wb.save(output_file)
-                    print(f"Progress saved to {output_file}")
-                except Exception as e:
-                    print(f"Error saving workbook: {e}")
+            self.close_governor()
             
             return success
         except Exception as e:
@@ -344,6 +1002,53 @@ class GovernorScanner:
                 pass
             return False
     
+    def scan_governor_pipelined(self, i, j, pipeline, writer):
+        """
+        Chỉ điều hướng và chụp ảnh governor, phần OCR gửi sang pipeline
+        
+        Kết quả được writer ghi theo thứ tự index khi worker OCR xong.
+        
+        Args:
+            i: Chỉ số của governor
+            j: Chỉ số bắt đầu (cho phân trang)
+            pipeline: OcrPipeline dùng chung
+            writer: OrderedResultWriter của lần quét này
+            
+        Returns:
+            bool: True nếu đã gửi sang OCR, False nếu thất bại
+        """
+        try:
+            carried = self.carry_forward_governor(i, j)
+            if carried is not None:
+                writer.put(i, carried)
+                return True
+            
+            main_img = self.open_governor(i, j)
+            if main_img is None:
+                print(f"Failed to capture main screenshot for governor {i-j}")
+                self.close_governor()
+                writer.skip(i)
+                return False
+            # OCR chạy ở pipeline: luồng điều hướng chỉ đọc ID bằng bảng mẫu số
+            if self.check_duplicate(i, j, main_img, fast_only=True):
+                writer.skip(i)
+                return False
+            
+            capture = self.capture_governor(i, j, main_img, fast_only=True)
+            self.close_governor()
+        except Exception as e:
+            print(f"Error scanning governor: {e}")
+            try:
+                self.device.shell('input tap 1453 88')
+            except:
+                pass
+            writer.skip(i)
+            return False
+        
+        writer.reserve(i)
+        pipeline.submit(capture, lambda data: writer.put(i, data))
+        return True
+    
     def scan_governor_basic(self, i, j, sheet, screenshot_path):
         """
         Scan governor with basic info (name, ID, power, kill points)
@@ -357,30 +1062,9 @@ class GovernorScanner:
             bool: Success or failure
         """
         try:
-            
-            
-            # Get governor name
-            gov_name_img = self.preprocess_image(screenshot_path, (398, 177, 280, 38))
-            gov_name = self.read_ocr_from_image(gov_name_img)
-            
-            # Get governor ID
-            gov_id_img = self.preprocess_image(screenshot_path, (402, 221, 134, 34))
-            gov_id = self.read_ocr_from_image(gov_id_img, "--psm 7 -c tessedit_char_whitelist=0123456789")
-            
-            # Get power
-            gov_power_img = self.preprocess_image(screenshot_path, (636, 221, 164, 34))
-            gov_power = self.read_ocr_from_image(gov_power_img, "--psm 7 -c tessedit_char_whitelist=0123456789,")
-            
-            # Get kill points
-            gov_kp_img = self.preprocess_image(screenshot_path, (415, 267, 170, 38))
-            gov_killpoints = self.read_ocr_from_image(gov_kp_img, "--psm 7 -c tessedit_char_whitelist=0123456789,")
-            
-            # Print info for debugging
-            self._print_governor_info_basic(gov_id, gov_name, gov_power, gov_killpoints)
-            
-            # Write to Excel
-            self._write_basic_data(sheet, i, j, gov_name, gov_id, gov_power, gov_killpoints)
-            
+            capture = {'option': 2, 'frames': {'main': screenshot_path}, 'name': None}
+            capture.update(self.profile_context(screenshot_path))
+            self.report_governor(sheet, i, j, self.analyze_governor(capture), 2)
             return True
         except Exception as e:
             print(f"Error in scan_governor_basic: {e}")
@@ -399,40 +1083,9 @@ class GovernorScanner:
             bool: Success or failure
         """
         try:
-            
-            # Get governor name
-            gov_name_img = self.preprocess_image(screenshot_path, (398, 177, 280, 38))
-            gov_name = self.read_ocr_from_image(gov_name_img)
-            
-            # Get governor ID
-            gov_id_img = self.preprocess_image(screenshot_path, (402, 221, 134, 34))
-            gov_id = self.read_ocr_from_image(gov_id_img, "--psm 7 -c tessedit_char_whitelist=0123456789")
-            
-            # Get power
-            gov_power_img = self.preprocess_image(screenshot_path, (636, 221, 164, 34))
-            gov_power = self.read_ocr_from_image(gov_power_img, "--psm 7 -c tessedit_char_whitelist=0123456789,")
-            
-            # Get kill points
-            gov_kp_img = self.preprocess_image(screenshot_path, (415, 267, 170, 38))
-            gov_killpoints = self.read_ocr_from_image(gov_kp_img, "--psm 7 -c tessedit_char_whitelist=0123456789,")
-            
-            # Swipe để xem more info
-            self.device.shell('input swipe 690 500 690 300')
-            self.randomize_time(1.0)
-            
-            # Chụp màn hình thứ hai
-            screenshot_path2 = self.capture_image(f"gov_{i-j}_pkd2.png")
-            
-            # Get dead troops
-            gov_dead_img = self.preprocess_image(screenshot_path2, (415, 267, 170, 38))
-            gov_dead = self.read_ocr_from_image(gov_dead_img, "--psm 7 -c tessedit_char_whitelist=0123456789,")
-            
-            # Print info for debugging
-            self._print_governor_info_pkd(gov_id, gov_name, gov_power, gov_killpoints, gov_dead)
-            
-            # Write to Excel
-            self._write_pkd_data(sheet, i, j, gov_name, gov_id, gov_power, gov_killpoints, gov_dead)
-            
+            capture = self.capture_governor(i, j, screenshot_path)
+            capture['option'] = 3
+            self.report_governor(sheet, i, j, self.analyze_governor(capture), 3)
             return True
         except Exception as e:
             print(f"Error in scan_governor_pkd: {e}")
@@ -477,29 +1130,21 @@ class GovernorScanner:
         (Hữu ích cho văn bản khó đọc)
         
         Args:
-            filename: Đường dẫn đến file ảnh
+            filename: Đường dẫn đến file ảnh, ảnh trong bộ nhớ hoặc Frame
             roi: Tuple (x, y, w, h) chỉ định vùng quan tâm
         
         Returns:
             numpy.ndarray: Ảnh đã tiền xử lý hoặc None nếu xử lý thất bại
         """
-        if filename is None or not os.path.exists(filename):
-            print(f"Image file does not exist: {filename}")
-            return None
-        
         try:
-            # Đọc ảnh
-            img = cv2.imread(filename)
-            if img is None:
-                print(f"Failed to load image: {filename}")
+            frame = self._get_frame(filename)
+            if frame is None:
                 return None
-                
-            # Cắt ảnh theo roi
-            x, y, w, h = roi
-            cropped = img[y:y+h, x:x+w]
             
-            # Chuyển đổi sang ảnh xám
-            gray = cv2.cvtColor(cropped, cv2.COLOR_BGR2GRAY)
+            # Cắt vùng ảnh xám theo roi
+            gray = frame.roi(roi)
+            if gray is None:
+                return None
             
             # Áp dụng lọc trung vị để giảm nhiễu
             gray = cv2.medianBlur(gray, 3)
@@ -513,11 +1158,46 @@ class GovernorScanner:
             return None
     def copy_name(self):
         
-        self.device.shell('input tap 538 178')  # Vị trí để copy tên
-        time.sleep(0.8)
-        gov_name_clip = self.get_clip_board()
+        def copy():
+            self.device.shell('input tap 538 178')  # Vị trí để copy tên
+            time.sleep(0.8)
+        
+        gov_name_clip = self.get_clip_board(copy)
         return gov_name_clip
             
+    def _copy_name_macro(self):
+        """Macro copy tên governor vào clipboard"""
+        return InputMacro("copy_name").tap(654, 228).sleep(0.3, randomize=False)
+    
+    def _pkd_scan_macro(self):
+        """Macro của quét pkd: swipe để xem more info rồi chụp màn hình 'pkd2'"""
+        return (InputMacro("pkd")
+                .swipe(690, 500, 690, 300)
+                .sleep(1.0)
+                .capture('pkd2'))
+    
+    def _full_scan_macro(self):
+        """
+        Macro điều hướng của quét đầy đủ: KvK stats -> tab Season -> tab Kills/Deads
+        
+        Returns:
+            InputMacro: Macro với các điểm chụp 'kvk', 'kills', 'more'
+        """
+        return (InputMacro("full_scan")
+                .tap(1226, 486)        # Nút KvK Stats
+                .wait('kvk_stats', 0.8)
+                .capture('kvk')
+                .sleep(0.6)
+                .tap(1174, 304)        # Tab Season (tap 2 lần)
+                .sleep(0.6)
+                .tap(1174, 304)
+                .wait('kills', 0.5)
+                .capture('kills')
+                .tap(226, 724)         # Tab Kills/Deads
+                .wait('more_info', 1.1)
+                .capture('more')
+                .tap(1396, 58))        # Đóng tab More Info
+    
     def scan_governor_full(self, i, j, sheet, main_img):
         """
         Quét đầy đủ thông tin của governor dựa trên logic của scan.py
@@ -531,175 +1211,13 @@ class GovernorScanner:
             bool: Success or failure
         """
         try:
-            # Các biến để lưu thông tin
-            gov_name = "Unknown"
-            gov_id = "0"
-            gov_power = "0"
-            gov_killpoints = "0"
-            gov_dead = "0"
-            kills_tiers = ["0", "0", "0", "0", "0"]  # T1, T2, T3, T4, T5
-            gov_rss_assistance = "0"
-            gov_alliance_helps = "0"
-            alliance_tag = "Unknown"
-            gov_kills_high = "0"  # KvK high kills
-            gov_deads_high = "0"  # KvK high deads
-            gov_sevs_high = "0"   # KvK severely wounded
-            
-            if not main_img:
+            if main_img is None:
                 print(f"Failed to capture main screenshot for governor {i-j}")
                 return False
             
-            try:  
-                # lấy id của governor
-                gov_id_img = self.preprocess_image2(main_img, (720, 176, 200, 34))
-                if gov_id_img is not None:
-                    gov_id_text = self.read_ocr_from_image(gov_id_img, "--psm 7 -c tessedit_char_whitelist=0123456789")
-                    if gov_id_text:
-                        gov_id = gov_id_text
-            except Exception as e:
-                print(f"Error getting governor ID: {e}")
-            
-            # Lấy tên governor (thử copy từ clipboard)
-            try:
-                self.device.shell('input tap 654 228')  # Vị trí để copy tên
-                time.sleep(0.3)
-                gov_name_clip = self.get_clip_board()
-                if gov_name_clip and gov_name_clip != "Null":
-                    gov_name = gov_name_clip
-                else:
-                    # Thử đọc từ ảnh nếu clipboard không hoạt động
-                    gov_name_img = self.preprocess_image(main_img, (398, 177, 280, 38))
-                    if gov_name_img is not None:
-                        gov_name_text = self.read_ocr_from_image(gov_name_img)
-                        if gov_name_text:
-                            gov_name = gov_name_text
-            except Exception as e:
-                print(f"Error getting governor name: {e}")
-            
-            # Tap vào Stats để xem các thông tin chi tiết hơn
-            self.device.shell('input tap 1226 486')  # Vị trí nút KvK Stats
-            self.randomize_time(0.8)
-            
-            # Chụp màn hình KvK stats
-            kvk_img = self.capture_image(f"{self.device.id}/gov_{i-j}_kvk.png")
-            
-            # Đọc Power và Kill Points từ màn hình KvK stats
-            if kvk_img:
-                try:
-                    gov_power_img = self.preprocess_image2(main_img, (856, 320, 240, 40))
-                    if gov_power_img is not None:
-                        gov_power_text = self.read_ocr_from_image(gov_power_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                        if gov_power_text:
-                            gov_power = gov_power_text
-                    
-                    gov_killpoints_img = self.preprocess_image2(main_img, (1120, 320, 280, 40))
-                    if gov_killpoints_img is not None:
-                        gov_kp_text = self.read_ocr_from_image(gov_killpoints_img, "-c tessedit_char_whitelist=0123456789")
-                        if gov_kp_text:
-                            gov_killpoints = gov_kp_text
-                            
-                    # Alliance tag
-                    alliance_tag_img = self.preprocess_image(main_img, (580, 320, 250, 40))
-                    if alliance_tag_img is not None:
-                        alliance_tag_text = self.read_ocr_from_image(alliance_tag_img)
-                        if alliance_tag_text:
-                            alliance_tag = alliance_tag_text
-                    
-                    # KvK Stats        
-                    gov_kills_high_img = self.preprocess_image(kvk_img, (1000, 380, 180, 50))
-                    if gov_kills_high_img is not None:
-                        kills_high_text = self.read_ocr_from_image(gov_kills_high_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                        if kills_high_text:
-                            gov_kills_high = kills_high_text
-                    
-                    gov_deads_high_img = self.preprocess_image(kvk_img, (1020, 460, 200, 35))
-                    if gov_deads_high_img is not None:
-                        deads_high_text = self.read_ocr_from_image(gov_deads_high_img, "-c tessedit_char_whitelist=0123456789")
-                        if deads_high_text:
-                            gov_deads_high = deads_high_text
-                    
-                    # Tap vào tab Season để xem Severely Wounded
-                    for _ in range(2):
-                        self.randomize_time(0.6)
-                        self.device.shell('input tap 1174 304')
-                    
-                    self.randomize_time(0.5)
-                    # Chụp ảnh màn hình kills tier
-                    kills_img = self.capture_image(f"{self.device.id}/gov_{i-j}_kills.png")
-                    
-                    if kvk_img:
-                        gov_sevs_high_img = self.preprocess_image(kvk_img, (1020, 510, 200, 35))
-                        if gov_sevs_high_img is not None:
-                            sevs_high_text = self.read_ocr_from_image(gov_sevs_high_img, "-c tessedit_char_whitelist=0123456789")
-                            if sevs_high_text:
-                                gov_sevs_high = sevs_high_text
-                except Exception as e:
-                    print(f"Error reading KvK stats: {e}")
-            
-            # Chuyển đến tab Kills/Deads để xem các thông tin tiers
-            self.device.shell('input tap 226 724')  # Tab Kills/Deads
-            self.randomize_time(0.8)
-            
-            
-            # Đọc thông tin các tier kills
-            if kills_img:
-                try:
-                    # Đọc các tier kills
-                    for idx, y in enumerate(range(420, 620, 45)):
-                        if idx >= 5:  # Chỉ đọc 5 tier
-                            break
-                            
-                        tier_img = self.preprocess_image(kills_img, (916, y, 215, 26))
-                        if tier_img is not None:
-                            tier_text = self.read_ocr_from_image(tier_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                            if tier_text:
-                                kills_tiers[idx] = tier_text
-                except Exception as e:
-                    print(f"Error reading kills tiers: {e}")
-            
-            # Chuyển đến More Info để xem thông tin deaths và rss assistance
-            self.randomize_time(0.3)
-            more_img = self.capture_image(f"{self.device.id}/gov_{i-j}_more.png")
-            
-            if more_img:
-                try:
-                    # Đọc thông tin deaths
-                    gov_dead_img = self.preprocess_image3(more_img, (1130, 443, 183, 40))
-                    if gov_dead_img is not None:
-                        dead_text = self.read_ocr_from_image(gov_dead_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                        if dead_text:
-                            gov_dead = dead_text
-                    
-                    # RSS Assistance
-                    gov_rss_img = self.preprocess_image3(more_img, (1130, 668, 183, 40))
-                    if gov_rss_img is not None:
-                        rss_text = self.read_ocr_from_image(gov_rss_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                        if rss_text:
-                            gov_rss_assistance = rss_text
-                    
-                    # Alliance helps
-                    gov_helps_img = self.preprocess_image3(more_img, (1148, 732, 164, 44))
-                    if gov_helps_img is not None:
-                        helps_text = self.read_ocr_from_image(gov_helps_img, "--psm 6 -c tessedit_char_whitelist=0123456789")
-                        if helps_text:
-                            gov_alliance_helps = helps_text
-                except Exception as e:
-                    print(f"Error reading more info: {e}")
-            
-            # Đóng tab More Info
-            self.device.shell('input tap 1396 58')
-            
-            # In thông tin debug
-            self._print_governor_info_full(gov_id, gov_name, gov_power, gov_killpoints, gov_dead,
-                                           kills_tiers, gov_rss_assistance, gov_alliance_helps, 
-                                           alliance_tag, gov_kills_high, gov_deads_high, gov_sevs_high)
-            
-            # Ghi vào Excel
-            self._write_full_data(sheet, i, j, gov_name, gov_id, gov_power, gov_killpoints, gov_dead,
-                                 kills_tiers[0], kills_tiers[1], kills_tiers[2], kills_tiers[3], kills_tiers[4],
-                                 gov_rss_assistance, gov_alliance_helps, alliance_tag, 
-                                 gov_kills_high, gov_deads_high, gov_sevs_high)
-            
+            capture = self.capture_governor(i, j, main_img)
+            capture['option'] = 1
+            self.report_governor(sheet, i, j, self.analyze_governor(capture), 1)
             return True
         except Exception as e:
             print(f"Error in scan_governor_full: {e}")
@@ -754,6 +1272,10 @@ class GovernorScanner:
         """Print Power + Kill Points + Dead governor information"""
         print(f'Governor ID: {gov_id}\nGovernor Name: {gov_name}\nGovernor Power: {self._format_int(gov_power)}\nGovernor Killpoints: {self._format_int(gov_killpoints)}\nGovernor Dead: {self._format_int(gov_dead)}')
     
+    def _print_governor_info_list(self, rank, gov_name, alliance_tag, gov_power):
+        """Print governor information read from the rankings list"""
+        print(f'Rank {rank}: [{alliance_tag}]{gov_name} - Power: {self._format_int(gov_power)}')
+    
     def _write_basic_data(self, sheet, i, j, gov_name, gov_id, gov_power, gov_killpoints):
         """Ghi dữ liệu cơ bản vào Excel"""
         sheet.write(i - j + 1, 0, gov_name)
@@ -769,6 +1291,13 @@ class GovernorScanner:
         sheet.write(i - j + 1, 3, self._to_int_check(gov_killpoints))
         sheet.write(i - j + 1, 4, self._to_int_check(gov_dead))
     
+    def _write_list_data(self, sheet, i, j, rank, gov_name, alliance_tag, gov_power):
+        """Ghi dữ liệu đọc từ danh sách xếp hạng vào Excel"""
+        sheet.write(i - j + 1, 0, rank)
+        sheet.write(i - j + 1, 1, gov_name)
+        sheet.write(i - j + 1, 2, alliance_tag)
+        sheet.write(i - j + 1, 3, self._to_int_check(gov_power))
+    
     def _to_int_check(self, element):
         """Chuyển đổi giá trị sang integer nếu có thể"""
         try:
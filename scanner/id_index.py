@@ -0,0 +1,40 @@
+# scanner/id_index.py
+import threading
+
+
+class GovernorIdIndex:
+    def __init__(self, ids=None):
+        """
+        Chỉ mục ID governor đã quét của một lần quét (dùng chung giữa các thiết bị)
+
+        Phát hiện profile mở trùng khi danh sách bị lệch (swipe trễ, lag):
+        cùng một ID xuất hiện ở hai hạng khác nhau.
+
+        Args:
+            ids: Dict {ID: hạng} đã quét (ví dụ ScanJournal.ids)
+        """
+        self.ids = {str(gov_id): rank for gov_id, rank in (ids or {}).items()}
+        self.duplicates = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.ids)
+
+    def claim(self, gov_id, rank):
+        """
+        Ghi nhận governor gov_id ở hạng rank
+
+        Returns:
+            int: Hạng đã quét governor này trước đó nếu khác rank (governor trùng),
+            None nếu governor mới hoặc ID không đọc được
+        """
+        gov_id = str(gov_id or '').strip()
+        if not gov_id.isdigit() or int(gov_id) == 0:
+            return None
+        with self._lock:
+            previous = self.ids.get(gov_id)
+            if previous is not None and previous != rank:
+                self.duplicates += 1
+                return previous
+            self.ids[gov_id] = rank
+            return None
@@ -0,0 +1,86 @@
+# scanner/incremental_scan.py
+import difflib
+
+from scanner.snapshot_store import NUMERIC_FIELDS
+
+
+def name_similarity(a, b):
+    """Độ giống nhau (0-1) của hai tên, không phân biệt hoa thường"""
+    a = (a or '').casefold()
+    b = (b or '').casefold()
+    if not a or not b:
+        return 0.0
+    return difflib.SequenceMatcher(None, a, b).ratio()
+
+
+class IncrementalIndex:
+    def __init__(self, snapshots, name_cutoff=0.6):
+        """
+        Chỉ mục snapshot mới nhất theo power để quét tăng dần
+
+        Governor trên danh sách có cùng power và tên gần giống với snapshot
+        trước được coi là không đổi: dùng lại snapshot, không mở profile.
+
+        Args:
+            snapshots: Dict {governor_id: snapshot} (SnapshotStore.latest_snapshots)
+            name_cutoff: Độ giống tên tối thiểu (tên trên danh sách đọc bằng OCR)
+        """
+        self.name_cutoff = name_cutoff
+        self.by_power = {}
+        for snapshot in snapshots.values():
+            if snapshot.get('power'):
+                self.by_power.setdefault(snapshot['power'], []).append(snapshot)
+        self.carried = 0
+        self.refreshed = 0
+
+    def __len__(self):
+        return sum(len(snapshots) for snapshots in self.by_power.values())
+
+    def match(self, name, power):
+        """
+        Tìm snapshot của governor có power và tên này
+
+        Returns:
+            dict: Snapshot, hoặc None nếu governor mới hoặc power đã đổi
+        """
+        if not power:
+            return None
+        best, best_score = None, self.name_cutoff
+        for snapshot in self.by_power.get(power, ()):
+            score = name_similarity(name, snapshot.get('name'))
+            if score >= best_score:
+                best, best_score = snapshot, score
+        return best
+
+    def carry_forward(self, row, fields, scan_option):
+        """
+        Dữ liệu governor dựng lại từ snapshot nếu dòng danh sách không đổi
+
+        Args:
+            row: Kết quả ListRowReader.read_row
+            fields: Tên các trường của scan_option hiện tại
+            scan_option: Loại quét
+
+        Returns:
+            dict: Dữ liệu như analyze_governor kèm refreshed=False, hoặc None
+            nếu phải mở profile (governor mới, power đổi, snapshot thiếu trường)
+        """
+        snapshot = self.match(row.get('name'), row.get('power'))
+        if snapshot is None:
+            self.refreshed += 1
+            return None
+
+        data = {'name': snapshot.get('name') or row.get('name') or "Unknown",
+                'id': str(snapshot['governor_id'])}
+        for field in fields:
+            if field in NUMERIC_FIELDS:
+                if snapshot.get(field) is None:
+                    # Lần quét trước dùng loại quét khác, không có trường này
+                    self.refreshed += 1
+                    return None
+                data[field] = str(snapshot[field])
+        if scan_option == 1:
+            data['alliance'] = snapshot.get('alliance') or "Unknown"
+        data['refreshed'] = False
+        self.carried += 1
+        return data
@@ -0,0 +1,135 @@
+# scanner/list_reader.py
+import re
+
+from scanner.governor_scanner import OcrField
+from scanner.snapshot_store import parse_number
+from utils.ocr_engine import get_ocr_engine
+
+# Các cột của một dòng bảng xếp hạng, tọa độ y tính từ tâm dòng (x, dy, w, h)
+LIST_RANK_ROI = (300, -25, 120, 50)
+LIST_NAME_ROI = (560, -22, 420, 44)
+LIST_POWER_ROI = (1130, -22, 250, 44)
+
+LIST_DIGITS_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789,"
+LIST_NAME_CONFIG = "--psm 7"
+# Ảnh ghép tên của nhiều dòng (mỗi dòng một tên)
+LIST_NAMES_BATCH_CONFIG = "--psm 6"
+
+# Tag alliance đứng trước tên trên danh sách: "[ABC]Name"
+ALLIANCE_TAG = re.compile(r'^\s*[\[\(]([^\]\)]{1,6})[\]\)]\s*')
+
+
+def row_fields(y, suffix=""):
+    """
+    Các trường số của dòng có tâm tại y
+
+    Args:
+        y: Tọa độ y tâm dòng
+        suffix: Hậu tố tên trường (để đọc nhiều dòng trong một lần)
+
+    Returns:
+        list: Danh sách OcrField trên màn hình 'list'
+    """
+    def roi(column):
+        x, dy, w, h = column
+        return (x, int(round(y + dy)), w, h)
+
+    return [
+        OcrField(f'rank{suffix}', 'list', roi(LIST_RANK_ROI), 'preprocess_image2', LIST_DIGITS_CONFIG, True),
+        OcrField(f'power{suffix}', 'list', roi(LIST_POWER_ROI), 'preprocess_image2', LIST_DIGITS_CONFIG, True),
+    ]
+
+
+def name_roi(y):
+    x, dy, w, h = LIST_NAME_ROI
+    return (x, int(round(y + dy)), w, h)
+
+
+def split_list_name(text):
+    """
+    Tách tag alliance khỏi tên đọc trên danh sách
+
+    Returns:
+        tuple: (tên, tag alliance hoặc "")
+    """
+    text = (text or '').strip()
+    match = ALLIANCE_TAG.match(text)
+    if match is None:
+        return text, ""
+    return text[match.end():].strip(), match.group(1).strip()
+
+
+def clean_list_name(name):
+    """Bỏ tag alliance và khoảng trắng thừa của tên đọc trên danh sách"""
+    return split_list_name(name)[0]
+
+
+class ListRowReader:
+    def __init__(self, scanner):
+        """
+        Đọc hạng, tên và power của governor ngay trên màn hình bảng xếp hạng
+        (không cần mở profile)
+
+        Args:
+            scanner: GovernorScanner (dùng tiền xử lý ảnh và OCR của nó)
+        """
+        self.scanner = scanner
+
+    def read_row(self, frame, y):
+        """
+        Đọc một dòng của danh sách
+
+        Args:
+            frame: Ảnh màn hình danh sách (đường dẫn hoặc Frame)
+            y: Tọa độ y tâm dòng
+
+        Returns:
+            dict: {'rank': int|None, 'name': str, 'alliance': str, 'power': int|None};
+            3 hạng đầu là huy hiệu nên rank là None
+        """
+        return self.read_rows(frame, [y])[0]
+
+    def read_rows(self, frame, ys):
+        """
+        Đọc nhiều dòng của cùng một ảnh danh sách
+
+        Các cột số của mọi dòng được đọc bằng một lần OCR ghép, tên của mọi
+        dòng bằng một lần OCR ghép khác.
+
+        Args:
+            frame: Ảnh màn hình danh sách (đường dẫn hoặc Frame)
+            ys: Tọa độ y tâm các dòng
+
+        Returns:
+            list: Kết quả như read_row cho từng dòng theo thứ tự ys
+        """
+        fields = []
+        for idx, y in enumerate(ys):
+            fields += row_fields(y, f"_{idx}")
+        texts = self.scanner.read_fields({'list': frame}, fields)
+        names = self._read_names(frame, ys)
+
+        rows = []
+        for idx, name in enumerate(names):
+            name, alliance = split_list_name(name)
+            rows.append({
+                'rank': parse_number(texts.get(f'rank_{idx}')),
+                'name': name,
+                'alliance': alliance,
+                'power': parse_number(texts.get(f'power_{idx}'))
+            })
+        return rows
+
+    def _read_names(self, frame, ys):
+        """Đọc tên của các dòng (ảnh ghép, đọc lại từng dòng nếu số dòng không khớp)"""
+        images = [self.scanner.preprocess_image(frame, name_roi(y)) for y in ys]
+        if len(ys) > 1 and all(image is not None for image in images):
+            try:
+                engine = get_ocr_engine(self.scanner.config.tesseract_path, self.scanner.ocr_backend)
+                with self.scanner.resource_governor.ocr_slot():
+                    lines = engine.read_batch(images, LIST_NAMES_BATCH_CONFIG)
+                if lines is not None:
+                    return lines
+            except Exception as e:
+                print(f"Batch OCR error on list names: {e}")
+        return [self.scanner.read_ocr_from_image(image, LIST_NAME_CONFIG) for image in images]
@@ -0,0 +1,136 @@
+# scanner/list_scan.py
+import time
+
+from scanner.list_reader import ListRowReader
+from scanner.rank_seek import RankSeeker, RANK_COLUMN, FIRST_ROW_Y
+
+# Vùng hiển thị của danh sách (tâm dòng phải nằm trong khoảng này để đọc đủ các cột)
+LIST_TOP = RANK_COLUMN[1] + 30
+LIST_BOTTOM = RANK_COLUMN[1] + RANK_COLUMN[3] - 30
+
+# Số dòng giữ lại giữa hai trang để không bỏ sót governor khi cuộn lệch
+PAGE_OVERLAP = 1
+
+
+class ListPageScanner:
+    def __init__(self, scanner, overlap=PAGE_OVERLAP):
+        """
+        Quét bảng xếp hạng ngay trên màn hình danh sách (scan_option 4)
+
+        Mỗi trang: chụp một ảnh, tách các dòng theo cột hạng, OCR tất cả các
+        dòng trong một lượt, rồi cuộn đúng một trang (giữ lại overlap dòng).
+        Các dòng trùng giữa hai trang được bỏ theo hạng.
+
+        Args:
+            scanner: GovernorScanner
+            overlap: Số dòng chồng lên nhau giữa hai trang
+        """
+        self.scanner = scanner
+        self.seeker = RankSeeker(scanner)
+        self.reader = ListRowReader(scanner)
+        self.overlap = overlap
+
+    def visible_rows(self, readings, at_top=False):
+        """
+        Các dòng đang hiển thị đầy đủ
+
+        Args:
+            readings: Kết quả RankSeeker.read_visible_ranks
+            at_top: Danh sách đang ở đầu trang (3 hạng đầu là huy hiệu, không đọc được)
+
+        Returns:
+            list: Danh sách (hạng, y) sắp xếp theo hạng
+        """
+        if readings:
+            # Suy ra mọi dòng từ dòng đọc được đầu tiên, kể cả dòng OCR không ra số
+            rank0, y0 = readings[0]
+        elif at_top:
+            rank0, y0 = 1, FIRST_ROW_Y
+        else:
+            return []
+        pitch = self.seeker.row_pitch
+        first = rank0 - int((y0 - LIST_TOP) // pitch)
+        rows = []
+        for rank in range(max(first, 1), rank0 + int((LIST_BOTTOM - y0) // pitch) + 1):
+            y = y0 + (rank - rank0) * pitch
+            if LIST_TOP <= y <= LIST_BOTTOM:
+                rows.append((rank, y))
+        return rows
+
+    def read_page(self, at_top=False):
+        """
+        Chụp và đọc một trang danh sách
+
+        Returns:
+            list: Các dòng {'rank', 'name', 'alliance', 'power'} sắp xếp theo hạng
+        """
+        frame = self.scanner.capture_image(f"{self.scanner.device.id}/list_page.png")
+        readings = self.seeker.read_visible_ranks(frame)
+        if not readings and not at_top:
+            # Danh sách còn đang trôi: chờ rồi đọc lại
+            time.sleep(self.seeker.settle_time)
+            frame = self.scanner.capture_image(f"{self.scanner.device.id}/list_page.png")
+            readings = self.seeker.read_visible_ranks(frame)
+
+        rows = self.visible_rows(readings, at_top)
+        if not rows:
+            return []
+        results = self.reader.read_rows(frame, [y for _, y in rows])
+        for (rank, _), result in zip(rows, results):
+            # Hạng theo vị trí dòng (OCR cột hạng chỉ dùng để định vị)
+            result['rank'] = rank
+        return results
+
+    def scan(self, start_rank, count, report, should_stop=None):
+        """
+        Quét count governor bắt đầu từ hạng start_rank
+
+        Args:
+            start_rank: Hạng đầu tiên (danh sách phải đang hiển thị hạng này)
+            count: Số governor cần quét
+            report: Hàm report(index, data) ghi governor thứ index (tính từ 0)
+            should_stop: Hàm trả về True khi cần dừng; report trả về False cũng dừng
+
+        Returns:
+            int: Số governor đã ghi
+        """
+        end_rank = start_rank + count - 1
+        next_rank = start_rank
+        last_top = None
+        while next_rank <= end_rank:
+            if should_stop is not None and should_stop():
+                break
+
+            page = self.read_page(at_top=next_rank <= 4 and last_top is None)
+            if not page:
+                print(f"Could not read the rankings list at rank {next_rank}")
+                break
+            if last_top is not None and page[0]['rank'] <= last_top:
+                # Cuộn không làm danh sách dịch chuyển: đã đến cuối bảng xếp hạng
+                print(f"Reached the end of the rankings at rank {page[-1]['rank']}")
+                break
+            last_top = page[0]['rank']
+
+            seek_back = False
+            for row in page:
+                if row['rank'] < next_rank or row['rank'] > end_rank:
+                    continue
+                if row['rank'] > next_rank:
+                    print(f"Ranks {next_rank}-{row['rank'] - 1} scrolled past, seeking back")
+                    if self.seeker.seek(next_rank) is None:
+                        return next_rank - start_rank
+                    seek_back = True
+                    break
+                data = {'rank': row['rank'], 'name': row['name'] or "Unknown",
+                        'alliance': row['alliance'], 'power': str(row['power'] or 0)}
+                next_rank += 1
+                if report(row['rank'] - start_rank, data) is False:
+                    return next_rank - start_rank
+
+            if seek_back:
+                # Đọc lại trang mới mà không cuộn
+                last_top = None
+            elif next_rank <= end_rank:
+                # Cuộn một trang, các dòng cuối trang này thành dòng đầu trang sau
+                self.seeker.scroll((len(page) - self.overlap) * self.seeker.row_pitch)
+        return next_rank - start_rank
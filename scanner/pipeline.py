@@ -0,0 +1,161 @@
+# scanner/pipeline.py
+import queue
+import threading
+from concurrent.futures import ProcessPoolExecutor
+
+# Scanner dùng để OCR trong mỗi tiến trình worker (tạo một lần khi worker khởi động)
+_worker_scanner = None
+
+
+def _init_worker(config):
+    global _worker_scanner
+    from scanner.governor_scanner import GovernorScanner
+    _worker_scanner = GovernorScanner(None, config)
+
+
+def analyze_capture(capture):
+    """
+    Chạy trong tiến trình worker: OCR các khung hình của một governor
+
+    Args:
+        capture: Kết quả của GovernorScanner.capture_governor
+
+    Returns:
+        dict: Dữ liệu governor (xem GovernorScanner.analyze_governor)
+    """
+    return _worker_scanner.analyze_governor(capture)
+
+
+class OcrPipeline:
+    def __init__(self, config, max_workers=2, max_pending=None):
+        """
+        Pool tiến trình OCR dùng chung cho tất cả thiết bị
+
+        Luồng thiết bị chỉ điều hướng và chụp ảnh rồi gửi khung hình vào đây;
+        OCR chạy ở tiến trình riêng nên không bị GIL chặn và thiết bị không
+        phải chờ OCR xong mới chuyển sang governor tiếp theo.
+
+        Args:
+            config: Cấu hình ứng dụng (truyền sang từng worker)
+            max_workers: Số tiến trình OCR
+            max_pending: Số governor tối đa đang chờ OCR trước khi luồng
+                thiết bị phải đợi (mặc định 4 lần số worker)
+        """
+        self.max_workers = max_workers
+        self.executor = ProcessPoolExecutor(
+            max_workers=max_workers,
+            initializer=_init_worker,
+            initargs=(config,)
+        )
+        self._slots = threading.BoundedSemaphore(max_pending or max_workers * 4)
+        # Kết quả OCR được ghi (nhật ký, SQLite, sink) ở luồng riêng, không
+        # chạy trong luồng nhận kết quả của ProcessPool: một lần ghi chậm
+        # không làm trễ kết quả của các thiết bị khác
+        self._results = queue.Queue()
+        self._writer = threading.Thread(target=self._write_results, name="ocr-result-writer", daemon=True)
+        self._writer.start()
+
+    def _write_results(self):
+        """Luồng ghi: gọi callback của từng governor theo thứ tự OCR xong"""
+        while True:
+            item = self._results.get()
+            if item is None:
+                return
+            callback, data = item
+            try:
+                callback(data)
+            except Exception as e:
+                print(f"Error handling OCR result: {e}")
+
+    def submit(self, capture, callback):
+        """
+        Gửi khung hình của một governor để OCR
+
+        Chặn khi hàng đợi đã đầy để bộ nhớ không tăng vô hạn khi OCR chậm
+        hơn thiết bị.
+
+        Args:
+            capture: Kết quả của GovernorScanner.capture_governor
+            callback: Hàm callback(data) gọi ở luồng ghi khi xong; data là None nếu lỗi
+        """
+        self._slots.acquire()
+        try:
+            future = self.executor.submit(analyze_capture, capture)
+        except Exception:
+            self._slots.release()
+            raise
+
+        def _done(future):
+            self._slots.release()
+            # Future bị hủy ném CancelledError (BaseException từ 3.8): vẫn phải
+            # đưa một kết quả None vào hàng đợi để writer không chờ mãi index này
+            try:
+                data = future.result()
+            except BaseException as e:
+                print(f"Error in OCR worker: {e}")
+                data = None
+            self._results.put((callback, data))
+
+        future.add_done_callback(_done)
+        return future
+
+    def shutdown(self, wait=True):
+        """Dừng pool OCR (các kết quả đã nhận vẫn được ghi trước khi luồng ghi dừng)"""
+        self.executor.shutdown(wait=wait)
+        self._results.put(None)
+        if wait:
+            self._writer.join()
+
+
+class OrderedResultWriter:
+    def __init__(self, write, start=0, lock=None):
+        """
+        Ghi kết quả theo đúng thứ tự index dù OCR hoàn thành không theo thứ tự
+
+        Args:
+            write: Hàm write(index, data) ghi một dòng
+            start: Index đầu tiên
+            lock: RLock dùng chung (khi nhiều writer ghi vào cùng một workbook)
+        """
+        self.write = write
+        self.next_index = start
+        self.last_index = start - 1
+        self._pending = {}
+        # Dùng chung lock này khi lưu workbook để không lưu giữa lúc đang ghi dòng
+        self.lock = lock or threading.RLock()
+        self._cond = threading.Condition(self.lock)
+
+    def reserve(self, index):
+        """Đánh dấu index đã được gửi đi và sẽ có kết quả"""
+        with self._cond:
+            self.last_index = max(self.last_index, index)
+
+    def put(self, index, data):
+        """
+        Nhận kết quả của một index; data là None nếu governor bị bỏ qua
+        """
+        with self._cond:
+            self.last_index = max(self.last_index, index)
+            self._pending[index] = data
+            while self.next_index in self._pending:
+                row = self._pending.pop(self.next_index)
+                if row is not None:
+                    try:
+                        self.write(self.next_index, row)
+                    except Exception as e:
+                        print(f"Error writing governor {self.next_index}: {e}")
+                self.next_index += 1
+            self._cond.notify_all()
+
+    def skip(self, index):
+        self.put(index, None)
+
+    def drain(self, timeout=None):
+        """
+        Chờ đến khi tất cả index đã gửi đi được ghi xong
+
+        Returns:
+            bool: True nếu đã ghi hết, False nếu hết thời gian chờ
+        """
+        with self._cond:
+            return self._cond.wait_for(lambda: self.next_index > self.last_index, timeout)
@@ -0,0 +1,221 @@
+# scanner/rank_seek.py
+import time
+
+import cv2
+import numpy as np
+
+# Khoảng cách giữa hai dòng của bảng xếp hạng (pixel, độ phân giải 1600x900)
+ROW_PITCH = 101.7
+# Tọa độ y của dòng đầu tiên khi danh sách ở đầu trang
+FIRST_ROW_Y = 285
+# Dòng dùng cho các governor từ index 4 trở đi (GovernorScanner.Y[4])
+SEEK_ROW_INDEX = 4
+SEEK_ROW_Y = 605
+
+# Cột số hạng trên màn hình bảng xếp hạng (x, y, w, h)
+RANK_COLUMN = (300, 200, 120, 600)
+RANK_OCR_CONFIG = "--psm 7 -c tessedit_char_whitelist=0123456789"
+
+# Swipe chậm (không có quán tính) để danh sách dịch đúng bằng quãng kéo
+SWIPE_X = 690
+SWIPE_START_Y = 800
+SWIPE_MAX_DISTANCE = 500
+SWIPE_DURATION_MS = 1200
+# Quãng kéo bị Android "nuốt" trước khi danh sách bắt đầu cuộn (touch slop)
+SWIPE_SLOP = 16
+
+# Swipe nhanh (có quán tính) để đi xa; số dòng mỗi lần được hiệu chỉnh khi chạy
+FLING_SWIPE = (SWIPE_X, 800, SWIPE_X, 250, 120)
+FLING_ROWS = 25
+
+
+class RankSeeker:
+    def __init__(self, scanner, row_pitch=ROW_PITCH, settle_time=0.4, fling_settle_time=1.2,
+                 max_iterations=12):
+        """
+        Đưa danh sách xếp hạng đến hạng N mà không phải mở từng profile
+
+        Đi xa bằng các swipe nhanh đã hiệu chỉnh, sau mỗi bước đọc số hạng
+        đang hiển thị trên màn hình danh sách để biết vị trí thật, rồi sửa
+        bằng các swipe chậm cho đến khi hạng N nằm ở dòng SEEK_ROW_INDEX.
+
+        Args:
+            scanner: GovernorScanner (dùng thiết bị, chụp ảnh và OCR của nó)
+            row_pitch: Khoảng cách giữa hai dòng (pixel)
+            settle_time: Thời gian chờ danh sách dừng sau swipe chậm
+            fling_settle_time: Thời gian chờ quán tính dừng sau swipe nhanh
+            max_iterations: Số vòng đọc/sửa tối đa
+        """
+        self.scanner = scanner
+        self.device = scanner.device
+        self.row_pitch = row_pitch
+        self.settle_time = settle_time
+        self.fling_settle_time = fling_settle_time
+        self.max_iterations = max_iterations
+        self.fling_rows = getattr(scanner, 'seek_fling_rows', FLING_ROWS)
+        self.tolerance = row_pitch / 4
+
+    def scroll(self, distance):
+        """
+        Cuộn danh sách lên một quãng distance pixel bằng các swipe chậm
+
+        Args:
+            distance: Quãng cuộn (pixel), âm để cuộn xuống
+        """
+        remaining = distance
+        while abs(remaining) >= 1:
+            if self.scanner.stop_event.is_set():
+                return
+            step = max(-SWIPE_MAX_DISTANCE, min(SWIPE_MAX_DISTANCE, remaining))
+            drag = int(round(step + (SWIPE_SLOP if step > 0 else -SWIPE_SLOP)))
+            if step > 0:
+                y1, y2 = SWIPE_START_Y, SWIPE_START_Y - drag
+            else:
+                y1, y2 = SWIPE_START_Y + drag, SWIPE_START_Y
+            self.device.shell(f'input swipe {SWIPE_X} {y1} {SWIPE_X} {y2} {SWIPE_DURATION_MS}')
+            remaining -= step
+        time.sleep(self.settle_time)
+
+    def fling(self, count, down=True):
+        """Swipe nhanh count lần (down=True để đi đến hạng lớn hơn)"""
+        x1, y1, x2, y2, duration = FLING_SWIPE
+        if not down:
+            y1, y2 = y2, y1
+        script = "; ".join(f"input swipe {x1} {y1} {x2} {y2} {duration}" for _ in range(count))
+        self.device.shell(script)
+        time.sleep(self.fling_settle_time)
+
+    def read_visible_ranks(self, frame=None):
+        """
+        Đọc các số hạng đang hiển thị trong cột hạng
+
+        Args:
+            frame: Ảnh màn hình danh sách (mặc định chụp mới)
+
+        Returns:
+            list: Danh sách (hạng, tọa độ y tâm dòng) nhất quán với nhau,
+            sắp xếp theo y
+        """
+        if frame is None:
+            frame = self.scanner.capture_image(f"{self.device.id}/seek.png")
+        frame = self.scanner._get_frame(frame)
+        if frame is None:
+            return []
+
+        strip = frame.roi(RANK_COLUMN)
+        if strip is None:
+            return []
+        _, binary = cv2.threshold(strip, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
+        # Chữ trắng trên nền đen để tìm các dòng theo hình chiếu ngang
+        border = np.concatenate([binary[0, :], binary[-1, :], binary[:, 0], binary[:, -1]])
+        foreground = 255 - binary if np.median(border) >= 128 else binary
+
+        bands = []
+        filled = (foreground > 0).sum(axis=1) > 0
+        start = None
+        for y, on in enumerate(np.append(filled, False)):
+            if on and start is None:
+                start = y
+            elif not on and start is not None:
+                if 12 <= y - start <= self.row_pitch * 0.6:
+                    bands.append((start, y))
+                start = None
+        if not bands:
+            return []
+
+        images = {}
+        for idx, (y0, y1) in enumerate(bands):
+            images[idx] = binary[max(y0 - 4, 0):y1 + 4, :]
+        texts = self.scanner.read_ocr_batch(images, {idx: RANK_OCR_CONFIG for idx in images})
+
+        readings = []
+        for idx, (y0, y1) in enumerate(bands):
+            text = texts.get(idx, "")
+            if text.isdigit():
+                readings.append((int(text), RANK_COLUMN[1] + (y0 + y1) / 2))
+        return self._consistent(readings)
+
+    def _consistent(self, readings):
+        """Bỏ các số đọc sai: mọi dòng phải cùng một vị trí danh sách (hạng - y / pitch)"""
+        if not readings:
+            return []
+        offsets = [rank - y / self.row_pitch for rank, y in readings]
+        median = float(np.median(offsets))
+        return sorted(((rank, y) for (rank, y), offset in zip(readings, offsets)
+                       if abs(offset - median) < 0.3), key=lambda reading: reading[1])
+
+    def target_row(self, rank):
+        """
+        Dòng mà hạng rank cần nằm để quét
+
+        Returns:
+            tuple: (index dòng, tọa độ y); hạng trong trang đầu giữ nguyên dòng của nó
+        """
+        if rank <= SEEK_ROW_INDEX:
+            return rank - 1, FIRST_ROW_Y + (rank - 1) * self.row_pitch
+        return SEEK_ROW_INDEX, SEEK_ROW_Y
+
+    def target_distance(self, rank, readings):
+        """Quãng cuộn (pixel) để hạng rank về dòng quét, tính từ dòng đọc được gần nhất"""
+        visible_rank, y = min(readings, key=lambda reading: abs(reading[0] - rank))
+        return y + (rank - visible_rank) * self.row_pitch - self.target_row(rank)[1]
+
+    def seek(self, rank):
+        """
+        Đưa hạng rank về vị trí quét
+
+        Args:
+            rank: Hạng cần đến (bắt đầu từ 1)
+
+        Returns:
+            int: Index dòng (như i trong GovernorScanner.scan_governor) đang chứa
+            hạng rank, hoặc None nếu thất bại
+        """
+        if rank < 1:
+            return None
+
+        row_index = self.target_row(rank)[0]
+        try:
+            readings = self.read_visible_ranks()
+            if not readings:
+                # Không đọc được vị trí hiện tại (3 hạng đầu là huy hiệu): giả định đang ở đầu trang
+                print("Could not read ranks on the list, assuming it is at the top")
+                readings = [(1, FIRST_ROW_Y)]
+
+            for iteration in range(self.max_iterations):
+                if self.scanner.stop_event.is_set():
+                    print(f"Seek to rank {rank} stopped")
+                    return None
+                distance = self.target_distance(rank, readings)
+                if abs(distance) <= self.tolerance:
+                    print(f"Reached rank {rank} after {iteration} move(s)")
+                    return row_index
+
+                rows = distance / self.row_pitch
+                if abs(rows) > 2 * self.fling_rows:
+                    flings = int(abs(rows) // self.fling_rows) - 1
+                    before = distance
+                    self.fling(flings, down=rows > 0)
+                    readings = self.read_visible_ranks()
+                    if readings:
+                        # Hiệu chỉnh số dòng mỗi lần swipe nhanh theo quãng đi thực tế
+                        moved = abs(before - self.target_distance(rank, readings))
+                        if moved > 0:
+                            self.fling_rows = max(1.0, moved / self.row_pitch / flings)
+                else:
+                    self.scroll(distance)
+                    readings = self.read_visible_ranks()
+
+                if not readings:
+                    # Mất dấu (ví dụ danh sách còn đang trôi): chờ rồi đọc lại
+                    time.sleep(self.settle_time)
+                    readings = self.read_visible_ranks()
+                    if not readings:
+                        print(f"Lost track of ranks while seeking to {rank}")
+                        return None
+
+            print(f"Could not reach rank {rank} after {self.max_iterations} moves")
+            return None
+        except Exception as e:
+            print(f"Error seeking to rank {rank}: {e}")
+            return None
@@ -0,0 +1,168 @@
+# scanner/record_validator.py
+from scanner.snapshot_store import parse_number
+
+# Kill points của mỗi lính bị giết theo cấp (T1-T5)
+KILL_POINT_WEIGHTS = (
+    ('tier1_kills', 0.2),
+    ('tier2_kills', 2),
+    ('tier3_kills', 4),
+    ('tier4_kills', 10),
+    ('tier5_kills', 20),
+)
+
+# Các chỉ số chỉ tăng theo thời gian (không reset giữa các KvK)
+MONOTONIC_FIELDS = (
+    'kill_points', 'deads',
+    'tier1_kills', 'tier2_kills', 'tier3_kills', 'tier4_kills', 'tier5_kills',
+    'rss_assistance', 'alliance_helps'
+)
+
+# Số chữ số hợp lý (min, max) của từng trường
+DIGIT_RANGES = {
+    'id': (5, 10),
+    'power': (4, 10),
+}
+DEFAULT_DIGIT_RANGE = (1, 12)
+
+# Power thay đổi quá tỉ lệ này so với lần quét trước là dấu hiệu đọc sai chữ số
+POWER_JUMP_RATIO = 4.0
+
+# Các cách tiền xử lý thử lại khi một trường không hợp lệ
+PREPROCESSORS = ('preprocess_image', 'preprocess_image2', 'preprocess_image3')
+
+
+class RecordValidator:
+    def __init__(self, scanner, kp_tolerance=0.002):
+        """
+        Kiểm tra dữ liệu một governor theo các ràng buộc giữa các trường và
+        đọc lại trường sai từ khung hình đã chụp
+
+        Ràng buộc: kill points khớp tổng có trọng số của T1-T5, các chỉ số
+        tích lũy không giảm so với snapshot trước, số chữ số hợp lý. Trường
+        vi phạm được OCR lại riêng trên ROI của nó với từng cách tiền xử lý;
+        giá trị làm giảm số vi phạm được giữ lại. Không cần điều hướng lại
+        thiết bị.
+
+        Args:
+            scanner: GovernorScanner (tiền xử lý ảnh và OCR)
+            kp_tolerance: Sai lệch tương đối cho phép giữa kill points và tổng T1-T5
+        """
+        self.scanner = scanner
+        self.kp_tolerance = kp_tolerance
+
+    def problems(self, values, previous=None):
+        """
+        Các ràng buộc bị vi phạm
+
+        Args:
+            values: Dict {trường: int} (chỉ các trường số đọc được)
+            previous: Snapshot trước của governor (None nếu không có)
+
+        Returns:
+            list: Danh sách (tên ràng buộc, các trường liên quan theo thứ tự nghi ngờ)
+        """
+        issues = []
+        for field, value in values.items():
+            low, high = DIGIT_RANGES.get(field, DEFAULT_DIGIT_RANGE)
+            digits = len(str(value))
+            if digits > high or (field in DIGIT_RANGES and digits < low):
+                issues.append((f'digits:{field}', (field,)))
+
+        tiers = [field for field, _ in KILL_POINT_WEIGHTS]
+        if 'kill_points' in values and all(field in values for field in tiers):
+            expected = sum(values[field] * weight for field, weight in KILL_POINT_WEIGHTS)
+            if abs(values['kill_points'] - expected) > max(self.kp_tolerance * values['kill_points'], 5):
+                # Tổng lớn hơn kill points: nhiều khả năng kill points mất chữ số
+                suspects = ['kill_points'] + tiers if expected > values['kill_points'] else \
+                    sorted(tiers, key=lambda field: values[field]) + ['kill_points']
+                issues.append(('kill_points', tuple(suspects)))
+
+        if previous:
+            for field in MONOTONIC_FIELDS:
+                before = parse_number(previous.get(field))
+                if field in values and before and values[field] < before:
+                    issues.append((f'decreased:{field}', (field,)))
+            before = parse_number(previous.get('power'))
+            if 'power' in values and before and values['power'] and \
+                    not before / POWER_JUMP_RATIO <= values['power'] <= before * POWER_JUMP_RATIO:
+                issues.append(('power_jump', ('power',)))
+        return issues
+
+    def _reread(self, frames, field):
+        """Các giá trị đọc lại của một trường bằng từng cách tiền xử lý"""
+        frame = frames.get(field.screen)
+        if frame is None:
+            return []
+        readings = []
+        for method in PREPROCESSORS:
+            image = getattr(self.scanner, method)(frame, field.roi)
+            if image is None:
+                continue
+            value = parse_number(self.scanner.read_ocr_from_image(image, field.config))
+            if value is not None and value not in readings:
+                readings.append(value)
+        return readings
+
+    def validate(self, data, frames, fields, previous=None):
+        """
+        Kiểm tra và sửa dữ liệu của analyze_governor
+
+        Args:
+            data: Dict {trường: text}
+            frames: Các khung hình đã chụp {tên màn hình: ảnh}
+            fields: Danh sách OcrField đã đọc
+            previous: Snapshot trước của governor (None nếu không có)
+
+        Returns:
+            dict: data đã sửa; 'validation' liệt kê các ràng buộc vẫn vi phạm (nếu
+            có) và trường bị nghi nhất của mỗi ràng buộc đó được bỏ trống
+        """
+        by_name = {field.name: field for field in fields if field.batch}
+        values = {}
+        for name in by_name:
+            number = parse_number(data.get(name))
+            if number is not None:
+                values[name] = number
+
+        issues = self.problems(values, previous)
+        if not issues:
+            return data
+
+        candidates = {}
+        improved = True
+        while issues and improved:
+            improved = False
+            for _, suspects in issues:
+                for name in suspects:
+                    if name not in by_name:
+                        continue
+                    if name not in candidates:
+                        candidates[name] = self._reread(frames, by_name[name])
+                    for value in candidates[name]:
+                        if value == values.get(name):
+                            continue
+                        trial = dict(values, **{name: value})
+                        trial_issues = self.problems(trial, previous)
+                        if len(trial_issues) < len(issues):
+                            print(f"Re-read {name}: {values.get(name)} -> {value}")
+                            values, issues = trial, trial_issues
+                            data[name] = str(value)
+                            improved = True
+                            break
+                    if improved:
+                        break
+                if improved:
+                    break
+
+        if issues:
+            data['validation'] = [reason for reason, _ in issues]
+            # Không ghi giá trị sai vào kết quả: ô trống giống trường không đọc
+            # được. ID giữ nguyên vì là khóa của governor.
+            blanked = []
+            for _, suspects in issues:
+                name = next((name for name in suspects if name != 'id'), None)
+                if name is not None and data.get(name):
+                    data[name] = ""
+                    blanked.append(name)
+            print(f"Governor {data.get('id')}: unresolved checks {data['validation']}, blanked {blanked}")
+        return data
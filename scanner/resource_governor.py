@@ -0,0 +1,198 @@
+# scanner/resource_governor.py
+import os
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+# Tên tiến trình giả lập LDPlayer (dùng để đo CPU của các giả lập)
+EMULATOR_PROCESSES = ('dnplayer.exe', 'ld9boxheadless.exe', 'ldvboxheadless.exe', 'ldboxheadless.exe')
+
+# max_devices: số giả lập quét cùng lúc, max_ocr_workers: số OCR chạy cùng lúc,
+# omp_thread_limit: số luồng OpenMP của mỗi lần OCR, measured: device_cost đo
+# được từ các tiến trình giả lập (False nếu là ước lượng device_core_cost)
+ResourcePlan = namedtuple('ResourcePlan', 'cores max_devices max_ocr_workers omp_thread_limit device_cost measured')
+
+# Chế độ của cấu hình resource_governor:
+# - 'advisory': giới hạn OCR theo kế hoạch, chỉ cảnh báo khi số thiết bị vượt kế hoạch
+# - 'enforce': như advisory, và từ chối thiết bị vượt kế hoạch khi đã đo được CPU giả lập
+# - 'off': không lập kế hoạch
+RESOURCE_MODES = ('advisory', 'enforce', 'off')
+
+
+def resource_mode(config):
+    """
+    Chế độ resource_governor của cấu hình (True cũ là 'advisory', False là 'off')
+
+    Returns:
+        str: Một trong RESOURCE_MODES
+    """
+    mode = getattr(config, 'resource_governor', 'advisory')
+    if mode is True:
+        return 'advisory'
+    if mode is False or mode is None:
+        return 'off'
+    mode = str(mode).lower()
+    return mode if mode in RESOURCE_MODES else 'advisory'
+
+
+class ResourceGovernor:
+    def __init__(self, config=None, cores=None, sample_interval=2.0):
+        """
+        Chia CPU giữa các giả lập và các lần OCR
+
+        Khi có quá nhiều giả lập, các tiến trình tesseract tranh lõi CPU với
+        chúng và mỗi governor chậm đi. Governor này lập kế hoạch số thiết bị
+        / số OCR tối đa theo số lõi và mức CPU đo được, và giới hạn số lần OCR
+        chạy cùng lúc (mỗi lần chỉ dùng omp_thread_limit luồng).
+
+        Args:
+            config: Cấu hình (reserved_cores, device_core_cost, max_ocr_jobs)
+            cores: Số lõi CPU (mặc định os.cpu_count())
+            sample_interval: Số giây giữa hai lần đo CPU
+        """
+        self.cores = cores or os.cpu_count() or 1
+        self.reserved_cores = getattr(config, 'reserved_cores', 1)
+        # Số lõi một giả lập dùng khi chưa đo được (LDPlayer khi đang quét)
+        self.device_cost = getattr(config, 'device_core_cost', 1.0)
+        # Giới hạn cố định số OCR cùng lúc; 0 để tự tính theo CPU
+        self.max_ocr_jobs = getattr(config, 'max_ocr_jobs', 0)
+        self.sample_interval = sample_interval
+
+        # Giới hạn theo kế hoạch (apply) và giới hạn hiện tại theo CPU đo được
+        self.plan_limit = self.max_ocr_jobs or max(1, self.cores - self.reserved_cores)
+        self.limit = self.plan_limit
+        self.active = 0
+        self._cond = threading.Condition()
+        self._last_sample = 0.0
+
+        if psutil is not None:
+            # Lần gọi đầu tiên của cpu_percent luôn trả về 0
+            psutil.cpu_percent(interval=None)
+
+    def measure_device_cost(self):
+        """
+        Đo số lõi trung bình mỗi giả lập đang dùng
+
+        Returns:
+            float: Số lõi mỗi giả lập, hoặc None nếu không đo được
+        """
+        if psutil is None:
+            return None
+        usage = 0.0
+        count = 0
+        for process in psutil.process_iter(['name']):
+            name = (process.info.get('name') or '').lower()
+            if name not in EMULATOR_PROCESSES:
+                continue
+            try:
+                usage += process.cpu_percent(interval=None)
+                if name != 'dnplayer.exe':
+                    count += 1
+            except (psutil.NoSuchProcess, psutil.AccessDenied):
+                continue
+        if not count or usage <= 0:
+            return None
+        return usage / 100.0 / count
+
+    def measure_idle_cores(self):
+        """
+        Số lõi đang rảnh
+
+        Returns:
+            float: Số lõi rảnh, hoặc None nếu không đo được
+        """
+        if psutil is not None:
+            return self.cores * (1.0 - psutil.cpu_percent(interval=None) / 100.0)
+        if hasattr(os, 'getloadavg'):
+            return max(0.0, self.cores - os.getloadavg()[0])
+        return None
+
+    def plan(self, device_count=None):
+        """
+        Lập kế hoạch số thiết bị và số OCR tối đa
+
+        Mỗi lần OCR được tính là một lõi. Giả lập phần lớn thời gian chờ
+        thiết bị (tap, chụp ảnh) nên số OCR không xuống dưới một nửa số lõi
+        dù các giả lập đã chiếm hết phần tính theo device_cost; khi CPU thật
+        sự bận, ocr_slot vẫn giảm số OCR theo số lõi rảnh đo được.
+
+        Args:
+            device_count: Số thiết bị muốn quét (None để tính số tối đa)
+
+        Returns:
+            ResourcePlan: Kế hoạch
+        """
+        measured = self.measure_device_cost()
+        device_cost = max(0.25, measured if measured else self.device_cost)
+        available = max(1.0, self.cores - self.reserved_cores)
+
+        max_devices = max(1, int((available - 1) / device_cost))
+        devices = max_devices if device_count is None else max(1, min(device_count, max_devices))
+        max_ocr_workers = max(1, self.cores // 2, int(available - devices * device_cost))
+        max_ocr_workers = min(max_ocr_workers, int(available))
+        if self.max_ocr_jobs:
+            max_ocr_workers = min(max_ocr_workers, self.max_ocr_jobs)
+        # Lõi còn dư (khi max_ocr_jobs giới hạn số OCR) chia cho từng lần OCR
+        omp_thread_limit = max(1, int((available - devices * device_cost) // max_ocr_workers))
+        return ResourcePlan(self.cores, max_devices, max_ocr_workers, omp_thread_limit, device_cost,
+                            measured is not None)
+
+    def apply(self, plan):
+        """
+        Áp dụng kế hoạch: giới hạn OCR và OMP_THREAD_LIMIT cho các lần OCR sau
+
+        Tesseract đọc OMP_THREAD_LIMIT khi khởi động nên phải đặt trước lần
+        OCR đầu tiên; tiến trình tesseract của pytesseract kế thừa biến này.
+        """
+        os.environ['OMP_THREAD_LIMIT'] = str(plan.omp_thread_limit)
+        with self._cond:
+            self.plan_limit = self.limit = plan.max_ocr_workers
+            self._cond.notify_all()
+
+    def _resample(self):
+        """Điều chỉnh giới hạn OCR theo số lõi rảnh đo được (gọi khi giữ lock)"""
+        now = time.time()
+        if now - self._last_sample < self.sample_interval:
+            return
+        self._last_sample = now
+        idle = self.measure_idle_cores()
+        if idle is None:
+            return
+        # Các lần OCR đang chạy cũng dùng lõi đã tính là bận
+        self.limit = max(1, min(int(idle + self.active), self.plan_limit))
+
+    @contextmanager
+    def ocr_slot(self):
+        """Chờ đến lượt chạy một lần OCR"""
+        with self._cond:
+            self._resample()
+            while self.active >= self.limit:
+                self._cond.wait(self.sample_interval)
+                self._resample()
+            self.active += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self.active -= 1
+                self._cond.notify()
+
+
+_governor = None
+_governor_lock = threading.Lock()
+
+
+def get_resource_governor(config=None):
+    """Lấy ResourceGovernor dùng chung của tiến trình (tạo ở lần gọi đầu tiên)"""
+    global _governor
+    with _governor_lock:
+        if _governor is None:
+            _governor = ResourceGovernor(config)
+            os.environ.setdefault('OMP_THREAD_LIMIT', '1')
+        return _governor
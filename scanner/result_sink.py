@@ -0,0 +1,204 @@
+# scanner/result_sink.py
+import csv
+import json
+import os
+import threading
+import time
+
+from scanner.excel_manager import ExcelManager
+from models.governor import STAT_FIELDS, HEADER_FIELDS
+from models.governor_store import GovernorStore
+
+# Các cột số: chuỗi chữ số trong CSV được chuyển lại thành int khi xuất Excel.
+# Tên governor / tag alliance toàn chữ số vẫn giữ là chuỗi.
+NUMERIC_HEADERS = frozenset(
+    [header for header, field in HEADER_FIELDS.items() if field in STAT_FIELDS or field == 'id'] + ['Rank']
+)
+
+
+class ResultSink:
+    def __init__(self, path, scan_option, fsync_interval=2.0, refreshed=False):
+        """
+        Nơi ghi kết quả quét theo từng dòng, chỉ ghi thêm vào cuối file
+
+        Nhận các ô như một sheet xlwt (write(row, col, value)) nên dùng được
+        với GovernorScanner và các lớp bọc sheet; mỗi governor được ghi ngay
+        thành một dòng thay vì lưu lại cả workbook. File Excel được xuất một
+        lần khi quét xong (export_excel) từ GovernorStore của sink; file dòng
+        chỉ được đọc lại khi sink không có bản ghi (quét danh sách).
+
+        Args:
+            path: Đường dẫn file kết quả
+            scan_option: Loại quét (quyết định các cột)
+            fsync_interval: Số giây tối đa giữa hai lần fsync
+            refreshed: Thêm cột Refreshed (quét tăng dần)
+        """
+        self.path = path
+        self.scan_option = scan_option
+        self.refreshed = refreshed
+        self.headers = ExcelManager()._get_headers_for_option(scan_option, refreshed)
+        self.fsync_interval = fsync_interval
+        self.rows_written = 0
+        # Các governor đã ghi (bản ghi có kiểu theo dòng), nguồn của export_excel
+        self.governors = GovernorStore()
+        self._row = None
+        self._cells = {}
+        self._lock = threading.RLock()
+        self._last_sync = time.time()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        # Line buffering: mỗi dòng được đẩy xuống hệ điều hành ngay khi ghi
+        self._file = open(path, 'w', encoding='utf-8', newline='', buffering=1)
+        self._write_header()
+
+    def _write_header(self):
+        pass
+
+    def _write_row(self, row, values):
+        raise NotImplementedError
+
+    def read_rows(self):
+        """
+        Đọc lại các dòng đã ghi
+
+        Returns:
+            list: Danh sách (dòng, [giá trị theo cột])
+        """
+        raise NotImplementedError
+
+    def write(self, row, col, value, *args, **kwargs):
+        """Ghi một ô (dòng 0 là header, đã do sink ghi)"""
+        if row <= 0:
+            return
+        with self._lock:
+            if self._row is not None and row != self._row:
+                self._emit()
+            self._row = row
+            self._cells[col] = value
+
+    def put_governor(self, row, governor, rank=None, fields=None):
+        """Lưu governor của dòng row (GovernorScanner.report_governor gọi cùng các ô)"""
+        if row <= 0:
+            return
+        self.governors.put(row, governor, rank, fields)
+
+    def end_row(self):
+        """Ghi dòng đang gom ra file (GovernorScanner gọi sau mỗi governor)"""
+        with self._lock:
+            self._emit()
+
+    def _emit(self):
+        if self._row is None:
+            return
+        values = [self._cells.get(col, "") for col in range(len(self.headers))]
+        self._write_row(self._row, values)
+        self._row = None
+        self._cells = {}
+        self.rows_written += 1
+        if time.time() - self._last_sync >= self.fsync_interval:
+            self._sync()
+
+    def _sync(self):
+        if self._file.closed:
+            return
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._last_sync = time.time()
+
+    def flush(self):
+        """Ghi dòng đang gom và fsync"""
+        with self._lock:
+            self._emit()
+            self._sync()
+
+    def close(self):
+        with self._lock:
+            if self._file.closed:
+                return
+            self.flush()
+            self._file.close()
+
+    def export_excel(self, filepath):
+        """
+        Xuất toàn bộ kết quả ra file Excel (dòng ghi sau cùng thắng khi trùng)
+
+        Returns:
+            bool: True nếu thành công
+        """
+        with self._lock:
+            self.flush()
+            if len(self.governors):
+                return ExcelManager().export_governors(self.governors, self.scan_option, filepath, self.refreshed)
+            rows = dict(self.read_rows())
+        return ExcelManager().export_rows(sorted(rows.items()), self.scan_option, filepath, self.refreshed)
+
+
+def _restore_value(header, value):
+    """Chuyển chuỗi số của cột số trong CSV về int để Excel nhận là số"""
+    if header in NUMERIC_HEADERS and isinstance(value, str) and value.isdigit():
+        return int(value)
+    return value
+
+
+class CsvSink(ResultSink):
+    def _write_header(self):
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(['Row'] + self.headers)
+
+    def _write_row(self, row, values):
+        self._writer.writerow([row] + values)
+
+    def read_rows(self):
+        rows = []
+        with open(self.path, 'r', encoding='utf-8', newline='') as f:
+            reader = csv.reader(f)
+            next(reader, None)
+            for record in reader:
+                if not record or not record[0].isdigit():
+                    continue
+                rows.append((int(record[0]), [_restore_value(header, value)
+                                              for header, value in zip(self.headers, record[1:])]))
+        return rows
+
+
+class JsonlSink(ResultSink):
+    def _write_row(self, row, values):
+        self._file.write(json.dumps({"row": row, **dict(zip(self.headers, values))},
+                                    ensure_ascii=False, default=str) + "\n")
+
+    def read_rows(self):
+        rows = []
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    continue
+                rows.append((entry['row'], [entry.get(header, "") for header in self.headers]))
+        return rows
+
+
+SINKS = {
+    'csv': CsvSink,
+    'jsonl': JsonlSink
+}
+
+
+def create_result_sink(kind, output_file, scan_option, fsync_interval=2.0, refreshed=False):
+    """
+    Tạo sink kết quả bên cạnh file Excel sẽ xuất
+
+    Args:
+        kind: 'csv' hoặc 'jsonl'
+        output_file: File Excel xuất khi quét xong (sink dùng cùng tên, khác đuôi)
+        scan_option: Loại quét
+        fsync_interval: Số giây tối đa giữa hai lần fsync
+
+    Returns:
+        ResultSink: Sink, hoặc None nếu kind không phải sink streaming
+    """
+    sink_class = SINKS.get(kind)
+    if sink_class is None:
+        return None
+    path = f"{os.path.splitext(output_file)[0]}.{kind}"
+    return sink_class(path, scan_option, fsync_interval, refreshed)
@@ -8,6 +8,13 @@ from datetime import datetime
 from scanner.excel_manager import ExcelManager
 from scanner.scan_thread import scan_thread_worker
 from scanner.result_processor import ResultProcessor
+from scanner.sharded_scan import ShardedScan, RecordingSheet, split_rank_range
+from scanner.chunk_scheduler import ChunkScheduler
+from scanner.resource_governor import get_resource_governor, resource_mode
+from scanner.checkpoint_journal import ScanJournal, OffsetSheet, find_resumable_journal
+from scanner.result_sink import create_result_sink
+from scanner.snapshot_store import SnapshotStore
+from scanner.id_index import GovernorIdIndex
 
 class ScanManager:
     def __init__(self, config, device_manager=None):
@@ -24,6 +31,24 @@ class ScanManager:
         self.results_queue = queue.Queue()
         self.stop_event = threading.Event()
         
+        # Pool kết nối adb (chỉ tạo khi dùng backend 'adb')
+        self.adb_pool = None
+        
+        # Pool OCR dùng chung cho mọi thiết bị (bật khi ocr_workers > 0)
+        self.ocr_pipeline = None
+        
+        # Các lần quét chia theo dải hạng cho nhiều thiết bị
+        self.sharded_scans = {}
+        
+        # Event loop điều khiển thiết bị (chỉ tạo khi scan_engine là 'asyncio')
+        self.orchestrator = None
+        
+        # Chia CPU giữa giả lập và OCR (số thiết bị / số OCR tối đa)
+        self.resource_governor = get_resource_governor(config)
+        
+        # Lịch sử governor của các lần quét (SQLite, mở ở lần quét đầu tiên)
+        self.snapshot_store = None
+        
         # Tham chiếu đến main window (sẽ được set sau khi khởi tạo)
         self.window = None
         
@@ -52,13 +77,366 @@ class ScanManager:
             return self.window.get_device_manager()
         return self.device_manager
     
-    def start_scan(self, device_id, scan_params):
+    def _create_device(self, device_id, scan_params):
+        """
+        Tạo đối tượng thiết bị theo backend đã cấu hình
+        
+        'ldconsole' (mặc định) gọi ldconsole.exe cho mỗi lệnh, 'adb' nói chuyện
+        trực tiếp với adb server và giữ một kết nối cho mỗi giả lập.
+        
+        Args:
+            device_id: ID của thiết bị
+            scan_params: Tham số quét (có thể ghi đè 'device_backend')
+        """
+        backend = scan_params.get('device_backend', getattr(self.config, 'device_backend', 'ldconsole'))
+        if backend == 'adb':
+            if self.adb_pool is None:
+                from utils.adb_device import AdbDevicePool
+                self.adb_pool = AdbDevicePool(
+                    getattr(self.config, 'adb_host', '127.0.0.1'),
+                    getattr(self.config, 'adb_port', 5037)
+                )
+            return self.adb_pool.get(device_id, scan_params.get('adb_serial'))
+        
+        from Ldplayer.device import Device
+        # Lấy đường dẫn từ config
+        return Device(int(device_id), self.config.ldplayer_path)
+    
+    def get_resource_plan(self, device_count=None):
+        """
+        Kế hoạch số thiết bị / số OCR tối đa cho device_count thiết bị
+        
+        Returns:
+            ResourcePlan: Kế hoạch đã áp dụng (giới hạn OCR, OMP_THREAD_LIMIT)
+        """
+        plan = self.resource_governor.plan(device_count)
+        self.resource_governor.apply(plan)
+        return plan
+    
+    def _enforce_device_cap(self, plan):
+        """
+        Có từ chối thiết bị vượt kế hoạch không
+        
+        Chỉ ở chế độ 'enforce' và khi kế hoạch dựa trên CPU đo được của các
+        giả lập; kế hoạch ước lượng từ số lõi chỉ được cảnh báo.
+        """
+        if resource_mode(self.config) != 'enforce':
+            return False
+        if not plan.measured:
+            print("Emulator CPU usage could not be measured, not refusing devices")
+            return False
+        return True
+    
+    def _device_limit_reached(self):
+        """True nếu thêm một thiết bị sẽ vượt số thiết bị tối đa của kế hoạch (chế độ 'enforce')"""
+        if resource_mode(self.config) == 'off':
+            return False
+        plan = self.get_resource_plan(len(self.active_scans) + 1)
+        if len(self.active_scans) < plan.max_devices:
+            return False
+        source = "measured" if plan.measured else "estimated"
+        print(f"Resource plan ({source} {plan.device_cost:.2f} cores/device) suggests at most "
+              f"{plan.max_devices} device(s) on {plan.cores} cores")
+        return self._enforce_device_cap(plan)
+    
+    def _get_ocr_pipeline(self):
+        """
+        Lấy pool OCR dùng chung, tạo ở lần dùng đầu tiên; None nếu tắt
+        
+        ocr_workers > 0 là số tiến trình (không vượt kế hoạch tài nguyên),
+        ocr_workers < 0 lấy số OCR tối đa của kế hoạch.
+        """
+        workers = getattr(self.config, 'ocr_workers', 0)
+        if not workers:
+            return None
+        if self.ocr_pipeline is None:
+            from scanner.pipeline import OcrPipeline
+            if resource_mode(self.config) != 'off' or workers < 0:
+                plan_workers = self.get_resource_plan(max(len(self.active_scans), 1)).max_ocr_workers
+                workers = plan_workers if workers < 0 else min(workers, plan_workers)
+            self.ocr_pipeline = OcrPipeline(self.config, workers)
+        return self.ocr_pipeline
+    
+    def _get_orchestrator(self):
+        """Lấy event loop quét dùng chung, tạo ở lần dùng đầu tiên"""
+        if self.orchestrator is None:
+            from scanner.async_orchestrator import AsyncScanOrchestrator
+            self.orchestrator = AsyncScanOrchestrator()
+        return self.orchestrator
+    
+    def _start_async_scan(self, device_id, device, scanner, wb, sheet, output_file, scan_params, on_finished):
+        """
+        Chạy lần quét như một task trên event loop dùng chung
+        
+        Returns:
+            bool: False nếu thiết bị không có bản bất đồng bộ (dùng thread thay thế)
+        """
+        from utils.async_device import async_device_for
+        from scanner.async_orchestrator import async_scan_worker
+        
+        async_device = async_device_for(device)
+        if async_device is None:
+            print(f"Device {device_id} has no asyncio backend, falling back to threads")
+            return False
+        
+        # Đăng ký trước khi chạy để task kết thúc sớm vẫn xóa được mục của nó
+        self.active_scans[str(device_id)] = {
+            "thread": None,
+            "task": None,
+            "device": device,
+            "params": scan_params,
+            "start_time": time.time(),
+            "progress": 0,
+            "output_file": output_file,
+            "status": "running"
+        }
+        task = self._get_orchestrator().start(device_id, async_scan_worker(
+            device_id, async_device, scanner, wb, sheet, output_file,
+            scan_params, self.results_queue, self.active_scans,
+            self._get_device_manager,
+            self._get_ocr_pipeline(),
+            on_finished
+        ))
+        scan = self.active_scans.get(str(device_id))
+        if scan is not None:
+            scan["task"] = task
+        return True
+    
+    def _journal_dir(self):
+        return os.path.join(self.config.data_dir, 'scan_journals')
+    
+    def _open_journal(self, journal, scan_params):
+        """
+        Mở nhật ký để quét tiếp, hoặc tìm nhật ký chưa xong khi bật Resume Scan
+        
+        Args:
+            journal: ScanJournal, đường dẫn nhật ký hoặc None
+            scan_params: Tham số quét
+            
+        Returns:
+            ScanJournal: Nhật ký để quét tiếp, hoặc None để bắt đầu lần quét mới
+        """
+        if journal is None and scan_params.get('resume_scanning'):
+            journal = find_resumable_journal(self._journal_dir(), scan_params['kingdom'])
+            if journal:
+                print(f"Resuming from journal {journal}")
+        if isinstance(journal, str):
+            journal = ScanJournal.open(journal)
+        return journal
+    
+    def _resume_from_journal(self, journal, scanner, sheet, scan_params):
+        """
+        Dựng lại các dòng đã quét từ nhật ký và tính tham số quét tiếp
+        
+        Returns:
+            tuple: (sheet để ghi tiếp, tham số quét từ hạng kế tiếp), hoặc
+            (None, None) nếu lần quét đã xong
+        """
+        base = journal.start_rank
+        scanner.rank_base = base
+        for rank, data in sorted(journal.records.items()):
+            try:
+                scanner.report_governor(sheet, rank - base, 0, data, journal.header['scan_option'])
+            except Exception as e:
+                print(f"Error restoring rank {rank} from journal: {e}")
+        
+        next_rank = journal.next_rank()
+        remaining = journal.end_rank - next_rank + 1
+        if remaining <= 0:
+            print(f"Journal {journal.path} already covers ranks {base}-{journal.end_rank}")
+            return None, None
+        
+        print(f"Resuming scan at rank {next_rank} ({len(journal.records)} governor(s) already recorded)")
+        params = dict(scan_params)
+        params.update({
+            'start_rank': next_rank,
+            'search_range': remaining,
+            'resume_scanning': False,
+            'scan_option': journal.header['scan_option']
+        })
+        return OffsetSheet(sheet, next_rank - base), params
+    
+    def _attach_journal(self, journal, scanner, scan_params, on_finished):
+        """
+        Ghi mỗi governor vào nhật ký (bỏ qua governor đã có) và đóng nhật ký khi quét xong
+        
+        Returns:
+            function: Callback on_finished bọc callback gốc
+        """
+        run_start = scan_params.get('start_rank') or 1
+        previous = scanner.on_report
+        
+        def on_report(i, j, data, sheet):
+            if not journal.append(run_start + i - j, data):
+                return False
+            if previous is not None:
+                return previous(i, j, data, sheet)
+        scanner.on_report = on_report
+        
+        def finished(device_id, status, sheet):
+            journal.close(status)
+            if on_finished:
+                on_finished(device_id, status, sheet)
+        return finished
+    
+    def _get_snapshot_store(self):
+        """Lấy kho snapshot SQLite, mở ở lần dùng đầu tiên; None nếu tắt"""
+        if not getattr(self.config, 'snapshot_store', True):
+            return None
+        if self.snapshot_store is None:
+            path = getattr(self.config, 'snapshot_db', None) or os.path.join(self.config.data_dir, 'snapshots.sqlite3')
+            try:
+                self.snapshot_store = SnapshotStore(path, getattr(self.config, 'snapshot_batch_size', 200))
+            except Exception as e:
+                print(f"Error opening snapshot store: {e}")
+                return None
+        return self.snapshot_store
+    
+    def _attach_snapshot_store(self, scanner, scan_params, device_id, output_file, on_finished, journal=None):
+        """
+        Lưu mỗi governor vào kho snapshot trong khi quét
+        
+        Các lần quét nhiều thiết bị dùng chung scan_id trong scan_params['snapshot_scan'].
+        scan_id được ghi vào nhật ký; khi quét tiếp từ nhật ký, lần quét cũ
+        trong kho được dùng lại và chỉ các hạng chưa lưu được thêm vào.
+        
+        Returns:
+            function: Callback on_finished bọc callback gốc
+        """
+        store = self._get_snapshot_store()
+        if store is None:
+            return on_finished
+        
+        kingdom = scan_params['kingdom']
+        shared = scan_params.get('snapshot_scan')
+        resumed = None
+        if shared:
+            scan_id, scan_time = shared
+        else:
+            scan_id = journal.header.get('snapshot_scan_id') if journal is not None else None
+            if scan_id is not None:
+                resumed = store.resume_scan(scan_id)
+            if resumed is not None:
+                scan_time, stored = resumed
+                print(f"Continuing snapshot scan {scan_id} ({len(stored)} governor(s) already stored)")
+            else:
+                scan_time = journal.header.get('created') if journal is not None else None
+                scan_time = scan_time or time.time()
+                scan_id = store.begin_scan(kingdom, scan_params.get('scan_option', 1), str(device_id), output_file, scan_time)
+                if journal is not None:
+                    journal.update_header(snapshot_scan_id=scan_id)
+        if journal is not None:
+            stored = resumed[1] if resumed is not None else set()
+            for rank, data in sorted(journal.records.items()):
+                if rank not in stored:
+                    store.add_snapshot(scan_id, kingdom, scan_time, rank, data)
+        
+        run_start = scan_params.get('start_rank') or 1
+        previous = scanner.on_report
+        
+        def on_report(i, j, data, sheet):
+            if previous is not None and previous(i, j, data, sheet) is False:
+                return False
+            # Đoạn hạng (ChunkSheet) có hạng đầu riêng
+            rank = getattr(sheet, 'start_rank', run_start) + i - j
+            try:
+                store.add_snapshot(scan_id, kingdom, scan_time, rank, data)
+            except Exception as e:
+                print(f"Error saving snapshot: {e}")
+        scanner.on_report = on_report
+        
+        def finished(finished_device_id, status, sheet):
+            try:
+                # Lần quét nhiều thiết bị: trạng thái của thiết bị kết thúc sau cùng
+                store.finish_scan(scan_id, status)
+            except Exception as e:
+                print(f"Error finishing snapshot scan: {e}")
+            if on_finished:
+                on_finished(finished_device_id, status, sheet)
+        return finished
+    
+    def _attach_previous_snapshots(self, scanner, scan_params):
+        """
+        Nạp snapshot mới nhất của kingdom (một lần) cho quét tăng dần và kiểm tra dữ liệu
+        
+        - Quét tăng dần (scan_params['incremental'] hoặc incremental_scan):
+          chỉ mở profile của governor mới hoặc đã đổi power
+        - Kiểm tra dữ liệu (validate_records): các chỉ số tích lũy không
+          được giảm so với snapshot trước
+        """
+        incremental = self._incremental_requested(scan_params)
+        validate = scanner.validator is not None and scanner.scan_option != 4
+        if not incremental and not validate:
+            return
+        store = self._get_snapshot_store()
+        if store is None:
+            if incremental:
+                print("Incremental scan needs the snapshot store, scanning every profile")
+            return
+        
+        try:
+            snapshots = store.latest_snapshots(scan_params['kingdom'])
+        except Exception as e:
+            print(f"Error loading previous snapshots: {e}")
+            return
+        if validate:
+            scanner.previous_snapshots = snapshots
+        if incremental:
+            from scanner.incremental_scan import IncrementalIndex
+            scanner.incremental = IncrementalIndex(snapshots, getattr(self.config, 'incremental_name_cutoff', 0.6))
+            print(f"Incremental scan: {len(scanner.incremental)} governors known in kingdom {scan_params['kingdom']}")
+    
+    def _attach_id_index(self, scanner, scan_params, journal=None):
+        """
+        Phát hiện governor mở trùng trong lần quét bằng chỉ mục ID
+        
+        Các thiết bị của cùng một lần quét dùng chung scan_params['id_index'];
+        khi quét tiếp từ nhật ký, chỉ mục bắt đầu từ các ID đã có trong nhật ký.
+        """
+        if not getattr(self.config, 'id_dedupe', True) or scanner.scan_option == 4:
+            return
+        index = scan_params.get('id_index')
+        if index is None:
+            index = GovernorIdIndex(journal.ids if journal is not None else None)
+        scanner.id_index = index
+    
+    def _incremental_requested(self, scan_params):
+        """Quét tăng dần được bật cho lần quét này (scan_params hoặc cấu hình incremental_scan)"""
+        return bool(scan_params.get('incremental', getattr(self.config, 'incremental_scan', False))) and \
+            scan_params.get('scan_option', 1) != 4
+    
+    def _create_result_sheet(self, scan_option, output_file, refreshed=False):
+        """
+        Tạo nơi ghi kết quả theo result_sink
+        
+        'csv'/'jsonl' ghi từng governor vào file cạnh output_file và xuất Excel
+        một lần khi quét xong; 'excel' giữ workbook xlwt và lưu định kỳ như cũ.
+        
+        Returns:
+            tuple: (workbook hoặc None nếu dùng sink, sheet/sink)
+        """
+        kind = getattr(self.config, 'result_sink', 'csv')
+        if kind != 'excel':
+            try:
+                sink = create_result_sink(kind, output_file, scan_option,
+                                          getattr(self.config, 'sink_fsync_interval', 2.0), refreshed)
+                if sink is not None:
+                    return None, sink
+                print(f"Unknown result sink '{kind}', using Excel")
+            except OSError as e:
+                print(f"Error creating result sink, using Excel: {e}")
+        return ExcelManager().setup_excel(scan_option, refreshed)
+    
+    def start_scan(self, device_id, scan_params, on_finished=None, scheduler=None, journal=None):
         """
         Start a new scan on the specified device
         
         Args:
             device_id (str): Device identifier
             scan_params (dict): Scan parameters (kingdom, range, etc)
+            on_finished: Optional callback(device_id, status, sheet) when the scan thread ends
+            scheduler: Optional ChunkScheduler handing out rank chunks to this device
+            journal: Optional ScanJournal or journal path to continue from its next rank
             
         Returns:
             bool: True if scan started successfully, False otherwise
@@ -67,6 +445,9 @@ class ScanManager:
             print(f"Scan already running on device {device_id}")
             return False
         
+        if self._device_limit_reached():
+            return False
+        
         # Kiểm tra thiết bị có tồn tại không
         device_manager = self._get_device_manager()
         if not device_manager:
@@ -74,11 +455,8 @@ class ScanManager:
             return False
             
         # Tạo đối tượng thiết bị thực tế từ device_id
-        from Ldplayer.device import Device
         try:
-            # Lấy đường dẫn từ config
-            ldplayer_path = self.config.ldplayer_path
-            device = Device(int(device_id), ldplayer_path)
+            device = self._create_device(device_id, scan_params)
             
             # Kiểm tra xem thiết bị có hoạt động không
             if not device.is_running():
@@ -98,18 +476,74 @@ class ScanManager:
         if not os.path.exists(output_dir):
             os.makedirs(output_dir)
         
-        # Tạo file Excel
-        excel_manager = ExcelManager()
-        wb, sheet = excel_manager.setup_excel(scan_params.get('scan_option', 1))
+        # Nhật ký của lần quét trước (Resume Scan) quyết định file và loại quét
+        try:
+            journal = None if scheduler is not None else self._open_journal(journal, scan_params)
+        except (OSError, ValueError) as e:
+            print(f"Error opening scan journal: {e}")
+            journal = None
+        if journal is not None:
+            scan_params = dict(scan_params, scan_option=journal.header['scan_option'])
+        
+        file_suffix = ""
+        if scheduler is not None:
+            file_suffix = f"_device{device_id}"
+        elif 'shard_index' in scan_params:
+            file_suffix = f"_shard{scan_params['shard_index'] + 1}"
         output_file = os.path.join(
             output_dir, 
-            f"{scan_params['kingdom']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xls"
+            f"{scan_params['kingdom']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}{file_suffix}.xls"
         )
+        if journal is not None:
+            output_file = journal.header.get('output_file') or output_file
+        
+        # Nơi ghi kết quả: sink streaming (Excel xuất một lần khi xong) hoặc workbook
+        # Quét tăng dần: cột Refreshed cho biết governor nào được dùng lại từ lần quét trước
+        refreshed_column = self._incremental_requested(scan_params)
+        wb, sheet = self._create_result_sheet(scan_params.get('scan_option', 1), output_file, refreshed_column)
+        if scheduler is None and 'shard_index' in scan_params:
+            # Ghi lại các ô để gộp các shard sau khi quét xong
+            sheet = RecordingSheet(sheet)
         
         # Tạo scanner
         from scanner.governor_scanner import GovernorScanner
         scanner = GovernorScanner(device, self.config)
         scanner.set_scan_option(scan_params.get('scan_option', 1))
+        if refreshed_column:
+            scanner.refreshed_column = ExcelManager().refreshed_column(scanner.scan_option)
+        
+        # Nhật ký quét: tiếp tục đúng hạng kế tiếp sau khi bị sập
+        if journal is not None:
+            result_sheet = sheet
+            sheet, scan_params = self._resume_from_journal(journal, scanner, sheet, scan_params)
+            if sheet is None:
+                journal.close()
+                if wb is None:
+                    result_sheet.close()
+                if hasattr(device_manager, 'mark_device_in_use'):
+                    device_manager.mark_device_in_use(device_id, False)
+                return False
+        elif scheduler is None and getattr(self.config, 'checkpoint_journal', True):
+            try:
+                journal = ScanJournal.create(
+                    os.path.join(self._journal_dir(), f"{os.path.splitext(os.path.basename(output_file))[0]}.jsonl"),
+                    scan_params['kingdom'], scan_params.get('scan_option', 1),
+                    scan_params.get('start_rank') or 1, scan_params['search_range'], output_file
+                )
+            except OSError as e:
+                print(f"Error creating scan journal: {e}")
+        # Lấy snapshot trước khi lần quét này bắt đầu ghi vào kho
+        self._attach_previous_snapshots(scanner, scan_params)
+        self._attach_id_index(scanner, scan_params, journal)
+        on_finished = self._attach_snapshot_store(scanner, scan_params, device_id, output_file, on_finished, journal)
+        if journal is not None:
+            on_finished = self._attach_journal(journal, scanner, scan_params, on_finished)
+        
+        # Quét danh sách (scan_option 4) không mở profile nên luôn chạy bằng thread
+        if scheduler is None and getattr(self.config, 'scan_engine', 'threads') == 'asyncio' \
+                and scanner.scan_option != 4:
+            if self._start_async_scan(device_id, device, scanner, wb, sheet, output_file, scan_params, on_finished):
+                return True
         
         # Tạo thread cho quá trình quét
         thread = threading.Thread(
@@ -117,7 +551,10 @@ class ScanManager:
             args=(
                 device_id, device, scanner, wb, sheet, output_file,
                 scan_params, self.results_queue, self.active_scans,
-                self._get_device_manager  # Change this to a function reference
+                self._get_device_manager,  # Change this to a function reference
+                self._get_ocr_pipeline(),
+                on_finished,
+                scheduler
             ),
             daemon=True
         )
@@ -126,16 +563,157 @@ class ScanManager:
         # Lưu thông tin quét đang hoạt động
         self.active_scans[str(device_id)] = {
             "thread": thread,
+            "scheduler": scheduler,
             "device": device,
             "params": scan_params,
             "start_time": time.time(),
             "progress": 0,
             "output_file": output_file,
+            "journal": journal.path if journal is not None else None,
             "status": "running"
         }
         
         return True
     
+    def start_sharded_scan(self, device_ids, scan_params):
+        """
+        Quét một kingdom bằng nhiều thiết bị, mỗi thiết bị một dải hạng liên tiếp
+        
+        Dải hạng [start_rank, start_rank + search_range) được chia đều cho các
+        thiết bị đang chạy; mỗi thiết bị cuộn đến hạng đầu của shard rồi quét,
+        kết quả được gộp theo thứ tự hạng khi tất cả shard kết thúc.
+        
+        Args:
+            device_ids: Danh sách ID thiết bị
+            scan_params: Tham số quét (kingdom, search_range, scan_option,
+                start_rank tùy chọn, mặc định 1)
+            
+        Returns:
+            str: ID của lần quét, hoặc None nếu không khởi động được shard nào
+        """
+        # Chỉ chia cho các thiết bị đang chạy và rảnh
+        available = []
+        for device_id in device_ids:
+            device_id = str(device_id)
+            if device_id in self.active_scans:
+                print(f"Scan already running on device {device_id}")
+                continue
+            try:
+                if self._create_device(device_id, scan_params).is_running():
+                    available.append(device_id)
+                else:
+                    print(f"Device {device_id} is not running")
+            except Exception as e:
+                print(f"Error creating device object: {e}")
+        
+        if not available:
+            print("No device available for sharded scan")
+            return None
+        
+        if resource_mode(self.config) != 'off':
+            plan = self.get_resource_plan(len(self.active_scans) + len(available))
+            free = max(0, plan.max_devices - len(self.active_scans))
+            if free < len(available):
+                if self._enforce_device_cap(plan):
+                    print(f"Resource plan allows {free} more device(s), using {', '.join(available[:free]) or 'none'}")
+                    available = available[:free]
+                    if not available:
+                        return None
+                else:
+                    print(f"Resource plan suggests {free} more device(s), starting all {len(available)}")
+        
+        start_rank = scan_params.get('start_rank', 1)
+        scan_id = f"{scan_params['kingdom']}_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+        output_file = os.path.join(self.config.data_dir, 'scan_results', f"{scan_id}.xls")
+        
+        # Các thiết bị ghi vào cùng một lần quét trong kho snapshot
+        store = self._get_snapshot_store()
+        if store is not None:
+            scan_time = time.time()
+            snapshot_scan = store.begin_scan(scan_params['kingdom'], scan_params.get('scan_option', 1),
+                                             None, output_file, scan_time)
+            scan_params = dict(scan_params, snapshot_scan=(snapshot_scan, scan_time))
+        # Một governor chỉ được quét một lần dù thuộc đoạn hạng của thiết bị nào
+        scan_params = dict(scan_params, id_index=GovernorIdIndex())
+        
+        if getattr(self.config, 'rank_chunk_size', 0) > 0:
+            return self._start_chunked_scan(available, scan_params, scan_id, output_file, start_rank)
+        
+        sharded = ShardedScan(scan_id, scan_params['kingdom'], scan_params.get('scan_option', 1), output_file,
+                              self._incremental_requested(scan_params))
+        
+        shards = list(zip(available, split_rank_range(start_rank, scan_params['search_range'], len(available))))
+        # Đăng ký tất cả shard trước khi chạy để shard kết thúc sớm không gộp thiếu
+        for device_id, (shard_start, count) in shards:
+            sharded.add_shard(device_id, shard_start, count)
+        self.sharded_scans[scan_id] = sharded
+        
+        started = 0
+        for index, (device_id, (shard_start, count)) in enumerate(shards):
+            shard_params = dict(scan_params)
+            shard_params.update({
+                'start_rank': shard_start,
+                'search_range': count,
+                'resume_scanning': False,
+                'shard_index': index,
+                'sharded_scan': scan_id
+            })
+            if self.start_scan(device_id, shard_params, on_finished=sharded.shard_finished):
+                print(f"Device {device_id}: ranks {shard_start}-{shard_start + count - 1}")
+                started += 1
+            else:
+                print(f"Failed to start shard {shard_start}-{shard_start + count - 1} on device {device_id}")
+                sharded.remove_shard(device_id)
+        
+        if not started:
+            del self.sharded_scans[scan_id]
+            return None
+        return scan_id
+    
+    def _start_chunked_scan(self, device_ids, scan_params, scan_id, output_file, start_rank):
+        """
+        Chia dải hạng thành các đoạn nhỏ trong một hàng đợi chung
+        
+        Thiết bị nhanh lấy nhiều đoạn hơn, đoạn của thiết bị bị treo được giao
+        lại cho thiết bị khác.
+        
+        Returns:
+            str: ID của lần quét, hoặc None nếu không khởi động được thiết bị nào
+        """
+        scheduler = ChunkScheduler(
+            scan_id, scan_params['kingdom'], scan_params.get('scan_option', 1), output_file,
+            start_rank, scan_params['search_range'],
+            chunk_size=self.config.rank_chunk_size,
+            stall_timeout=getattr(self.config, 'chunk_stall_timeout', 90.0),
+            max_retries=getattr(self.config, 'chunk_rank_retries', 2),
+            refreshed=self._incremental_requested(scan_params)
+        )
+        # Đăng ký tất cả thiết bị trước khi chạy để thiết bị xong sớm không gộp thiếu
+        for device_id in device_ids:
+            scheduler.add_worker(device_id)
+        self.sharded_scans[scan_id] = scheduler
+        
+        started = 0
+        for index, device_id in enumerate(device_ids):
+            device_params = dict(scan_params)
+            device_params.update({
+                'start_rank': start_rank,
+                'resume_scanning': False,
+                'shard_index': index,
+                'sharded_scan': scan_id
+            })
+            if self.start_scan(device_id, device_params, on_finished=scheduler.worker_finished,
+                               scheduler=scheduler):
+                started += 1
+            else:
+                print(f"Failed to start chunked scan on device {device_id}")
+                scheduler.remove_worker(device_id)
+        
+        if not started:
+            del self.sharded_scans[scan_id]
+            return None
+        return scan_id
+    
     def stop_scan(self, device_id):
         """
         Stop a running scan
@@ -153,6 +731,10 @@ class ScanManager:
         # Set status to stopping
         self.active_scans[device_id]["status"] = "stopping"
         
+        # Task asyncio dừng ngay ở lần await tiếp theo, kể cả giữa một governor
+        if self.orchestrator is not None and self.orchestrator.is_running(device_id):
+            self.orchestrator.cancel(device_id)
+        
         # Giải phóng thiết bị
         device_manager = self._get_device_manager()
         if device_manager and hasattr(device_manager, 'mark_device_in_use'):
@@ -170,8 +752,12 @@ class ScanManager:
         Get information about currently running scans
         
         Returns:
-            dict: Information about active scans
+            dict: Information about active scans; scans fed by a ChunkScheduler
+            also carry per-device "throughput" stats
         """
+        for device_id, scan in list(self.active_scans.items()):
+            if scan.get("scheduler") is not None:
+                scan["throughput"] = scan["scheduler"].worker_stats(device_id)
         return self.active_scans
     
     def set_ui_callback(self, callback):
@@ -189,4 +775,12 @@ class ScanManager:
         self.stop_event.set()
         self.stop_all_scans()
         if hasattr(self, 'result_thread') and self.result_thread.is_alive():
-            self.result_thread.join(2.0)  # Chờ tối đa 2 giây
\ No newline at end of file
+            self.result_thread.join(2.0)  # Chờ tối đa 2 giây
+        if self.orchestrator is not None:
+            self.orchestrator.shutdown()
+        if self.adb_pool is not None:
+            self.adb_pool.close_all()
+        if self.ocr_pipeline is not None:
+            self.ocr_pipeline.shutdown(wait=False)
+        if self.snapshot_store is not None:
+            self.snapshot_store.close()
\ No newline at end of file
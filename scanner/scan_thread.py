@@ -1,11 +1,15 @@
 # scanner/scan_thread.py
 import time
+import threading
 import traceback
 from scanner.progress_handler import ProgressHandler
 from scanner.excel_manager import ExcelManager
+from scanner.pipeline import OrderedResultWriter
+from scanner.list_scan import ListPageScanner
 
 def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file, 
-                      scan_params, results_queue, active_scans, get_device_manager):
+                      scan_params, results_queue, active_scans, get_device_manager,
+                      pipeline=None, on_finished=None, scheduler=None):
     """
     Thread thực hiện quét kingdom
     
@@ -20,6 +24,10 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
         results_queue: Queue để gửi kết quả
         active_scans: Dictionary chứa thông tin scan đang hoạt động
         get_device_manager: Hàm lấy device manager
+        pipeline: OcrPipeline dùng chung (None để quét tuần tự như cũ)
+        on_finished: Hàm on_finished(device_id, status, sheet) gọi khi thread kết
+            thúc, status là 'completed', 'stopped' hoặc 'error'
+        scheduler: ChunkScheduler phát các đoạn hạng (None để quét một dải cố định)
     """
     # Đảm bảo device_id là chuỗi
     device_id = str(device_id)
@@ -30,6 +38,27 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
     
     # Khởi tạo Excel manager
     excel_manager = ExcelManager()
+    writer = None
+    finish_status = "error"
+    # Không lưu khi worker OCR đang ghi dở một dòng
+    save_lock = threading.RLock()
+    
+    def save_progress():
+        # Sink streaming (wb là None) chỉ cần fsync, không ghi lại cả workbook
+        with save_lock:
+            if wb is None:
+                sheet.flush()
+            else:
+                excel_manager.save_workbook(wb, output_file)
+    
+    def finish_results():
+        # Xuất file Excel một lần khi kết thúc
+        with save_lock:
+            if wb is None:
+                sheet.close()
+                sheet.export_excel(output_file)
+            else:
+                excel_manager.save_workbook(wb, output_file)
     
     try:
         # Lấy các tham số quét
@@ -39,22 +68,80 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
         
         print(f"Starting scan for kingdom {kingdom} on device {device_id}")
         
+        # Quét theo các đoạn hạng nhận từ hàng đợi chung
+        if scheduler is not None:
+            finish_status = _scan_chunks(
+                device_id, scanner, wb, sheet, output_file, scheduler,
+                progress_handler, active_scans, pipeline, save_lock
+            )
+            finish_results()
+            progress_handler.notify_completed(
+                device_id, output_file,
+                f"Scanning {finish_status} for kingdom {kingdom}"
+            )
+            return
+        
+        # Quét ngay trên danh sách xếp hạng (scan_option 4), không mở profile
+        if scanner.scan_option == 4:
+            start_rank = scan_params.get('start_rank') or 1
+            
+            def on_row(rank):
+                done = rank - start_rank + 1
+                progress_handler.update_progress(device_id, done, search_range)
+                if wb is not None and done % 25 == 0:
+                    save_progress()
+            
+            def should_stop():
+                return device_id in active_scans and active_scans[device_id]["status"] == "stopping"
+            
+            progress_handler.update_progress(
+                device_id, 0, search_range,
+                f"Starting list scan in kingdom {kingdom}"
+            )
+            scanned = _scan_list(scanner, sheet, start_rank, search_range, save_lock, should_stop, on_row)
+            finish_status = "stopped" if should_stop() else "completed"
+            finish_results()
+            progress_handler.notify_completed(
+                device_id, output_file,
+                f"Scanning {finish_status} for kingdom {kingdom} ({scanned} governors from the list)"
+            )
+            return
+        
         # Điểm bắt đầu
         j = 0
         if resume_scanning:
             j = 4 if isinstance(resume_scanning, int) else 0
         
+        # Quét theo dải hạng (shard): đưa danh sách đến hạng bắt đầu
+        start_rank = scan_params.get('start_rank')
+        if start_rank:
+            j = scanner.seek_to_rank(start_rank)
+            if j is None:
+                raise RuntimeError(f"Could not reach rank {start_rank}")
+        
+        scanner.rank_base = start_rank or 1
+        
         # Thông báo bắt đầu quét
         progress_handler.update_progress(
             device_id, 0, search_range, 
             f"Starting scan in kingdom {kingdom}"
         )
         
+        # Thiết bị chỉ điều hướng/chụp ảnh, OCR chạy trong pipeline và ghi theo thứ tự
+        if pipeline is not None:
+            option = scanner.scan_option
+            writer = OrderedResultWriter(
+                lambda index, data: scanner.report_governor(sheet, index, j, data, option),
+                start=j,
+                lock=save_lock
+            )
+        
         # Vòng lặp quét
         for i in range(j, j + search_range):
             # Kiểm tra nếu có yêu cầu dừng
             if device_id in active_scans and active_scans[device_id]["status"] == "stopping":
                 print(f"Scanning on device {device_id} was stopped")
+                finish_status = "stopped"
                 break
                 
             try:
@@ -62,13 +149,16 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
                 progress_handler.update_progress(device_id, i - j + 1, search_range)
                 
                 # Quét governor
-                success = scanner.scan_governor(i, j, sheet, wb, output_file)
+                if writer is not None:
+                    success = scanner.scan_governor_pipelined(i, j, pipeline, writer)
+                else:
+                    success = scanner.scan_governor(i, j, sheet, wb, output_file)
                 if not success:
                     print(f"Error scanning governor {i-j+1}")
                 
-                # Lưu định kỳ
-                if (i - j + 1) % 5 == 0:
-                    excel_manager.save_workbook(wb, output_file)
+                # Lưu định kỳ (chỉ với workbook; sink streaming tự fsync)
+                if wb is not None and (i - j + 1) % 5 == 0:
+                    save_progress()
                     print(f"Saved progress to {output_file}")
                 
                 # # Swipe để chuyển đến governor tiếp theo nếu không phải governor cuối cùng
@@ -79,10 +169,20 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
             except Exception as e:
                 print(f"Error in scan loop at governor {i-j+1}: {e}")
                 # Lưu lại tiến trình khi có lỗi
-                excel_manager.save_workbook(wb, output_file)
+                save_progress()
+        
+        # Chờ OCR các governor đã chụp xong trước khi lưu lần cuối
+        if writer is not None:
+            writer.drain()
+        
+        # Quét lại các hạng bị bỏ qua do danh sách lệch (mở trùng governor)
+        if finish_status != "stopped" and scanner.skipped_ranks:
+            scanner.retry_skipped(sheet, save_lock)
         
         # Kết thúc quét
-        excel_manager.save_workbook(wb, output_file)
+        finish_results()
+        if finish_status != "stopped":
+            finish_status = "completed"
         
         # Thông báo hoàn thành
         progress_handler.notify_completed(
@@ -95,6 +195,10 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
     except Exception as e:
         print(f"Error in scan thread: {e}")
         traceback.print_exc()
+        try:
+            finish_results()
+        except Exception as save_error:
+            print(f"Error saving results: {save_error}")
         
         # Thông báo lỗi
         progress_handler.notify_error(device_id, str(e))
@@ -107,4 +211,127 @@ def scan_thread_worker(device_id, device, scanner, wb, sheet, output_file,
         # Call the function to get the device manager
         device_manager = get_device_manager()
         if device_manager and hasattr(device_manager, 'mark_device_in_use'):
-            device_manager.mark_device_in_use(device_id, False)
\ No newline at end of file
+            device_manager.mark_device_in_use(device_id, False)
+        
+        if on_finished:
+            try:
+                on_finished(device_id, finish_status, sheet)
+            except Exception as e:
+                print(f"Error in scan finished callback: {e}")
+
+
+def _scan_chunks(device_id, scanner, wb, sheet, output_file, scheduler,
+                 progress_handler, active_scans, pipeline, save_lock):
+    """
+    Quét các đoạn hạng nhận từ ChunkScheduler cho đến khi hết việc
+    
+    Returns:
+        str: 'completed' hoặc 'stopped'
+    """
+    def should_stop():
+        return device_id in active_scans and active_scans[device_id]["status"] == "stopping"
+    
+    writers = []
+    status = "completed"
+    while True:
+        chunk = scheduler.acquire(device_id, should_stop)
+        if chunk is None:
+            if should_stop():
+                status = "stopped"
+            break
+        
+        start, count = chunk
+        print(f"Device {device_id}: ranks {start}-{start + count - 1}")
+        j = scanner.seek_to_rank(start)
+        if j is None:
+            scheduler.release(device_id)
+            raise RuntimeError(f"Could not reach rank {start}")
+        
+        chunk_sheet = scheduler.chunk_sheet(sheet, start)
+        scanner.rank_base = start
+        if scanner.scan_option == 4:
+            def on_row(rank):
+                progress_handler.update_progress(device_id, *scheduler.progress())
+                return scheduler.heartbeat(device_id, rank)
+            
+            scanned = _scan_list(scanner, chunk_sheet, start, count, save_lock, should_stop, on_row, seek=False)
+            if should_stop():
+                status = "stopped"
+                print(f"Scanning on device {device_id} was stopped")
+                scheduler.release(device_id)
+                break
+            if scanned < count:
+                print(f"Device {device_id}: list scan of chunk {start}-{start + count - 1} ended at {scanned}")
+            continue
+        
+        writer = None
+        if pipeline is not None:
+            option = scanner.scan_option
+            writer = OrderedResultWriter(
+                lambda index, data, j=j, chunk_sheet=chunk_sheet:
+                    scanner.report_governor(chunk_sheet, index, j, data, option),
+                start=j,
+                lock=save_lock
+            )
+            writers.append(writer)
+        
+        for i in range(j, j + count):
+            if should_stop():
+                status = "stopped"
+                break
+            
+            success = False
+            try:
+                if writer is not None:
+                    success = scanner.scan_governor_pipelined(i, j, pipeline, writer)
+                else:
+                    success = scanner.scan_governor(i, j, chunk_sheet, wb, output_file)
+                if not success:
+                    print(f"Error scanning governor at rank {start + i - j}")
+            except Exception as e:
+                print(f"Error in scan loop at rank {start + i - j}: {e}")
+            
+            rank = start + i - j
+            progress_handler.update_progress(device_id, *scheduler.progress())
+            # Hạng mở trùng được retry_skipped quét lại ngay trên thiết bị này;
+            # hạng lỗi khác được trả về hàng đợi chung
+            ok = success or rank in scanner.skipped_ranks
+            if not scheduler.heartbeat(device_id, rank, ok):
+                # Đoạn đã được giao cho thiết bị khác vì thiết bị này bị coi là treo
+                print(f"Device {device_id}: chunk {start}-{start + count - 1} was reassigned")
+                break
+        
+        if status == "stopped":
+            print(f"Scanning on device {device_id} was stopped")
+            scheduler.release(device_id)
+            break
+        
+        if scanner.skipped_ranks:
+            scanner.retry_skipped(chunk_sheet, save_lock)
+    
+    # Chờ OCR các governor đã chụp xong
+    for writer in writers:
+        writer.drain()
+    return status
+
+
+def _scan_list(scanner, sheet, start_rank, count, save_lock, should_stop, on_row, seek=True):
+    """
+    Quét count hạng từ start_rank ngay trên màn hình danh sách (scan_option 4)
+    
+    Args:
+        on_row: Hàm on_row(hạng) gọi sau mỗi governor; trả về False để dừng
+        seek: Đưa danh sách đến start_rank trước khi quét
+        
+    Returns:
+        int: Số governor đã ghi
+    """
+    if seek and start_rank > 1 and scanner.seek_to_rank(start_rank) is None:
+        raise RuntimeError(f"Could not reach rank {start_rank}")
+    
+    def report(index, data):
+        with save_lock:
+            scanner.report_governor(sheet, index, 0, data, 4)
+        return on_row(start_rank + index)
+    
+    return ListPageScanner(scanner).scan(start_rank, count, report, should_stop)
@@ -15,7 +15,7 @@ class ScannerThread(threading.Thread):
         self.clipboard_manager = clipboard_manager
         self.results_queue = results_queue
         self.stop_event = threading.Event()
-        self.image_processor = ImageProcessor(config.tesseract_path)
+        self.image_processor = ImageProcessor(config.tesseract_path, getattr(config, 'ocr_backend', 'auto'))
         
         # Create device-specific screenshot directory
         self.screenshot_dir = os.path.join(config.screenshots_dir, f"device_{device.id}")
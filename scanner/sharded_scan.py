@@ -0,0 +1,171 @@
+# scanner/sharded_scan.py
+import threading
+
+from scanner.excel_manager import ExcelManager
+from models.governor_store import GovernorStore
+
+
+def split_rank_range(start_rank, total, shard_count):
+    """
+    Chia dải hạng thành các đoạn liên tiếp gần bằng nhau
+
+    Args:
+        start_rank: Hạng đầu tiên
+        total: Tổng số governor cần quét
+        shard_count: Số đoạn (số thiết bị)
+
+    Returns:
+        list: Danh sách (hạng đầu, số lượng) theo thứ tự hạng
+    """
+    shard_count = max(1, min(shard_count, total))
+    base, extra = divmod(total, shard_count)
+    shards = []
+    rank = start_rank
+    for index in range(shard_count):
+        count = base + (1 if index < extra else 0)
+        shards.append((rank, count))
+        rank += count
+    return shards
+
+
+class RecordingSheet:
+    def __init__(self, sheet):
+        """
+        Bọc sheet xlwt, ghi lại mọi ô đã ghi để gộp kết quả các shard
+
+        Governor của các loại quét có chỉ số được giữ trong GovernorStore theo
+        dòng (put_governor); các ô chỉ dùng khi gộp kết quả quét danh sách.
+
+        Args:
+            sheet: Sheet xlwt gốc
+        """
+        self.sheet = sheet
+        self.rows = {}
+        self.governors = GovernorStore()
+        self._lock = threading.Lock()
+
+    def write(self, row, col, value, *args, **kwargs):
+        with self._lock:
+            self.rows.setdefault(row, {})[col] = value
+        return self.sheet.write(row, col, value, *args, **kwargs)
+
+    def put_governor(self, row, *args, **kwargs):
+        self.governors.put(row, *args, **kwargs)
+        put_governor = getattr(self.sheet, 'put_governor', None)
+        if put_governor is not None:
+            put_governor(row, *args, **kwargs)
+
+    def __getattr__(self, name):
+        return getattr(self.sheet, name)
+
+
+class ShardedScan:
+    def __init__(self, scan_id, kingdom, scan_option, output_file, refreshed=False):
+        """
+        Một lần quét kingdom được chia theo dải hạng cho nhiều thiết bị
+
+        Mỗi thiết bị ghi vào workbook riêng của shard; khi tất cả shard kết
+        thúc, các dòng được gộp theo thứ tự hạng vào output_file.
+
+        Args:
+            scan_id: ID của lần quét
+            kingdom: Tên kingdom
+            scan_option: Loại quét (quyết định header)
+            output_file: File Excel gộp
+            refreshed: Thêm cột Refreshed (quét tăng dần)
+        """
+        self.scan_id = scan_id
+        self.kingdom = kingdom
+        self.scan_option = scan_option
+        self.refreshed = refreshed
+        self.output_file = output_file
+        self.shards = {}
+        self.status = "running"
+        self._lock = threading.Lock()
+
+    def add_shard(self, device_id, start_rank, count):
+        """Đăng ký shard của một thiết bị"""
+        with self._lock:
+            self.shards[str(device_id)] = {
+                "start_rank": start_rank,
+                "count": count,
+                "rows": {},
+                "governors": None,
+                "status": "running"
+            }
+
+    def remove_shard(self, device_id):
+        """Bỏ shard không khởi động được"""
+        with self._lock:
+            self.shards.pop(str(device_id), None)
+        self._merge_if_done()
+
+    def shard_finished(self, device_id, status, sheet):
+        """
+        Gọi khi thread của một shard kết thúc; gộp kết quả khi shard cuối xong
+
+        Args:
+            device_id: ID thiết bị
+            status: 'completed', 'stopped' hoặc 'error'
+            sheet: RecordingSheet của shard
+        """
+        with self._lock:
+            shard = self.shards.get(str(device_id))
+            if shard is None:
+                return
+            shard["status"] = status
+            shard["rows"] = getattr(sheet, 'rows', {})
+            shard["governors"] = getattr(sheet, 'governors', None)
+        self._merge_if_done()
+
+    def _merge_if_done(self):
+        with self._lock:
+            if self.status != "running" or not self.shards:
+                return
+            if any(s["status"] == "running" for s in self.shards.values()):
+                return
+            self.status = "merging"
+
+        self.merge()
+
+    def merge(self):
+        """
+        Gộp các shard theo thứ tự hạng vào một workbook (sang sheet mới khi
+        vượt giới hạn dòng của .xls)
+
+        Returns:
+            bool: True nếu lưu thành công
+        """
+        with self._lock:
+            shards = sorted(self.shards.values(), key=lambda s: s["start_rank"])
+        if not shards:
+            return False
+
+        excel_manager = ExcelManager()
+        base_rank = shards[0]["start_rank"]
+        incomplete = []
+        rows = []
+        for shard in shards:
+            if shard["status"] != "completed":
+                incomplete.append(f"{shard['start_rank']}-{shard['start_rank'] + shard['count'] - 1}")
+            offset = shard["start_rank"] - base_rank
+            governors = shard["governors"]
+            if governors is not None and len(governors):
+                # Bản ghi có kiểu của shard; dòng 1 là hạng đầu của shard
+                rows.extend((offset + row, values) for row, values in excel_manager.governor_rows(
+                    governors, self.scan_option, self.refreshed, range(1, shard["count"] + 1)))
+                continue
+            for row, cells in sorted(shard["rows"].items()):
+                # Dòng 0 là header của workbook shard
+                if row <= 0 or row > shard["count"] or not cells:
+                    continue
+                rows.append((offset + row, [cells.get(col, "") for col in range(max(cells) + 1)]))
+
+        if incomplete:
+            print(f"Sharded scan {self.scan_id}: incomplete rank ranges {', '.join(incomplete)}")
+
+        saved = excel_manager.export_rows(rows, self.scan_option, self.output_file, self.refreshed)
+        self.status = "completed" if saved else "error"
+        if saved:
+            print(f"Sharded scan {self.scan_id} merged into {self.output_file}")
+        return saved
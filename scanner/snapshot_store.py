@@ -0,0 +1,264 @@
+# scanner/snapshot_store.py
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from models.governor import STAT_FIELDS
+from models.governor_store import GovernorStore
+
+# Các cột số của một snapshot (trùng tên trường của GovernorScanner.analyze_governor)
+NUMERIC_FIELDS = STAT_FIELDS
+SNAPSHOT_COLUMNS = ('scan_id', 'kingdom', 'governor_id', 'scan_time', 'rank', 'name', 'alliance') + NUMERIC_FIELDS + \
+    ('refreshed',)
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS scans (
+    scan_id INTEGER PRIMARY KEY AUTOINCREMENT,
+    kingdom TEXT NOT NULL,
+    scan_option INTEGER NOT NULL,
+    scan_time REAL NOT NULL,
+    device_id TEXT,
+    output_file TEXT,
+    status TEXT NOT NULL DEFAULT 'running'
+);
+CREATE TABLE IF NOT EXISTS snapshots (
+    scan_id INTEGER NOT NULL REFERENCES scans(scan_id),
+    kingdom TEXT NOT NULL,
+    governor_id INTEGER NOT NULL,
+    scan_time REAL NOT NULL,
+    rank INTEGER,
+    name TEXT,
+    alliance TEXT,
+    {", ".join(f"{field} INTEGER" for field in NUMERIC_FIELDS)},
+    refreshed INTEGER NOT NULL DEFAULT 1
+);
+CREATE INDEX IF NOT EXISTS idx_snapshots_governor ON snapshots (kingdom, governor_id, scan_time);
+CREATE INDEX IF NOT EXISTS idx_snapshots_scan_power ON snapshots (scan_id, power);
+CREATE INDEX IF NOT EXISTS idx_scans_kingdom ON scans (kingdom, scan_time);
+"""
+
+
+def parse_number(value):
+    """
+    Chuyển text OCR ("12,345,678") thành số nguyên
+
+    Returns:
+        int: Giá trị, hoặc None nếu không có chữ số
+    """
+    if isinstance(value, int):
+        return value
+    digits = re.sub(r'\D', '', str(value or ''))
+    return int(digits) if digits else None
+
+
+class SnapshotStore:
+    def __init__(self, path, batch_size=200):
+        """
+        Lưu lịch sử governor của mọi lần quét vào một file SQLite
+
+        Bảng scans giữ mỗi lần quét, bảng snapshots giữ mỗi governor của một
+        lần quét. WAL cho phép đọc trong khi đang ghi; các snapshot được gom
+        và ghi batch_size dòng trong một transaction.
+
+        Args:
+            path: Đường dẫn file SQLite
+            batch_size: Số snapshot mỗi transaction
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self._pending = []
+        self._lock = threading.RLock()
+
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.commit()
+
+    def _migrate(self):
+        """Thêm các cột mới vào file tạo bởi phiên bản cũ"""
+        columns = {row['name'] for row in self.conn.execute("PRAGMA table_info(snapshots)")}
+        if 'refreshed' not in columns:
+            # Snapshot cũ đều đọc từ profile
+            self.conn.execute("ALTER TABLE snapshots ADD COLUMN refreshed INTEGER NOT NULL DEFAULT 1")
+
+    def begin_scan(self, kingdom, scan_option, device_id=None, output_file=None, scan_time=None):
+        """
+        Tạo một lần quét mới
+
+        Returns:
+            int: scan_id
+        """
+        with self._lock:
+            cursor = self.conn.execute(
+                "INSERT INTO scans (kingdom, scan_option, scan_time, device_id, output_file) VALUES (?, ?, ?, ?, ?)",
+                (str(kingdom), scan_option, scan_time or time.time(), device_id, output_file)
+            )
+            self.conn.commit()
+            return cursor.lastrowid
+
+    def resume_scan(self, scan_id):
+        """
+        Mở lại một lần quét bị dừng giữa chừng để ghi tiếp vào cùng scan_id
+
+        Returns:
+            tuple: (scan_time, tập các hạng đã lưu), hoặc None nếu không có lần quét này
+        """
+        with self._lock:
+            self.flush()
+            row = self.conn.execute("SELECT scan_time FROM scans WHERE scan_id = ?", (scan_id,)).fetchone()
+            if row is None:
+                return None
+            ranks = {rank for (rank,) in self.conn.execute(
+                "SELECT rank FROM snapshots WHERE scan_id = ? AND rank IS NOT NULL", (scan_id,))}
+            with self.conn:
+                self.conn.execute("UPDATE scans SET status = 'running' WHERE scan_id = ?", (scan_id,))
+        return row['scan_time'], ranks
+
+    def add_snapshot(self, scan_id, kingdom, scan_time, rank, data):
+        """
+        Thêm một governor (ghi khi đủ batch_size dòng)
+
+        Args:
+            scan_id: ID lần quét
+            kingdom: Kingdom
+            scan_time: Thời điểm của lần quét
+            rank: Hạng của governor
+            data: Kết quả của GovernorScanner.analyze_governor (refreshed=False
+                nếu dùng lại snapshot trước khi quét tăng dần)
+
+        Returns:
+            bool: False nếu governor không có ID hợp lệ (không lưu)
+        """
+        governor_id = parse_number(data.get('id'))
+        if not governor_id:
+            return False
+        row = (scan_id, str(kingdom), governor_id, scan_time, rank, data.get('name'), data.get('alliance')) + \
+            tuple(parse_number(data[field]) if field in data else None for field in NUMERIC_FIELDS) + \
+            (0 if data.get('refreshed') is False else 1,)
+        with self._lock:
+            self._pending.append(row)
+            if len(self._pending) >= self.batch_size:
+                self.flush()
+        return True
+
+    def flush(self):
+        """Ghi các snapshot đang gom trong một transaction"""
+        with self._lock:
+            if not self._pending:
+                return
+            rows, self._pending = self._pending, []
+            try:
+                with self.conn:
+                    self.conn.executemany(
+                        f"INSERT INTO snapshots ({', '.join(SNAPSHOT_COLUMNS)}) "
+                        f"VALUES ({', '.join('?' for _ in SNAPSHOT_COLUMNS)})",
+                        rows
+                    )
+            except sqlite3.Error as e:
+                print(f"Error writing snapshots: {e}")
+
+    def finish_scan(self, scan_id, status):
+        """Ghi nốt các snapshot và cập nhật trạng thái lần quét"""
+        with self._lock:
+            self.flush()
+            with self.conn:
+                self.conn.execute("UPDATE scans SET status = ? WHERE scan_id = ?", (status, scan_id))
+
+    def get_scans(self, kingdom=None):
+        """Danh sách lần quét (mới nhất trước)"""
+        with self._lock:
+            self.flush()
+            if kingdom is None:
+                rows = self.conn.execute("SELECT * FROM scans ORDER BY scan_time DESC").fetchall()
+            else:
+                rows = self.conn.execute(
+                    "SELECT * FROM scans WHERE kingdom = ? ORDER BY scan_time DESC", (str(kingdom),)
+                ).fetchall()
+        return [dict(row) for row in rows]
+
+    def scan_snapshots(self, scan_id):
+        """Các governor của một lần quét, sắp xếp theo power giảm dần"""
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(
+                "SELECT * FROM snapshots WHERE scan_id = ? ORDER BY power DESC", (scan_id,)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def governor_history(self, kingdom, governor_id):
+        """Tất cả snapshot của một governor theo thời gian"""
+        with self._lock:
+            self.flush()
+            rows = self.conn.execute(
+                "SELECT * FROM snapshots WHERE kingdom = ? AND governor_id = ? ORDER BY scan_time",
+                (str(kingdom), parse_number(governor_id))
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def latest_snapshots(self, kingdom, before=None):
+        """
+        Snapshot mới nhất của mỗi governor trong kingdom
+
+        Args:
+            kingdom: Kingdom
+            before: Chỉ xét các lần quét trước thời điểm này (None để lấy tất cả)
+
+        Returns:
+            dict: {governor_id: snapshot}
+        """
+        before = before if before is not None else float('inf')
+        with self._lock:
+            self.flush()
+            # MAX(scan_time) theo governor đọc thẳng từ index (kingdom, governor_id, scan_time)
+            rows = self.conn.execute(
+                """
+                SELECT s.* FROM snapshots s
+                JOIN (SELECT governor_id, MAX(scan_time) AS scan_time FROM snapshots
+                      WHERE kingdom = ? AND scan_time < ? GROUP BY governor_id) latest
+                  ON s.governor_id = latest.governor_id AND s.scan_time = latest.scan_time
+                WHERE s.kingdom = ?
+                """,
+                (str(kingdom), before, str(kingdom))
+            ).fetchall()
+        return {row['governor_id']: dict(row) for row in rows}
+
+    def load_governors(self, scan_id=None, kingdom=None):
+        """
+        Nạp snapshot vào GovernorStore dạng cột (dùng cho lịch sử lớn)
+
+        Các dòng được đọc lần lượt từ cursor thẳng vào các cột, không dựng
+        danh sách dict.
+
+        Args:
+            scan_id: Chỉ lấy một lần quét (sắp xếp theo power giảm dần)
+            kingdom: Chỉ lấy một kingdom (theo thời gian quét)
+
+        Returns:
+            GovernorStore
+        """
+        with self._lock:
+            self.flush()
+            if scan_id is not None:
+                query = "SELECT * FROM snapshots WHERE scan_id = ? ORDER BY power DESC"
+                params = (scan_id,)
+                count = self.conn.execute("SELECT COUNT(*) FROM snapshots WHERE scan_id = ?", params).fetchone()[0]
+            elif kingdom is not None:
+                query = "SELECT * FROM snapshots WHERE kingdom = ? ORDER BY scan_time, rank"
+                params = (str(kingdom),)
+                count = self.conn.execute("SELECT COUNT(*) FROM snapshots WHERE kingdom = ?", params).fetchone()[0]
+            else:
+                query = "SELECT * FROM snapshots ORDER BY scan_time, rank"
+                params = ()
+                count = self.conn.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0]
+            return GovernorStore.from_snapshot_rows(self.conn.execute(query, params), capacity=count)
+
+    def close(self):
+        with self._lock:
+            self.flush()
+            self.conn.close()
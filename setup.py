@@ -12,6 +12,7 @@ def main():
         "numpy==1.23.5",
         "opencv-python==4.5.5.64",
         "pytesseract==0.3.9",
+        "psutil==5.9.8",
         "pillow==9.3.0",
         "xlwt==1.3.0"
     ]
@@ -24,6 +25,18 @@ def main():
             print(f"Error installing {package}: {e}")
             return
     
+    # Package tùy chọn: thiếu thì vẫn chạy được (OCR dùng pytesseract)
+    optional_packages = [
+        "tesserocr>=2.5.2"
+    ]
+    
+    for package in optional_packages:
+        print(f"Installing optional {package}...")
+        try:
+            subprocess.check_call([sys.executable, "-m", "pip", "install", package])
+        except subprocess.CalledProcessError as e:
+            print(f"Optional {package} not installed ({e}), OCR will use pytesseract")
+    
     # Tạo các thư mục cần thiết
     dirs = ["data", "data/scan_results", "screenshots", "logs", "config"]
     for dir_name in dirs:
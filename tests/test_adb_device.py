@@ -0,0 +1,141 @@
+# tests/test_adb_device.py
+import re
+import socket
+import threading
+import unittest
+
+from utils.adb_device import AdbDevice
+
+SHELL_SCRIPT = re.compile(rb"\{ (.*) ; \} </dev/null 2>&1; printf '\\n%s\\n' (\S+)\n")
+
+
+class FakeAdbServer:
+    def __init__(self):
+        """
+        adb server giả trên localhost (giao thức smart socket)
+
+        - host:transport:<serial> -> OKAY
+        - exec:sh -> phiên shell: mỗi dòng script trả output 'echo' + marker
+        - exec:<lệnh> -> trả payload rồi đóng kết nối
+
+        mode quyết định cách xử lý lệnh shell: 'reply' (bình thường),
+        'drop_after_reply' (đóng phiên sau khi trả lời), 'drop_before_reply'
+        (đóng phiên khi đã nhận lệnh, không trả lời).
+        """
+        self.commands = []
+        self.shell_sessions = 0
+        self.mode = 'reply'
+        self.exec_payload = b'\x89PNG' + bytes(range(256)) * 8
+        self.session_closed = threading.Event()
+        self.server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.server.bind(('127.0.0.1', 0))
+        self.server.listen(8)
+        self.port = self.server.getsockname()[1]
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    @staticmethod
+    def _read_exact(conn, size):
+        data = b''
+        while len(data) < size:
+            chunk = conn.recv(size - len(data))
+            if not chunk:
+                raise ConnectionError
+            data += chunk
+        return data
+
+    def _request(self, conn):
+        length = int(self._read_exact(conn, 4), 16)
+        return self._read_exact(conn, length).decode('utf-8')
+
+    def _handle(self, conn):
+        try:
+            while True:
+                request = self._request(conn)
+                conn.sendall(b'OKAY')
+                if request.startswith('host:transport:'):
+                    continue
+                if request == 'exec:sh':
+                    self.shell_sessions += 1
+                    self._shell(conn)
+                elif request.startswith('exec:'):
+                    self.commands.append(request[len('exec:'):])
+                    conn.sendall(self.exec_payload)
+                return
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            conn.close()
+            self.session_closed.set()
+
+    def _shell(self, conn):
+        buffer = b''
+        while True:
+            match = SHELL_SCRIPT.search(buffer)
+            if match is None:
+                chunk = conn.recv(65536)
+                if not chunk:
+                    return
+                buffer += chunk
+                continue
+            buffer = buffer[match.end():]
+            command = match.group(1).decode('utf-8')
+            self.commands.append(command)
+            if self.mode == 'drop_before_reply':
+                return
+            output = command[len('echo '):] + '\n' if command.startswith('echo ') else ''
+            conn.sendall(output.encode('utf-8') + b'\n' + match.group(2) + b'\n')
+            if self.mode == 'drop_after_reply':
+                return
+
+    def close(self):
+        self.server.close()
+
+
+class AdbDeviceTest(unittest.TestCase):
+    def setUp(self):
+        self.server = FakeAdbServer()
+        self.device = AdbDevice(0, host='127.0.0.1', port=self.server.port)
+
+    def tearDown(self):
+        self.device.close()
+        self.server.close()
+
+    def test_shell_reuses_session(self):
+        self.assertEqual(self.device.shell('echo hello'), 'hello\n')
+        self.assertEqual(self.device.shell('echo again'), 'again\n')
+        self.assertEqual(self.server.shell_sessions, 1)
+        self.assertEqual(self.server.commands, ['echo hello', 'echo again'])
+
+    def test_exec_out_returns_bytes(self):
+        self.assertEqual(self.device.exec_out('screencap -p'), self.server.exec_payload)
+        self.assertEqual(self.server.commands, ['screencap -p'])
+
+    def test_reconnects_when_session_closed_before_command(self):
+        self.server.mode = 'drop_after_reply'
+        self.assertEqual(self.device.shell('echo one'), 'one\n')
+        self.assertTrue(self.server.session_closed.wait(5))
+        self.server.mode = 'reply'
+        self.assertEqual(self.device.shell('echo two'), 'two\n')
+        self.assertEqual(self.server.shell_sessions, 2)
+        self.assertEqual(self.server.commands, ['echo one', 'echo two'])
+
+    def test_no_retry_after_command_sent(self):
+        self.server.mode = 'drop_before_reply'
+        self.assertEqual(self.device.shell('input tap 100 200'), '')
+        # Lệnh đã tới thiết bị: không được gửi lại (tap hai lần)
+        self.assertEqual(self.server.commands, ['input tap 100 200'])
+        self.server.mode = 'reply'
+        self.assertEqual(self.device.shell('echo next'), 'next\n')
+        self.assertEqual(self.server.shell_sessions, 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
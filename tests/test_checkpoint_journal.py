@@ -0,0 +1,174 @@
+# tests/test_checkpoint_journal.py
+import os
+import shutil
+import tempfile
+import unittest
+
+from scanner.checkpoint_journal import OffsetSheet, ScanJournal, find_resumable_journal
+from scanner.scan_manager import ScanManager
+
+
+class FakeSheet:
+    def __init__(self):
+        self.cells = {}
+
+    def write(self, row, col, value, *args, **kwargs):
+        self.cells[(row, col)] = value
+
+
+class FakeScanner:
+    def __init__(self):
+        self.rank_base = 1
+        self.reported = []
+
+    def report_governor(self, sheet, i, j, data, option=None):
+        self.reported.append((i - j + 1, data['id'], option))
+        sheet.write(i - j + 1, 0, data['id'])
+
+
+def governor(rank):
+    return {'id': str(10000000 + rank), 'name': f'gov{rank}', 'power': str(rank * 1000)}
+
+
+class ScanJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.dir, 'kingdom_1.jsonl')
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def write_journal(self, start_rank=1, ranks=(1, 2, 3), search_range=10):
+        journal = ScanJournal.create(self.path, 'kingdom', 2, start_rank, search_range, 'out.xls')
+        for rank in ranks:
+            self.assertTrue(journal.append(rank, governor(rank)))
+        journal.close()
+
+    def truncate_last_line(self):
+        with open(self.path, 'rb') as f:
+            content = f.read()
+        last = content.rstrip(b"\n").rfind(b"\n")
+        # Sập giữa lúc ghi: dòng cuối chỉ còn một nửa, không có '\n'
+        with open(self.path, 'wb') as f:
+            f.write(content[:last + 1 + (len(content) - last) // 2])
+
+    def test_reopen_keeps_records(self):
+        self.write_journal()
+        journal = ScanJournal.open(self.path)
+        self.assertEqual(sorted(journal.records), [1, 2, 3])
+        self.assertEqual(journal.next_rank(), 4)
+        self.assertIsNone(journal.status)
+        journal.close()
+
+    def test_truncated_last_line_is_dropped(self):
+        self.write_journal()
+        self.truncate_last_line()
+
+        journal = ScanJournal.open(self.path)
+        self.assertEqual(sorted(journal.records), [1, 2])
+        self.assertEqual(journal.next_rank(), 3)
+        # Dòng mới không bị nối vào dòng ghi dở
+        self.assertTrue(journal.append(3, governor(3)))
+        journal.close()
+
+        journal = ScanJournal.open(self.path)
+        self.assertEqual(sorted(journal.records), [1, 2, 3])
+        journal.close()
+
+    def test_duplicates_by_rank_or_id(self):
+        self.write_journal()
+        journal = ScanJournal.open(self.path)
+        self.assertFalse(journal.append(2, governor(7)))
+        # Cùng ID ở hạng khác: bảng xếp hạng đổi giữa hai lần chạy
+        self.assertFalse(journal.append(5, governor(1)))
+        self.assertTrue(journal.append(4, governor(4)))
+        journal.close()
+
+    def test_header_updates_survive_reopen(self):
+        self.write_journal()
+        journal = ScanJournal.open(self.path)
+        journal.update_header(snapshot_scan_id=42)
+        journal.close()
+
+        journal = ScanJournal.open(self.path)
+        self.assertEqual(journal.header['snapshot_scan_id'], 42)
+        self.assertEqual(journal.header['kingdom'], 'kingdom')
+        journal.close()
+
+    def test_resume_writes_at_the_next_row(self):
+        self.write_journal(start_rank=101, ranks=(101, 102, 103))
+        self.truncate_last_line()
+        journal = ScanJournal.open(self.path)
+        scanner = FakeScanner()
+        sheet = FakeSheet()
+
+        resumed, params = ScanManager._resume_from_journal(None, journal, scanner, sheet, {'kingdom': 'kingdom'})
+        journal.close()
+
+        # Dòng đã có trong nhật ký được dựng lại ở đúng vị trí hạng
+        self.assertEqual(scanner.reported, [(1, '10000101', 2), (2, '10000102', 2)])
+        self.assertEqual(scanner.rank_base, 101)
+        self.assertEqual(params['start_rank'], 103)
+        self.assertEqual(params['search_range'], 8)
+        self.assertEqual(params['scan_option'], 2)
+
+        # Governor đầu tiên của lần quét tiếp (dòng 1) ghi vào dòng của hạng 103
+        resumed.write(1, 0, '10000103')
+        resumed.write(0, 0, 'Governor Name')
+        self.assertEqual(sheet.cells[(3, 0)], '10000103')
+        self.assertEqual(sheet.cells[(0, 0)], 'Governor Name')
+
+    def test_finished_journal_does_not_resume(self):
+        self.write_journal(ranks=(1, 2), search_range=2)
+        journal = ScanJournal.open(self.path)
+        resumed, params = ScanManager._resume_from_journal(None, journal, FakeScanner(), FakeSheet(), {})
+        journal.close()
+        self.assertIsNone(resumed)
+        self.assertIsNone(params)
+
+
+class OffsetSheetTest(unittest.TestCase):
+    def test_rows_are_shifted_except_header(self):
+        sheet = FakeSheet()
+        offset = OffsetSheet(sheet, 5)
+        offset.write(0, 1, 'header')
+        offset.write(2, 1, 'value')
+        self.assertEqual(sheet.cells, {(0, 1): 'header', (7, 1): 'value'})
+
+
+class FindResumableJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def journal(self, name, mtime, status=None, truncate=False):
+        path = os.path.join(self.dir, name)
+        journal = ScanJournal.create(path, 'kingdom', 2, 1, 10, 'out.xls')
+        journal.append(1, governor(1))
+        journal.close(status)
+        if truncate:
+            with open(path, 'ab') as f:
+                f.write(b'{"type": "governor", "ra')
+        os.utime(path, (mtime, mtime))
+        return path
+
+    def test_latest_unfinished_journal(self):
+        self.journal('kingdom_1.jsonl', 1000)
+        unfinished = self.journal('kingdom_2.jsonl', 2000, status='stopped')
+        self.journal('kingdom_3.jsonl', 3000, status='completed')
+        self.journal('other_4.jsonl', 4000)
+        self.assertEqual(find_resumable_journal(self.dir, 'kingdom'), unfinished)
+
+    def test_truncated_journal_is_resumable(self):
+        truncated = self.journal('kingdom_1.jsonl', 1000, truncate=True)
+        self.assertEqual(find_resumable_journal(self.dir, 'kingdom'), truncated)
+
+    def test_all_completed(self):
+        self.journal('kingdom_1.jsonl', 1000, status='completed')
+        self.assertIsNone(find_resumable_journal(self.dir, 'kingdom'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+# tests/test_chunk_scheduler.py
+import time
+import unittest
+from unittest import mock
+
+from scanner.chunk_scheduler import ChunkScheduler
+
+
+def scheduler(total=10, chunk_size=5, **kwargs):
+    return ChunkScheduler('scan', 'kingdom', 2, 'merged.xls', 1, total, chunk_size=chunk_size, **kwargs)
+
+
+class ChunkSchedulerTest(unittest.TestCase):
+    def test_chunks_are_handed_out_in_rank_order(self):
+        chunks = scheduler(total=12)
+        chunks.add_worker('a')
+        chunks.add_worker('b')
+        self.assertEqual(chunks.acquire('a'), (1, 5))
+        self.assertEqual(chunks.acquire('b'), (6, 5))
+        for rank in range(1, 6):
+            chunks.heartbeat('a', rank)
+        self.assertEqual(chunks.acquire('a'), (11, 2))
+        # Phần chưa báo quét của đoạn trước được trả về hàng đợi
+        chunks.heartbeat('b', 6)
+        self.assertEqual(chunks.acquire('b'), (7, 4))
+
+    def test_stalled_chunk_is_requeued(self):
+        chunks = scheduler(stall_timeout=0.05)
+        chunks.add_worker('a')
+        chunks.add_worker('b')
+        self.assertEqual(chunks.acquire('a'), (1, 5))
+        self.assertTrue(chunks.heartbeat('a', 1))
+        self.assertTrue(chunks.heartbeat('a', 2))
+        time.sleep(0.1)
+
+        # a không báo tiến triển quá stall_timeout: b nhận phần còn lại của đoạn
+        self.assertEqual(chunks.acquire('b'), (3, 3))
+        self.assertEqual(chunks.worker_stats('a')['stalls'], 1)
+        self.assertFalse(chunks.heartbeat('a', 3))
+        # Hạng a quét muộn vẫn được tính; b bỏ qua hạng đó
+        chunks.heartbeat('b', 4)
+        chunks.heartbeat('b', 5)
+        self.assertEqual(chunks.acquire('b'), (6, 5))
+        self.assertEqual(chunks.progress(), (5, 10))
+
+    def test_reclaimed_chunk_skips_scanned_ranks(self):
+        chunks = scheduler(stall_timeout=0.05)
+        chunks.add_worker('a')
+        chunks.add_worker('b')
+        chunks.acquire('a')
+        chunks.heartbeat('a', 1)
+        time.sleep(0.1)
+        self.assertEqual(chunks.acquire('b'), (2, 4))
+        # a vẫn chạy và quét xong hạng 2 trước khi b tới
+        chunks.heartbeat('a', 2)
+        chunks.release('b')
+        self.assertEqual(chunks.acquire('b'), (3, 3))
+
+    def test_failed_rank_is_retried_then_given_up(self):
+        chunks = scheduler(total=2, chunk_size=2, max_retries=1)
+        chunks.add_worker('a')
+        self.assertEqual(chunks.acquire('a'), (1, 2))
+        chunks.heartbeat('a', 1, success=False)
+        chunks.heartbeat('a', 2)
+        self.assertEqual(chunks.acquire('a'), (1, 1))
+        chunks.heartbeat('a', 1, success=False)
+        self.assertIsNone(chunks.acquire('a'))
+        self.assertEqual(chunks.failed, {1: 2})
+        self.assertEqual(chunks.progress(), (1, 2))
+
+    def test_record_writes_each_cell_once_per_sheet(self):
+        chunks = scheduler()
+        sheet = object()
+        self.assertTrue(chunks.record(3, 0, 'name', sheet))
+        self.assertFalse(chunks.record(3, 0, 'name again', sheet))
+        self.assertTrue(chunks.record(3, 0, 'name again', object()))
+        self.assertEqual(chunks.rows[3][0], 'name again')
+
+    def test_merge_writes_rows_in_rank_order(self):
+        chunks = scheduler(total=4, chunk_size=2)
+        chunks.add_worker('a')
+        for rank in (4, 1, 3):
+            chunks.record(rank, 0, f'gov{rank}')
+            chunks.record(rank, 2, rank * 100)
+
+        with mock.patch('scanner.chunk_scheduler.ExcelManager') as excel_manager:
+            excel_manager.return_value.export_rows.return_value = True
+            chunks.worker_finished('a', 'completed')
+
+        rows, scan_option, filepath, refreshed = excel_manager.return_value.export_rows.call_args[0]
+        self.assertEqual(rows, [
+            (1, ['gov1', '', 100]),
+            (3, ['gov3', '', 300]),
+            (4, ['gov4', '', 400]),
+        ])
+        self.assertEqual((scan_option, filepath, refreshed), (2, 'merged.xls', False))
+        self.assertEqual(chunks.status, 'completed')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,87 @@
+# tests/test_clipboard_manager.py
+import threading
+import unittest
+
+from utils.clipboard_manager import ClipboardService, parse_clipboard_parcel
+
+
+def string16(text):
+    """Các word 32 bit của một String16 trong Parcel (độ dài, UTF-16, \\0, đệm)"""
+    data = len(text).to_bytes(4, 'little') + text.encode('utf-16-le') + b'\x00\x00'
+    data += b'\x00' * (-len(data) % 4)
+    return [int.from_bytes(data[i:i + 4], 'little') for i in range(0, len(data), 4)]
+
+
+def parcel_output(words):
+    """Output của `service call` cho các word đã cho (4 word mỗi dòng)"""
+    lines = []
+    for i in range(0, len(words), 4):
+        chunk = ' '.join(f"{word:08x}" for word in words[i:i + 4])
+        lines.append(f"  0x{i * 4:08x}: {chunk} '................'")
+    return "Result: Parcel(\n" + "\n".join(lines) + ")"
+
+
+class FakeBroker:
+    def __init__(self, value):
+        self.value = value
+        self.lock = threading.RLock()
+        self.reads = 0
+
+    def get(self):
+        self.reads += 1
+        return self.value
+
+
+class FakeDevice:
+    def __init__(self, output):
+        self.id = 0
+        self.output = output
+        self.reads = 0
+
+    def shell(self, command):
+        self.reads += 1
+        return self.output
+
+
+class ParseClipboardParcelTest(unittest.TestCase):
+    def test_text_clip(self):
+        words = [0, 1] + string16('clip') + [1] + string16('text/plain') + [1] + string16('12345678')
+        self.assertEqual(parse_clipboard_parcel(parcel_output(words)), '12345678')
+
+    def test_null_clip(self):
+        # Android 10+ trả clip null cho shell khi đọc clipboard từ nền
+        self.assertEqual(parse_clipboard_parcel(parcel_output([0, 0])), '')
+
+    def test_exception_code(self):
+        words = [0xffffffff] + string16('Permission denial')
+        self.assertIsNone(parse_clipboard_parcel(parcel_output(words)))
+
+    def test_not_a_parcel(self):
+        self.assertIsNone(parse_clipboard_parcel("service: command not found"))
+
+
+class ClipboardServiceTest(unittest.TestCase):
+    def test_empty_clip_after_copy_falls_back_to_host(self):
+        broker = FakeBroker('host text')
+        service = ClipboardService(broker, timeout=0.05, poll_interval=0.01, max_empty_reads=2)
+        device = FakeDevice(parcel_output([0, 0]))
+
+        self.assertEqual(service.read(device, copy=lambda: None), 'host text')
+        self.assertEqual(service.read(device, copy=lambda: None), 'host text')
+        reads = device.reads
+        # Đã coi là không hỗ trợ: không đọc (và chờ) clipboard thiết bị nữa
+        self.assertEqual(service.read(device, copy=lambda: None), 'host text')
+        self.assertEqual(device.reads, reads)
+        self.assertEqual(broker.reads, 3)
+
+    def test_device_clip_is_used(self):
+        broker = FakeBroker('host text')
+        service = ClipboardService(broker, timeout=0.05, poll_interval=0.01)
+        device = FakeDevice(parcel_output([0, 1] + string16('12345678')))
+
+        self.assertEqual(service.read(device, copy=lambda: None), '12345678')
+        self.assertEqual(broker.reads, 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,93 @@
+# tests/test_delta_report.py
+import os
+import shutil
+import tempfile
+import unittest
+
+from models.governor_store import GovernorStore
+from scanner.delta_report import ScanDelta, ScanTable
+
+# Lần quét trước: 1003 rời kingdom ở lần sau
+OLD_SCAN = [
+    {'id': '1001', 'name': 'Alpha', 'alliance': 'AAA', 'power': '1000', 'kill_points': '100'},
+    {'id': '1002', 'name': 'Bravo', 'alliance': 'AAA', 'power': '2000', 'kill_points': '200'},
+    {'id': '1003', 'name': 'Charlie', 'alliance': 'BBB', 'power': '3000', 'kill_points': '50'},
+]
+
+# Lần quét sau: kill points của 1002 không đọc được, 1004 là governor mới,
+# 1001 đổi sang alliance BBB
+NEW_SCAN = [
+    {'id': '1001', 'name': 'Alpha', 'alliance': 'BBB', 'power': '1100', 'kill_points': '150'},
+    {'id': '1002', 'name': 'Bravo', 'alliance': 'AAA', 'power': '2500', 'kill_points': ''},
+    {'id': '1004', 'name': 'Delta', 'alliance': 'AAA', 'power': '300', 'kill_points': '10'},
+    # ID không đọc được hoặc trùng: bị bỏ
+    {'id': '', 'name': 'Unknown', 'power': '1'},
+    {'id': '1001', 'name': 'Alpha again', 'power': '9999'},
+]
+
+GOVERNOR_HEADERS = ['Governor ID', 'Governor Name', 'Alliance', 'Status',
+                    'Power', 'Power Delta', 'Kill Points', 'Kill Points Delta']
+
+
+class ScanDeltaTest(unittest.TestCase):
+    def setUp(self):
+        self.delta = ScanDelta(ScanTable.from_records(OLD_SCAN), ScanTable.from_records(NEW_SCAN))
+
+    def test_tables(self):
+        self.assertEqual(len(self.delta.old), 3)
+        self.assertEqual(len(self.delta.new), 3)
+        self.assertEqual(self.delta.fields, ['power', 'kill_points'])
+
+    def test_governor_rows(self):
+        headers, rows = self.delta.governor_rows()
+        self.assertEqual(headers, GOVERNOR_HEADERS)
+        self.assertEqual(rows, [
+            [1001, 'Alpha', 'BBB', 'both', 1100, 100, 150, 50],
+            # Kill points thiếu ở lần sau: không có giá trị, không có chênh lệch
+            [1002, 'Bravo', 'AAA', 'both', 2500, 500, "", ""],
+            [1004, 'Delta', 'AAA', 'new', 300, "", 10, ""],
+            [1003, 'Charlie', 'BBB', 'gone', 3000, "", 50, ""],
+        ])
+
+    def test_alliance_rows(self):
+        headers, rows = self.delta.alliance_rows()
+        self.assertEqual(headers, ['Alliance', 'Governors', 'Matched', 'Power Delta', 'Kill Points Delta'])
+        # Theo alliance ở lần quét sau, sắp xếp theo chênh lệch kill points giảm dần
+        self.assertEqual(rows, [
+            ['BBB', 1, 1, 100, 50],
+            ['AAA', 2, 1, 500, 0],
+        ])
+
+    def test_missing_in_old_scan(self):
+        old = [dict(OLD_SCAN[0], kill_points='')] + OLD_SCAN[1:]
+        delta = ScanDelta(ScanTable.from_records(old), ScanTable.from_records(NEW_SCAN))
+        _, rows = delta.governor_rows()
+        self.assertEqual(rows[0], [1001, 'Alpha', 'BBB', 'both', 1100, 100, 150, ""])
+
+    def test_governor_store_matches_records(self):
+        old, new = GovernorStore(), GovernorStore()
+        fields = ('power', 'kill_points')
+        for record in OLD_SCAN:
+            old.append(record, fields=fields)
+        for record in NEW_SCAN:
+            new.append(record, fields=fields)
+        delta = ScanDelta(ScanTable.from_governor_store(old), ScanTable.from_governor_store(new))
+        self.assertEqual(delta.governor_rows(), self.delta.governor_rows())
+        self.assertEqual(delta.alliance_rows(), self.delta.alliance_rows())
+
+    def test_csv_report(self):
+        directory = tempfile.mkdtemp()
+        try:
+            path = os.path.join(directory, 'delta.csv')
+            self.assertTrue(self.delta.write_report(path))
+            with open(path, encoding='utf-8') as f:
+                lines = f.read().splitlines()
+            self.assertEqual(lines[0], ','.join(GOVERNOR_HEADERS))
+            self.assertEqual(lines[1], '1001,Alpha,BBB,both,1100,100,150,50')
+            self.assertTrue(os.path.exists(os.path.join(directory, 'delta_alliances.csv')))
+        finally:
+            shutil.rmtree(directory)
+
+
+if __name__ == '__main__':
+    unittest.main()
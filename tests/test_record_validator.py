@@ -0,0 +1,102 @@
+# tests/test_record_validator.py
+import unittest
+
+from scanner.governor_scanner import FULL_SCAN_FIELDS
+from scanner.record_validator import RecordValidator
+
+# Kill points khớp tổng có trọng số của T1-T5: 10*0.2 + 10*2 + 10*4 + 10*10 + 10*20 = 362
+TIERS = {f'tier{idx}_kills': 10 for idx in range(1, 6)}
+
+
+class FakeScanner:
+    def __init__(self, readings):
+        """
+        Scanner giả: mỗi cách tiền xử lý trả (tên, roi), OCR trả giá trị trong
+        readings[(tên cách tiền xử lý, roi)] ("" nếu không có)
+        """
+        self.readings = readings
+        self.reads = []
+
+    def preprocess_image(self, frame, roi):
+        return ('preprocess_image', roi)
+
+    def preprocess_image2(self, frame, roi):
+        return ('preprocess_image2', roi)
+
+    def preprocess_image3(self, frame, roi):
+        return ('preprocess_image3', roi)
+
+    def read_ocr_from_image(self, image, config):
+        self.reads.append(image)
+        return self.readings.get(image, "")
+
+
+def field(name):
+    return next(field for field in FULL_SCAN_FIELDS if field.name == name)
+
+
+def scan_data(**values):
+    data = {'id': '12345678', 'name': 'Governor', 'power': '25000000', 'kill_points': '362',
+            'deads': '500', 'rss_assistance': '1000', 'alliance_helps': '100'}
+    data.update({name: str(value) for name, value in TIERS.items()})
+    data.update({name: str(value) for name, value in values.items()})
+    return data
+
+
+FRAMES = {'main': object(), 'kills': object(), 'more': object(), 'kvk': object()}
+
+
+class ProblemsTest(unittest.TestCase):
+    def setUp(self):
+        self.validator = RecordValidator(FakeScanner({}))
+
+    def test_consistent_record(self):
+        values = dict(TIERS, id=12345678, power=25000000, kill_points=362)
+        self.assertEqual(self.validator.problems(values), [])
+
+    def test_kill_points_missing_digit(self):
+        values = dict(TIERS, kill_points=36)
+        reasons = self.validator.problems(values)
+        self.assertEqual(reasons[0][0], 'kill_points')
+        # Tổng lớn hơn kill points: kill points bị nghi trước
+        self.assertEqual(reasons[0][1][0], 'kill_points')
+
+    def test_digit_ranges(self):
+        reasons = [reason for reason, _ in self.validator.problems({'id': 123, 'power': 12345678901})]
+        self.assertEqual(reasons, ['digits:id', 'digits:power'])
+
+    def test_decrease_and_power_jump(self):
+        previous = {'deads': '600', 'power': '25000000'}
+        reasons = [reason for reason, _ in self.validator.problems({'deads': 500, 'power': 250000000}, previous)]
+        self.assertEqual(reasons, ['decreased:deads', 'power_jump'])
+
+
+class ValidateTest(unittest.TestCase):
+    def test_valid_record_is_not_reread(self):
+        scanner = FakeScanner({})
+        data = RecordValidator(scanner).validate(scan_data(), FRAMES, FULL_SCAN_FIELDS)
+        self.assertNotIn('validation', data)
+        self.assertEqual(scanner.reads, [])
+
+    def test_reread_fixes_field(self):
+        kp = field('kill_points')
+        scanner = FakeScanner({('preprocess_image3', kp.roi): '362'})
+        data = RecordValidator(scanner).validate(scan_data(kill_points='36'), FRAMES, FULL_SCAN_FIELDS)
+        self.assertEqual(data['kill_points'], '362')
+        self.assertNotIn('validation', data)
+
+    def test_unresolved_field_is_blanked(self):
+        previous = {'deads': '600'}
+        data = RecordValidator(FakeScanner({})).validate(scan_data(), FRAMES, FULL_SCAN_FIELDS, previous)
+        self.assertEqual(data['validation'], ['decreased:deads'])
+        self.assertEqual(data['deads'], '')
+        self.assertEqual(data['kill_points'], '362')
+
+    def test_id_is_never_blanked(self):
+        data = RecordValidator(FakeScanner({})).validate(scan_data(id='123'), FRAMES, FULL_SCAN_FIELDS)
+        self.assertEqual(data['validation'], ['digits:id'])
+        self.assertEqual(data['id'], '123')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+# tests/test_resource_governor.py
+import os
+import unittest
+from types import SimpleNamespace
+
+from scanner.resource_governor import ResourceGovernor, resource_mode
+
+
+class FixedGovernor(ResourceGovernor):
+    def __init__(self, cores, measured=None, **config):
+        """ResourceGovernor với số lõi cố định và device_cost đo được cho trước"""
+        super().__init__(SimpleNamespace(**config), cores=cores)
+        self.measured = measured
+
+    def measure_device_cost(self):
+        return self.measured
+
+
+class ResourcePlanTest(unittest.TestCase):
+    def test_estimated_plan(self):
+        plan = FixedGovernor(8).plan()
+        # 8 lõi - 1 lõi chừa lại, chừa 1 lõi cho OCR, mỗi giả lập 1 lõi
+        self.assertEqual(plan.max_devices, 6)
+        self.assertFalse(plan.measured)
+        self.assertEqual(plan.device_cost, 1.0)
+
+    def test_busy_devices_keep_half_the_cores_for_ocr(self):
+        plan = FixedGovernor(8).plan(6)
+        # 7 - 6 * 1.0 = 1 lõi theo ước lượng, nhưng không ít hơn 8 // 2
+        self.assertEqual(plan.max_ocr_workers, 4)
+        self.assertEqual(plan.omp_thread_limit, 1)
+
+    def test_few_devices_use_the_free_cores(self):
+        plan = FixedGovernor(8).plan(1)
+        self.assertEqual(plan.max_ocr_workers, 6)
+
+    def test_ocr_workers_never_exceed_available_cores(self):
+        plan = FixedGovernor(2).plan(1)
+        self.assertEqual(plan.max_ocr_workers, 1)
+        self.assertEqual(plan.max_devices, 1)
+
+    def test_measured_cost(self):
+        plan = FixedGovernor(16, measured=0.5).plan(4)
+        # 15 lõi: (15 - 1) / 0.5 = 28 giả lập; 15 - 4 * 0.5 = 13 OCR
+        self.assertEqual(plan.max_devices, 28)
+        self.assertEqual(plan.max_ocr_workers, 13)
+        self.assertTrue(plan.measured)
+
+    def test_max_ocr_jobs_caps_workers_and_splits_threads(self):
+        plan = FixedGovernor(16, measured=0.5, max_ocr_jobs=4).plan(4)
+        self.assertEqual(plan.max_ocr_workers, 4)
+        self.assertEqual(plan.omp_thread_limit, 3)
+
+    def test_apply_sets_limit_and_omp_threads(self):
+        governor = FixedGovernor(8)
+        previous = os.environ.get('OMP_THREAD_LIMIT')
+        try:
+            governor.apply(governor.plan(6))
+            self.assertEqual(governor.limit, 4)
+            self.assertEqual(os.environ['OMP_THREAD_LIMIT'], '1')
+        finally:
+            if previous is None:
+                os.environ.pop('OMP_THREAD_LIMIT', None)
+            else:
+                os.environ['OMP_THREAD_LIMIT'] = previous
+
+
+class ResourceModeTest(unittest.TestCase):
+    def test_modes(self):
+        self.assertEqual(resource_mode(SimpleNamespace()), 'advisory')
+        self.assertEqual(resource_mode(SimpleNamespace(resource_governor=True)), 'advisory')
+        self.assertEqual(resource_mode(SimpleNamespace(resource_governor=False)), 'off')
+        self.assertEqual(resource_mode(SimpleNamespace(resource_governor='Enforce')), 'enforce')
+        self.assertEqual(resource_mode(SimpleNamespace(resource_governor='bogus')), 'advisory')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,129 @@
+# tests/test_result_sink.py
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from models.governor import Governor
+from models.governor_store import MISSING, GovernorStore
+from scanner.checkpoint_journal import OffsetSheet
+from scanner.chunk_scheduler import ChunkScheduler
+from scanner.delta_report import ScanTable
+from scanner.excel_manager import ExcelManager
+from scanner.governor_scanner import GovernorScanner
+from scanner.result_sink import CsvSink
+from utils.config_manager import DEFAULT_CONFIG, Config
+
+
+def scan_data(gov_id, power, kill_points, refreshed=True):
+    return {'id': gov_id, 'name': f'gov{gov_id}', 'power': power, 'kill_points': kill_points,
+            'alliance': 'AAA', 'refreshed': refreshed}
+
+
+class GovernorStorePutTest(unittest.TestCase):
+    def test_put_keeps_one_governor_per_row(self):
+        store = GovernorStore(capacity=1)
+        store.put(3, Governor('c', '3', power=300), rank=3)
+        store.put(1, Governor('a', '1', power=100, kill_points=5), rank=1)
+        # Ghi lại dòng 1: thay bản cũ, chỉ số không có trong bản mới là MISSING
+        store.put(1, Governor('a', '1', power=110, kill_points=None), rank=1)
+
+        self.assertEqual(len(store), 2)
+        self.assertEqual([(row, store.value(index, 'power')) for row, index in store.sheet_rows()],
+                         [(1, 110), (3, 300)])
+        self.assertEqual(store.column('kill_points').tolist()[store.sheet_rows()[0][1]], MISSING)
+
+    def test_appended_governors_have_no_sheet_rows(self):
+        store = GovernorStore()
+        store.append(Governor('a', '1'))
+        self.assertEqual(store.sheet_rows(), [])
+
+
+class SinkGovernorsTest(unittest.TestCase):
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.scanner = GovernorScanner(None, Config.from_dict(DEFAULT_CONFIG))
+        self.scanner.set_scan_option(2)
+
+    def tearDown(self):
+        shutil.rmtree(self.dir)
+
+    def sink(self, refreshed=False):
+        return CsvSink(os.path.join(self.dir, 'scan.csv'), 2, refreshed=refreshed)
+
+    def test_report_fills_the_sink_store(self):
+        sink = self.sink()
+        self.scanner.report_governor(sink, 0, 0, scan_data('1001', '5,000', '70'))
+        self.scanner.report_governor(sink, 1, 0, scan_data('1002', '4,000', ''))
+        sink.close()
+
+        rows = list(ExcelManager().governor_rows(sink.governors, 2))
+        self.assertEqual(rows, [
+            (1, ['gov1001', 1001, 5000, 70]),
+            (2, ['gov1002', 1002, 4000, ""]),
+        ])
+        # Cùng các dòng như file CSV ghi từng ô
+        self.assertEqual(sink.read_rows(), rows)
+        self.assertEqual(sink.governors.value(1, 'rank'), 2)
+
+    def test_resumed_rows_keep_their_offset(self):
+        sink = self.sink()
+        self.scanner.rank_base = 101
+        self.scanner.report_governor(sink, 0, 0, scan_data('1001', '5000', '70'))
+        # Quét tiếp từ hạng 103: dòng 1 của lần quét tiếp là dòng 3 của file
+        self.scanner.rank_base = 103
+        self.scanner.report_governor(OffsetSheet(sink, 2), 0, 0, scan_data('1003', '3000', '30'))
+        sink.close()
+
+        rows = sink.governors.sheet_rows()
+        self.assertEqual([row for row, _ in rows], [1, 3])
+        self.assertEqual([sink.governors.value(index, 'rank') for _, index in rows], [101, 103])
+
+    def test_refreshed_column(self):
+        sink = self.sink(refreshed=True)
+        self.scanner.refreshed_column = ExcelManager().refreshed_column(2)
+        self.scanner.report_governor(sink, 0, 0, scan_data('1001', '5000', '70', refreshed=False))
+        sink.close()
+        self.assertEqual(list(ExcelManager().governor_rows(sink.governors, 2, True)),
+                         [(1, ['gov1001', 1001, 5000, 70, 'No'])])
+
+    def test_export_reads_the_store(self):
+        sink = self.sink()
+        self.scanner.report_governor(sink, 0, 0, scan_data('1001', '5000', '70'))
+        with mock.patch.object(ExcelManager, 'export_governors', return_value=True) as export, \
+                mock.patch.object(sink, 'read_rows') as read_rows:
+            self.assertTrue(sink.export_excel(os.path.join(self.dir, 'scan.xls')))
+        export.assert_called_once()
+        self.assertIs(export.call_args[0][0], sink.governors)
+        read_rows.assert_not_called()
+        sink.close()
+
+    def test_delta_table_reads_the_store(self):
+        sink = self.sink()
+        self.scanner.report_governor(sink, 0, 0, scan_data('1001', '5000', '70'))
+        self.scanner.report_governor(sink, 1, 0, scan_data('1002', '4000', ''))
+        sink.close()
+
+        table = ScanTable.from_governor_store(sink.governors)
+        self.assertEqual(table.ids.tolist(), [1001, 1002])
+        self.assertEqual(sorted(table.columns), ['kill_points', 'power'])
+        self.assertEqual(table.columns['kill_points'].tolist(), [70, MISSING])
+
+    def test_chunk_rows_line_up_with_ranks(self):
+        scheduler = ChunkScheduler('scan', 'kingdom', 2, 'merged.xls', 11, 10, chunk_size=5)
+        sink = self.sink()
+        # Đoạn hạng 16-20: dòng 1 của đoạn là hạng 16, dòng 6 của file gộp
+        self.scanner.rank_base = 16
+        self.scanner.report_governor(scheduler.chunk_sheet(sink, 16), 0, 0, scan_data('1016', '1600', '16'))
+        sink.close()
+
+        self.assertEqual([row for row, _ in scheduler.governors.sheet_rows()], [6])
+        self.assertEqual([row for row, _ in sink.governors.sheet_rows()], [6])
+        with mock.patch.object(ExcelManager, 'export_governors', return_value=True) as export:
+            scheduler.merge()
+        self.assertIs(export.call_args[0][0], scheduler.governors)
+
+
+if __name__ == '__main__':
+    unittest.main()
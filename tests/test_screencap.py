@@ -0,0 +1,61 @@
+# tests/test_screencap.py
+import struct
+import unittest
+
+import numpy as np
+
+from utils.screencap import (PIXEL_FORMAT_BGRA_8888, PIXEL_FORMAT_RGBA_8888,
+                             decode_raw, parse_raw_header)
+
+
+def raw_screencap(pixels, pixel_format=PIXEL_FORMAT_RGBA_8888, dataspace=True):
+    """Dữ liệu `screencap` raw: header 16 byte (Android 9+) hoặc 12 byte"""
+    height, width = pixels.shape[:2]
+    header = struct.pack('<III', width, height, pixel_format)
+    if dataspace:
+        header += struct.pack('<I', 0)
+    return header + pixels.astype(np.uint8).tobytes()
+
+
+class ParseRawHeaderTest(unittest.TestCase):
+    def setUp(self):
+        self.pixels = np.arange(3 * 2 * 4).reshape(2, 3, 4)
+
+    def test_16_byte_header(self):
+        self.assertEqual(parse_raw_header(raw_screencap(self.pixels)), (3, 2, PIXEL_FORMAT_RGBA_8888, 16))
+
+    def test_12_byte_header(self):
+        data = raw_screencap(self.pixels, dataspace=False)
+        self.assertEqual(parse_raw_header(data), (3, 2, PIXEL_FORMAT_RGBA_8888, 12))
+
+    def test_trailing_bytes_are_rejected(self):
+        # 16 byte header + 4 byte thừa: trước đây bị đọc như header 12 byte, lệch 4 byte
+        self.assertIsNone(parse_raw_header(raw_screencap(self.pixels) + b'\x00' * 4))
+        self.assertIsNone(parse_raw_header(raw_screencap(self.pixels) + b'\x00' * 8))
+
+    def test_truncated_data_is_rejected(self):
+        self.assertIsNone(parse_raw_header(raw_screencap(self.pixels)[:-1]))
+        self.assertIsNone(parse_raw_header(b'\x00' * 8))
+
+
+class DecodeRawTest(unittest.TestCase):
+    def test_rgba_is_converted_to_bgr(self):
+        pixels = np.zeros((2, 3, 4), dtype=np.uint8)
+        pixels[..., 0] = 10  # R
+        pixels[..., 1] = 20  # G
+        pixels[..., 2] = 30  # B
+        for dataspace in (True, False):
+            image = decode_raw(raw_screencap(pixels, dataspace=dataspace))
+            self.assertEqual(image.shape, (2, 3, 3))
+            self.assertEqual(image[0, 0].tolist(), [30, 20, 10])
+
+    def test_bgra_keeps_channel_order(self):
+        pixels = np.zeros((2, 3, 4), dtype=np.uint8)
+        pixels[..., 0] = 30  # B
+        pixels[..., 2] = 10  # R
+        image = decode_raw(raw_screencap(pixels, PIXEL_FORMAT_BGRA_8888))
+        self.assertEqual(image[1, 2].tolist(), [30, 0, 10])
+
+
+if __name__ == '__main__':
+    unittest.main()
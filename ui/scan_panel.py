@@ -51,6 +51,14 @@ class ScanPanel(ttk.Frame):
         self.resume_var = tk.BooleanVar(value=False)
         ttk.Checkbutton(header_frame, text="Resume Scan", variable=self.resume_var).pack(side=tk.LEFT, padx=5)
         
+        # Chia dải hạng cho các thiết bị đã chọn thay vì mỗi thiết bị quét toàn bộ
+        self.shard_var = tk.BooleanVar(value=False)
+        ttk.Checkbutton(header_frame, text="Split Ranks", variable=self.shard_var).pack(side=tk.LEFT, padx=5)
+        
+        # Chỉ mở profile của governor mới hoặc đã đổi power so với lần quét trước
+        self.incremental_var = tk.BooleanVar(value=getattr(self.config, 'incremental_scan', False))
+        ttk.Checkbutton(header_frame, text="Changed Only", variable=self.incremental_var).pack(side=tk.LEFT, padx=5)
+        
         # Scan options frame - Clear and separate section
         options_frame = ttk.LabelFrame(self, text="Scan Options")
         options_frame.grid(row=1, column=0, sticky="ew", padx=10, pady=5)
@@ -62,6 +70,7 @@ class ScanPanel(ttk.Frame):
         ttk.Radiobutton(options_frame, text="Full Scan", variable=self.scan_option_var, value=1).pack(anchor=tk.W, padx=20, pady=5)
         ttk.Radiobutton(options_frame, text="Power + Kill Points Only", variable=self.scan_option_var, value=2).pack(anchor=tk.W, padx=20, pady=5)
         ttk.Radiobutton(options_frame, text="Power + Kill Points + Dead Points", variable=self.scan_option_var, value=3).pack(anchor=tk.W, padx=20, pady=5)
+        ttk.Radiobutton(options_frame, text="Rankings List Only (Rank, Name, Alliance, Power)", variable=self.scan_option_var, value=4).pack(anchor=tk.W, padx=20, pady=5)
         
         # Device selection with more space
         devices_frame = ttk.LabelFrame(self, text="Available Devices")
@@ -195,7 +204,12 @@ class ScanPanel(ttk.Frame):
                         eta = self._format_time(remaining)
                     else:
                         eta = "Calculating..."
-                    
+
+                    # Tốc độ của thiết bị khi quét theo đoạn hạng
+                    throughput = scan_info.get("throughput")
+                    if throughput:
+                        eta = f"{eta} ({throughput['governors_per_minute']:.1f}/min)"
+
                     # Tìm item trong tree để cập nhật
                     if device_id in self.scan_items:
                         item_id = self.scan_items[device_id]
@@ -233,6 +247,7 @@ class ScanPanel(ttk.Frame):
             'kingdom': kingdom,
             'search_range': self.search_range_var.get(),
             'resume_scanning': self.resume_var.get(),
+            'incremental': self.incremental_var.get(),
             'scan_option': self.scan_option_var.get()
         }
         
@@ -245,6 +260,10 @@ class ScanPanel(ttk.Frame):
             if scan_manager:
                 scan_manager.ui_callback = self.handle_scan_event
         
+        if scan_manager and self.shard_var.get() and len(selected_indices) > 1:
+            self._start_sharded_scan(scan_manager, selected_indices, scan_params)
+            return
+        
         success_count = 0
         for idx in selected_indices:
             # Get device ID from our dictionary using the selected index
@@ -282,6 +301,31 @@ class ScanPanel(ttk.Frame):
         else:
             messagebox.showerror("Error", "Failed to start scanning on any device.")
     
+    def _start_sharded_scan(self, scan_manager, selected_indices, scan_params):
+        """Quét một kingdom bằng nhiều thiết bị, mỗi thiết bị một dải hạng"""
+        names = {str(self.device_ids.get(idx)): self.device_listbox.get(idx)
+                 for idx in selected_indices if self.device_ids.get(idx)}
+        
+        scan_id = scan_manager.start_sharded_scan(list(names), scan_params)
+        if not scan_id:
+            messagebox.showerror("Error", "Failed to start scanning on any device.")
+            return
+        
+        started = 0
+        for device_id, scan in scan_manager.get_active_scans().items():
+            if scan["params"].get('sharded_scan') != scan_id:
+                continue
+            params = scan["params"]
+            last_rank = params['start_rank'] + params['search_range'] - 1
+            item_id = self.scan_tree.insert('', 'end', values=(
+                names.get(device_id, device_id),
+                f"{scan_params['kingdom']} #{params['start_rank']}-{last_rank}",
+                "0%", "Calculating..."))
+            self.scan_items[device_id] = item_id
+            started += 1
+        
+        messagebox.showinfo("Scan Started", f"Split ranks across {started} device(s).")
+    
     def handle_scan_event(self, event_type, data):
         """
         Xử lý các sự kiện từ ScanManager
@@ -0,0 +1,310 @@
+# utils/adb_device.py
+import os
+import select
+import socket
+import threading
+
+from utils.screencap import decode_screencap, screencap_command
+
+DEFAULT_ADB_HOST = '127.0.0.1'
+DEFAULT_ADB_PORT = 5037
+
+
+class AdbError(Exception):
+    """Lỗi giao tiếp với adb server"""
+
+
+class AdbCommandSent(AdbError):
+    """Lỗi sau khi lệnh đã gửi tới thiết bị (lệnh có thể đã chạy, không được gửi lại)"""
+
+
+def serial_for_index(index):
+    """Serial adb mặc định của LDPlayer theo index (emulator-5554, emulator-5556, ...)"""
+    return f"emulator-{5554 + 2 * int(index)}"
+
+
+class AdbConnection:
+    def __init__(self, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT, timeout=10.0):
+        """
+        Kết nối socket tới adb server theo giao thức smart socket
+
+        Args:
+            host: Địa chỉ adb server
+            port: Cổng adb server
+            timeout: Timeout của socket (giây)
+        """
+        self.sock = socket.create_connection((host, port), timeout=timeout)
+        # Lệnh ngắn (input tap, ...) cần gửi ngay, không chờ gom gói
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+
+    def send_request(self, request):
+        """Gửi một request ('%04x' + payload) và chờ OKAY"""
+        payload = request.encode('utf-8')
+        self.sock.sendall(f"{len(payload):04x}".encode('ascii') + payload)
+        self._read_status()
+
+    def _read_status(self):
+        status = self.read_exact(4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            length = int(self.read_exact(4), 16)
+            raise AdbError(self.read_exact(length).decode('utf-8', errors='replace'))
+        raise AdbError(f"Unexpected adb response: {status!r}")
+
+    def read_exact(self, size):
+        """Đọc đúng size byte từ socket"""
+        chunks = []
+        remaining = size
+        while remaining > 0:
+            chunk = self.sock.recv(remaining)
+            if not chunk:
+                raise AdbError("Connection closed by adb server")
+            chunks.append(chunk)
+            remaining -= len(chunk)
+        return b''.join(chunks)
+
+    def read_length_prefixed(self):
+        """Đọc payload có tiền tố độ dài 4 ký tự hex (dùng cho các lệnh host:*)"""
+        length = int(self.read_exact(4), 16)
+        return self.read_exact(length)
+
+    def read_all(self):
+        """Đọc toàn bộ dữ liệu cho đến khi server đóng kết nối"""
+        chunks = []
+        while True:
+            chunk = self.sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b''.join(chunks)
+
+    def write(self, data):
+        self.sock.sendall(data)
+
+    def is_alive(self):
+        """Kiểm tra kết nối chưa bị server đóng (không chặn, không tiêu thụ dữ liệu)"""
+        try:
+            readable, _, _ = select.select([self.sock], [], [], 0)
+            if not readable:
+                return True
+            return self.sock.recv(1, socket.MSG_PEEK) != b''
+        except OSError:
+            return False
+
+    def close(self):
+        try:
+            self.sock.close()
+        except OSError:
+            pass
+
+
+class AdbDevice:
+    def __init__(self, device_id, serial=None, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT):
+        """
+        Thiết bị giao tiếp trực tiếp với adb server qua socket, thay cho ldconsole.exe
+
+        Giữ một phiên `exec:sh` lâu dài cho mỗi giả lập nên mỗi lệnh shell
+        chỉ là một lần ghi/đọc socket, không phải tạo tiến trình mới.
+
+        Args:
+            device_id: Index của giả lập LDPlayer
+            serial: Serial adb (mặc định suy ra từ index)
+            host: Địa chỉ adb server
+            port: Cổng adb server
+        """
+        self.id = str(device_id)
+        self.serial = serial or serial_for_index(device_id)
+        self.host = host
+        self.port = port
+        self._shell_conn = None
+        self._shell_lock = threading.Lock()
+        self._marker_seq = 0
+
+    def _connect(self, service, timeout=10.0):
+        """Mở kết nối mới tới service trên thiết bị (đã chuyển transport)"""
+        conn = AdbConnection(self.host, self.port, timeout)
+        try:
+            conn.send_request(f"host:transport:{self.serial}")
+            conn.send_request(service)
+            return conn
+        except Exception:
+            conn.close()
+            raise
+
+    def is_running(self):
+        """Kiểm tra xem thiết bị có trong danh sách `host:devices` và ở trạng thái 'device'"""
+        conn = None
+        try:
+            conn = AdbConnection(self.host, self.port)
+            conn.send_request("host:devices")
+            devices = conn.read_length_prefixed().decode('utf-8', errors='replace')
+            for line in devices.splitlines():
+                parts = line.split()
+                if len(parts) >= 2 and parts[0] == self.serial:
+                    return parts[1] == 'device'
+            return False
+        except Exception as e:
+            print(f"Error checking device status: {e}")
+            return False
+        finally:
+            if conn:
+                conn.close()
+
+    def _run_in_shell(self, command):
+        """
+        Chạy lệnh trong phiên shell lâu dài và đọc output đến marker kết thúc
+
+        Raises:
+            AdbCommandSent: Lỗi xảy ra sau khi lệnh đã được gửi
+            Exception: Lỗi trước khi gửi lệnh (kết nối, phiên đã đóng)
+        """
+        if self._shell_conn is not None and not self._shell_conn.is_alive():
+            # Phiên bị server đóng từ trước (adb restart, giả lập khởi động lại)
+            self._close_shell()
+        if self._shell_conn is None:
+            self._shell_conn = self._connect("exec:sh", timeout=60.0)
+
+        self._marker_seq += 1
+        marker = f"__ROKSCAN_DONE_{self._marker_seq}__".encode('ascii')
+        script = f"{{ {command} ; }} </dev/null 2>&1; printf '\\n%s\\n' {marker.decode('ascii')}\n"
+        self._shell_conn.write(script.encode('utf-8'))
+
+        try:
+            buffer = b''
+            terminator = b'\n' + marker + b'\n'
+            while terminator not in buffer:
+                chunk = self._shell_conn.sock.recv(65536)
+                if not chunk:
+                    raise AdbError("Shell session closed")
+                buffer += chunk
+            return buffer[:buffer.index(terminator)].decode('utf-8', errors='replace')
+        except Exception as e:
+            raise AdbCommandSent(str(e)) from e
+
+    def shell(self, command):
+        """
+        Thực thi lệnh trên thiết bị
+
+        Args:
+            command: Lệnh cần thực thi
+
+        Returns:
+            str: Kết quả lệnh
+        """
+        with self._shell_lock:
+            for attempt in range(2):
+                try:
+                    return self._run_in_shell(command)
+                except AdbCommandSent as e:
+                    # Lệnh có thể đã chạy (timeout khi đọc): gửi lại sẽ tap/swipe hai lần
+                    self._close_shell()
+                    print(f"Error executing command: {e}")
+                    return ""
+                except Exception as e:
+                    # Lỗi trước khi gửi lệnh: mở lại phiên shell và thử thêm một lần
+                    self._close_shell()
+                    if attempt == 1:
+                        print(f"Error executing command: {e}")
+            return ""
+
+    def exec_out(self, command):
+        """
+        Thực thi lệnh qua service `exec:` (không qua pty) và trả về bytes
+
+        Args:
+            command: Lệnh cần thực thi
+
+        Returns:
+            bytes: Dữ liệu nhị phân từ thiết bị (rỗng nếu lỗi)
+        """
+        conn = None
+        try:
+            conn = self._connect(f"exec:{command}")
+            return conn.read_all()
+        except Exception as e:
+            print(f"Error executing exec-out command: {e}")
+            return b""
+        finally:
+            if conn:
+                conn.close()
+
+    def capture_frame(self, capture_format='png'):
+        """
+        Chụp màn hình trực tiếp vào bộ nhớ
+
+        Args:
+            capture_format: 'png' hoặc 'raw'
+
+        Returns:
+            numpy.ndarray: Ảnh BGR hoặc None nếu thất bại
+        """
+        return decode_screencap(self.exec_out(screencap_command(capture_format)), capture_format)
+
+    def screencap(self, output_file):
+        """
+        Chụp màn hình và lưu PNG vào output_file
+
+        Args:
+            output_file: Đường dẫn file đầu ra
+
+        Returns:
+            bool: True nếu thành công, False nếu thất bại
+        """
+        data = self.exec_out('screencap -p')
+        if len(data) < 100:
+            print(f"Screenshot data too small from device {self.id}")
+            return False
+
+        try:
+            output_dir = os.path.dirname(output_file)
+            if output_dir and not os.path.exists(output_dir):
+                os.makedirs(output_dir)
+            with open(output_file, 'wb') as f:
+                f.write(data)
+            return True
+        except Exception as e:
+            print(f"Error saving screenshot: {e}")
+            return False
+
+    def _close_shell(self):
+        if self._shell_conn is not None:
+            self._shell_conn.close()
+            self._shell_conn = None
+
+    def close(self):
+        """Đóng phiên shell lâu dài"""
+        with self._shell_lock:
+            self._close_shell()
+
+
+class AdbDevicePool:
+    def __init__(self, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT):
+        """
+        Quản lý một AdbDevice (và phiên shell của nó) cho mỗi giả lập
+
+        Args:
+            host: Địa chỉ adb server
+            port: Cổng adb server
+        """
+        self.host = host
+        self.port = port
+        self._devices = {}
+        self._lock = threading.Lock()
+
+    def get(self, device_id, serial=None):
+        """Lấy thiết bị đã có trong pool hoặc tạo mới"""
+        device_id = str(device_id)
+        with self._lock:
+            device = self._devices.get(device_id)
+            if device is None:
+                device = AdbDevice(device_id, serial, self.host, self.port)
+                self._devices[device_id] = device
+            return device
+
+    def close_all(self):
+        """Đóng tất cả kết nối trong pool"""
+        with self._lock:
+            for device in self._devices.values():
+                device.close()
+            self._devices.clear()
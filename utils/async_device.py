@@ -0,0 +1,139 @@
+# utils/async_device.py
+import os
+import asyncio
+import subprocess
+
+from utils.adb_device import AdbError, serial_for_index, DEFAULT_ADB_HOST, DEFAULT_ADB_PORT
+
+
+class AsyncAdbDevice:
+    def __init__(self, device_id, serial=None, host=DEFAULT_ADB_HOST, port=DEFAULT_ADB_PORT):
+        """
+        Thiết bị bất đồng bộ nói chuyện với adb server qua asyncio stream
+
+        Mỗi lệnh là một kết nối socket ngắn; hủy task (cancel) sẽ đóng kết nối
+        ngay cả khi lệnh đang chạy.
+
+        Args:
+            device_id: Index của giả lập LDPlayer
+            serial: Serial adb (mặc định suy ra từ index)
+            host: Địa chỉ adb server
+            port: Cổng adb server
+        """
+        self.id = str(device_id)
+        self.serial = serial or serial_for_index(device_id)
+        self.host = host
+        self.port = port
+
+    async def _send_request(self, reader, writer, request):
+        payload = request.encode('utf-8')
+        writer.write(f"{len(payload):04x}".encode('ascii') + payload)
+        await writer.drain()
+        status = await reader.readexactly(4)
+        if status == b'OKAY':
+            return
+        if status == b'FAIL':
+            length = int(await reader.readexactly(4), 16)
+            raise AdbError((await reader.readexactly(length)).decode('utf-8', errors='replace'))
+        raise AdbError(f"Unexpected adb response: {status!r}")
+
+    async def _run_service(self, service):
+        """Mở service trên thiết bị và đọc toàn bộ output"""
+        reader, writer = await asyncio.open_connection(self.host, self.port)
+        try:
+            await self._send_request(reader, writer, f"host:transport:{self.serial}")
+            await self._send_request(reader, writer, service)
+            return await reader.read()
+        finally:
+            writer.close()
+
+    async def shell(self, command):
+        """
+        Thực thi lệnh trên thiết bị
+
+        Returns:
+            str: Kết quả lệnh ("" nếu lỗi)
+        """
+        try:
+            output = await self._run_service(f"shell:{command}")
+            return output.decode('utf-8', errors='replace')
+        except (OSError, AdbError, asyncio.IncompleteReadError) as e:
+            print(f"Error executing command: {e}")
+            return ""
+
+    async def exec_out(self, command):
+        """
+        Thực thi lệnh qua service `exec:` và trả về bytes
+
+        Returns:
+            bytes: Dữ liệu nhị phân ("" nếu lỗi)
+        """
+        try:
+            return await self._run_service(f"exec:{command}")
+        except (OSError, AdbError, asyncio.IncompleteReadError) as e:
+            print(f"Error executing exec-out command: {e}")
+            return b""
+
+
+class AsyncLdconsoleDevice:
+    def __init__(self, device_id, ldconsole):
+        """
+        Thiết bị bất đồng bộ gọi ldconsole.exe qua asyncio subprocess
+
+        Hủy task sẽ kill tiến trình ldconsole đang chạy.
+
+        Args:
+            device_id: Index của giả lập LDPlayer
+            ldconsole: Đường dẫn đến ldconsole.exe
+        """
+        self.id = str(device_id)
+        self.ldconsole = ldconsole
+
+    async def _run(self, command):
+        process = await asyncio.create_subprocess_exec(
+            self.ldconsole, 'adb', '--index', self.id, '--command', command,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            creationflags=getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+        )
+        try:
+            stdout, _ = await process.communicate()
+            return stdout
+        except asyncio.CancelledError:
+            process.kill()
+            raise
+
+    async def shell(self, command):
+        try:
+            return (await self._run(command)).decode('utf-8', errors='replace')
+        except OSError as e:
+            print(f"Error executing command: {e}")
+            return ""
+
+    async def exec_out(self, command):
+        try:
+            return await self._run(f'exec-out {command}')
+        except OSError as e:
+            print(f"Error executing exec-out command: {e}")
+            return b""
+
+
+def async_device_for(device):
+    """
+    Tạo thiết bị bất đồng bộ tương ứng với thiết bị đồng bộ
+
+    Args:
+        device: AdbDevice hoặc thiết bị ldconsole (có ldconsole/ldplayer_path)
+
+    Returns:
+        AsyncAdbDevice | AsyncLdconsoleDevice: Thiết bị bất đồng bộ, hoặc None nếu không hỗ trợ
+    """
+    if hasattr(device, 'serial') and hasattr(device, 'port'):
+        return AsyncAdbDevice(device.id, device.serial, device.host, device.port)
+
+    ldconsole = getattr(device, 'ldconsole', None)
+    if ldconsole is None and getattr(device, 'ldplayer_path', None):
+        ldconsole = os.path.join(device.ldplayer_path, 'ldconsole.exe')
+    if ldconsole:
+        return AsyncLdconsoleDevice(device.id, ldconsole)
+    return None
@@ -1,30 +1,272 @@
 # utils/clipboard_manager.py
+import re
+import time
+import queue
 import threading
 import tkinter as tk
-import time
+from concurrent.futures import Future
 
-class ClipboardManager:
+# getPrimaryClip(callingPackage[, userId]); tham số thừa bị bỏ qua trên Android cũ
+CLIPBOARD_COMMAND = "service call clipboard 2 s16 com.android.shell i32 0"
+
+_PARCEL_WORD = re.compile(r"\b([0-9a-fA-F]{8})\b")
+_MIME_TYPE = re.compile(r"^[a-z]+/[a-z0-9.+*-]+$")
+
+
+def parse_clipboard_parcel(output):
+    """
+    Lấy text clipboard từ output của `service call clipboard`
+
+    Output là dump của Parcel (các word 32 bit little-endian); các chuỗi
+    String16 được tách ra theo độ dài, bỏ qua label và mime type, chuỗi
+    cuối cùng là nội dung clip.
+
+    Args:
+        output: Output dạng "Result: Parcel(0x00000000: 00000000 00000001 ...)"
+
+    Returns:
+        str: Nội dung clipboard, "" nếu clipboard trống, None nếu không đọc được
+    """
+    if not output or 'Parcel' not in output:
+        return None
+
+    words = []
+    for line in output.splitlines():
+        # Bỏ địa chỉ "0x00000000:" và phần ASCII trong dấu nháy ở cuối dòng
+        line = line.split(':', 1)[-1].split("'", 1)[0]
+        words.extend(_PARCEL_WORD.findall(line))
+    if not words:
+        return None
+
+    data = b''.join(int(word, 16).to_bytes(4, 'little') for word in words)
+    # Word đầu là mã exception, khác 0 nghĩa là bị từ chối (ví dụ không có quyền)
+    if int.from_bytes(data[:4], 'little', signed=True) != 0:
+        return None
+    if len(data) < 8 or int.from_bytes(data[4:8], 'little') == 0:
+        return ""
+
+    strings = []
+    offset = 8
+    while offset + 4 <= len(data):
+        length = int.from_bytes(data[offset:offset + 4], 'little', signed=True)
+        end = offset + 4 + 2 * length
+        if 0 < length < 4096 and end + 2 <= len(data) and data[end:end + 2] == b'\x00\x00':
+            try:
+                text = data[offset + 4:end].decode('utf-16-le')
+            except UnicodeDecodeError:
+                text = None
+            if text and text.isprintable():
+                strings.append(text)
+                # String16 được đệm đến bội số của 4 byte
+                offset = (end + 2 + 3) & ~3
+                continue
+        offset += 4
+
+    contents = [text for text in strings if not _MIME_TYPE.match(text)]
+    return contents[-1] if contents else ""
+
+
+class ClipboardBroker:
     def __init__(self):
+        """
+        Một luồng thường trú giữ một Tk root duy nhất để đọc clipboard của máy host
+
+        Tk chỉ được dùng trong luồng này; các luồng khác gửi yêu cầu qua hàng
+        đợi thay vì tạo/hủy Tk() mỗi lần.
+        """
+        self._requests = queue.Queue()
+        self._thread = None
+        self._start_lock = threading.Lock()
+        # Giữ trong suốt thao tác copy + đọc vì clipboard host dùng chung cho mọi giả lập
         self.lock = threading.RLock()
-        self._clipboard_data = {}
-    
-    def get_clipboard(self, device_id):
-        """Get clipboard content for specific device with retry mechanism."""
-        with self.lock:
-            retry_attempts = 5
-            for attempt in range(retry_attempts):
-                try:
+
+    def _ensure_started(self):
+        with self._start_lock:
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="clipboard-broker", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        root = None
+        while True:
+            future = self._requests.get()
+            if future is None:
+                break
+            try:
+                if root is None:
                     root = tk.Tk()
-                    root.withdraw()
-                    data = root.clipboard_get()
+                    root.withdraw()  # Ẩn cửa sổ Tkinter
+                root.update()
+                future.set_result(root.clipboard_get())
+            except tk.TclError:
+                future.set_result(None)
+            except Exception as e:
+                print(f"Lỗi khi truy cập clipboard: {e}")
+                future.set_result(None)
+                try:
                     root.destroy()
-                    
-                    # Store this data for this device
-                    self._clipboard_data[device_id] = data
-                    return data
-                except tk.TclError:
-                    print(f"Device {device_id}: Can't access clipboard. Retrying...")
-                    time.sleep(0.5)
-            
-            # Return last known value for this device or default
-            return self._clipboard_data.get(device_id, "Unknown")
\ No newline at end of file
+                except Exception:
+                    pass
+                root = None
+        if root is not None:
+            root.destroy()
+
+    def get(self, retry_attempts=5, timeout=2.0):
+        """
+        Đọc clipboard của máy host
+
+        Returns:
+            str: Nội dung clipboard hoặc None nếu không đọc được
+        """
+        self._ensure_started()
+        for attempt in range(retry_attempts):
+            future = Future()
+            self._requests.put(future)
+            try:
+                data = future.result(timeout)
+            except Exception:
+                data = None
+            if data is not None:
+                return data
+            print(f"Không thể truy cập clipboard, thử lại lần {attempt+1}/{retry_attempts}...")
+            time.sleep(0.2)
+        return None
+
+    def stop(self):
+        self._requests.put(None)
+
+
+class ClipboardService:
+    def __init__(self, broker=None, timeout=1.5, poll_interval=0.1, max_empty_reads=2):
+        """
+        Đọc clipboard theo từng thiết bị
+
+        Ưu tiên đọc clipboard Android của chính giả lập qua kết nối thiết bị
+        nên các thiết bị chạy song song mà không lẫn dữ liệu. Thiết bị không
+        đọc được (ví dụ Android chặn đọc clipboard từ shell) dùng broker Tk,
+        khi đó copy + đọc được khóa để không lẫn giữa các giả lập.
+
+        Args:
+            broker: ClipboardBroker dùng chung (mặc định tạo mới)
+            timeout: Thời gian chờ tối đa để clipboard thiết bị cập nhật sau khi copy
+            poll_interval: Khoảng cách giữa các lần đọc lại
+            max_empty_reads: Số lần liên tiếp clipboard thiết bị vẫn trống sau
+                khi copy thì coi như thiết bị không hỗ trợ (Android 10+ trả clip
+                rỗng cho shell thay vì báo lỗi)
+        """
+        self.broker = broker or ClipboardBroker()
+        self.timeout = timeout
+        self.poll_interval = poll_interval
+        self.max_empty_reads = max_empty_reads
+        self._device_supported = {}
+        self._empty_reads = {}
+        self._last_values = {}
+        self._lock = threading.Lock()
+
+    def read_device(self, device):
+        """
+        Đọc clipboard Android của thiết bị
+
+        Returns:
+            str: Nội dung clipboard hoặc None nếu thiết bị không hỗ trợ
+        """
+        try:
+            return parse_clipboard_parcel(device.shell(CLIPBOARD_COMMAND))
+        except Exception as e:
+            print(f"Error reading device clipboard: {e}")
+            return None
+
+    def read(self, device, copy=None):
+        """
+        Copy (nếu có) rồi đọc clipboard của thiết bị
+
+        Args:
+            device: Thiết bị có id và shell()
+            copy: Hàm thực hiện thao tác copy trên thiết bị (ví dụ tap vào tên)
+
+        Returns:
+            str: Nội dung clipboard hoặc None nếu không đọc được
+        """
+        device_id = str(getattr(device, 'id', device))
+        with self._lock:
+            supported = self._device_supported.get(device_id)
+            previous = self._last_values.get(device_id)
+
+        if supported is not False and hasattr(device, 'shell'):
+            if copy:
+                copy()
+            deadline = time.time() + self.timeout
+            text = self.read_device(device)
+            if text is not None:
+                # Chờ clipboard đổi khỏi giá trị lần trước (copy có thể chưa xong)
+                while copy and (not text or text == previous) and time.time() < deadline:
+                    time.sleep(self.poll_interval)
+                    text = self.read_device(device) or text
+                if text or not copy:
+                    with self._lock:
+                        self._device_supported[device_id] = True
+                        self._empty_reads[device_id] = 0
+                        self._last_values[device_id] = text
+                    return text or None
+
+                # Đã copy mà clipboard vẫn trống: đọc từ host lần này, lặp lại
+                # nhiều lần thì thôi đọc từ thiết bị
+                with self._lock:
+                    empty_reads = self._empty_reads.get(device_id, 0) + 1
+                    self._empty_reads[device_id] = empty_reads
+                if empty_reads >= self.max_empty_reads:
+                    print(f"Device {device_id}: Android clipboard stays empty after copy, using host clipboard")
+                    with self._lock:
+                        self._device_supported[device_id] = False
+            elif supported is None:
+                print(f"Device {device_id}: Android clipboard not readable, using host clipboard")
+                with self._lock:
+                    self._device_supported[device_id] = False
+
+        # Clipboard host dùng chung cho mọi giả lập: khóa cả thao tác copy lẫn đọc
+        with self.broker.lock:
+            if copy:
+                copy()
+            return self._read_host(device_id)
+
+    def _read_host(self, device_id):
+        text = self.broker.get()
+        if text is not None:
+            with self._lock:
+                self._last_values[device_id] = text
+        return text
+
+
+_service = None
+_service_lock = threading.Lock()
+
+
+def get_clipboard_service():
+    """Lấy ClipboardService dùng chung của tiến trình (tạo ở lần gọi đầu tiên)"""
+    global _service
+    with _service_lock:
+        if _service is None:
+            _service = ClipboardService()
+        return _service
+
+
+class ClipboardManager:
+    def __init__(self, service=None):
+        self.service = service or get_clipboard_service()
+        self._clipboard_data = {}
+
+    def get_clipboard(self, device_id, device=None):
+        """Get clipboard content for specific device (the device's own clipboard when available)."""
+        if device is not None:
+            data = self.service.read(device)
+        else:
+            with self.service.broker.lock:
+                data = self.service.broker.get()
+
+        if data is not None:
+            # Store this data for this device
+            self._clipboard_data[device_id] = data
+            return data
+
+        # Return last known value for this device or default
+        return self._clipboard_data.get(device_id, "Unknown")
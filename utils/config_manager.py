@@ -15,6 +15,28 @@ class Config:
     devices_file: str
     cli_mode: bool = False
     scan_option: int = 1  # Added scan_option with default value of 1 (full scan)
+    capture_mode: str = "file"  # 'file' (screencap + pull) or 'memory' (exec-out, decoded in memory; the threads engine needs device_backend 'adb')
+    capture_format: str = "png"  # 'png' or 'raw' framebuffer (memory mode only)
+    frame_cache_size: int = 4  # decoded screenshots kept per scanner (LRU)
+    batch_navigation: bool = True  # send multi-step navigation as one on-device shell script
+    ocr_backend: str = "auto"  # 'auto' (tesserocr if installed from requirements-optional.txt, else pytesseract), 'tesserocr' or 'pytesseract'
+    batch_ocr: bool = True  # OCR all numeric fields of a screen as one composite image
+    digit_confidence: float = 0.8  # below this the glyph matcher defers to Tesseract
+    device_backend: str = "ldconsole"  # 'ldconsole' or 'adb' (direct adb server socket)
+    adb_host: str = "127.0.0.1"
+    adb_port: int = 5037
+    state_timeout: float = 3.0  # max wait for a recognized screen before giving up
+    ocr_workers: int = 0  # >0 runs OCR in a shared process pool while devices keep navigating
+    scan_engine: str = "threads"  # 'threads' (one thread per device) or 'asyncio' (one event loop)
+    rank_chunk_size: int = 20  # split-rank scans hand out chunks of this many ranks; 0 = fixed ranges
+    resource_governor: str = "advisory"  # 'advisory' (cap OCR, warn on devices), 'enforce' (also refuse devices once emulator CPU is measured) or 'off'
+    max_ocr_jobs: int = 0  # fixed cap on concurrent OCR jobs; 0 = follow measured CPU usage
+    checkpoint_journal: bool = True  # fsync'd per-governor journal in data/scan_journals for exact resume
+    snapshot_store: bool = True  # keep every scan in data/snapshots.sqlite3 (or snapshot_db) for history queries
+    result_sink: str = "csv"  # 'csv' or 'jsonl' stream rows during the scan, Excel exported once at the end; 'excel' = old periodic saves
+    incremental_scan: bool = False  # open profiles only for new governors or changed list-screen power
+    validate_records: bool = True  # cross-check fields (KP vs tier kills, no decreases) and re-OCR failures
+    id_dedupe: bool = True  # read the ID as soon as a profile opens; repeats re-sync the list and are retried
     
     @classmethod
     def from_dict(cls, config_dict):
@@ -26,7 +48,29 @@ class Config:
             screenshots_dir=config_dict.get('screenshots_dir', 'screenshots'),
             devices_file=config_dict.get('devices_file', 'config/devices.json'),
             cli_mode=config_dict.get('cli_mode', False),
-            scan_option=config_dict.get('scan_option', 1)  # Add scan_option to the constructor
+            scan_option=config_dict.get('scan_option', 1),  # Add scan_option to the constructor
+            capture_mode=config_dict.get('capture_mode', 'file'),
+            capture_format=config_dict.get('capture_format', 'png'),
+            frame_cache_size=config_dict.get('frame_cache_size', 4),
+            batch_navigation=config_dict.get('batch_navigation', True),
+            ocr_backend=config_dict.get('ocr_backend', 'auto'),
+            batch_ocr=config_dict.get('batch_ocr', True),
+            digit_confidence=config_dict.get('digit_confidence', 0.8),
+            device_backend=config_dict.get('device_backend', 'ldconsole'),
+            adb_host=config_dict.get('adb_host', '127.0.0.1'),
+            adb_port=config_dict.get('adb_port', 5037),
+            ocr_workers=config_dict.get('ocr_workers', 0),
+            state_timeout=config_dict.get('state_timeout', 3.0),
+            scan_engine=config_dict.get('scan_engine', 'threads'),
+            rank_chunk_size=config_dict.get('rank_chunk_size', 20),
+            resource_governor=config_dict.get('resource_governor', "advisory"),
+            max_ocr_jobs=config_dict.get('max_ocr_jobs', 0),
+            checkpoint_journal=config_dict.get('checkpoint_journal', True),
+            result_sink=config_dict.get('result_sink', 'csv'),
+            snapshot_store=config_dict.get('snapshot_store', True),
+            incremental_scan=config_dict.get('incremental_scan', False),
+            validate_records=config_dict.get('validate_records', True),
+            id_dedupe=config_dict.get('id_dedupe', True)
         )
 
 # Default configuration
@@ -39,6 +83,28 @@ DEFAULT_CONFIG = {
     "devices_file": "devices.json",
     "cli_mode": False,
     "scan_option": 1,  # Added scan_option to default config
+    "capture_mode": "file",  # "memory" streams exec-out screencap straight into NumPy (threads engine: device_backend "adb" only)
+    "capture_format": "png",  # "raw" skips PNG encode/decode (memory mode only)
+    "frame_cache_size": 4,  # decoded screenshots kept per scanner (LRU)
+    "batch_navigation": True,  # navigation macros run as one shell script per capture
+    "ocr_backend": "auto",  # resident tesserocr engine per worker, pytesseract as fallback
+    "batch_ocr": True,  # one composite OCR call per screen, per-field fallback on mismatch
+    "digit_confidence": 0.8,  # glyph atlas at data/digit_atlas.npz, Tesseract below this score
+    "device_backend": "ldconsole",  # "adb" talks to the adb server socket with pooled connections
+    "adb_host": "127.0.0.1",
+    "adb_port": 5037,
+    "ocr_workers": 0,  # OCR process pool size; 0 keeps OCR inline in each device thread
+    "state_timeout": 3.0,  # screen templates in data/screen_templates, fixed sleeps when missing
+    "scan_engine": "threads",  # "asyncio" drives all devices from one event loop with cancellable waits
+    "rank_chunk_size": 20,  # idle devices take the next chunk; stalled chunks move after chunk_stall_timeout
+    "resource_governor": "advisory",  # OCR capped by the core plan; 'enforce' also refuses devices over it (needs psutil)
+    "max_ocr_jobs": 0,
+    "checkpoint_journal": True,  # "Resume Scan" continues the latest unfinished journal of the kingdom
+    "snapshot_store": True,  # WAL SQLite, snapshot_batch_size rows per transaction
+    "result_sink": "csv",  # rows appended next to the .xls (fsync every sink_fsync_interval seconds)
+    "incremental_scan": False,  # unchanged governors carried forward from the latest snapshot (refreshed=0)
+    "validate_records": True,  # re-OCR fields that break KP/tier-kill or no-decrease checks from the captured frame
+    "id_dedupe": True,  # skipped ranks get one retry pass at the end of the scan (or chunk)
     "version": "10.1",
     "debug": True
 }
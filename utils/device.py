@@ -2,6 +2,8 @@ import os
 import time
 import subprocess
 
+from utils.screencap import decode_screencap, screencap_command
+
 class Device:
     def __init__(self, device_id, ldplayer_path):
         """
@@ -57,6 +59,45 @@ class Device:
             print(f"Error executing command: {e}")
             return ""
     
+    def _get_creation_flags(self):
+        """Trả về creationflags phù hợp (CREATE_NO_WINDOW chỉ có trên Windows)"""
+        return getattr(subprocess, 'CREATE_NO_WINDOW', 0)
+    
+    def exec_out(self, command):
+        """
+        Thực thi lệnh qua `adb exec-out` và trả về stdout dạng bytes
+        
+        Args:
+            command: Lệnh cần thực thi
+            
+        Returns:
+            bytes: Dữ liệu nhị phân từ thiết bị (rỗng nếu lỗi)
+        """
+        try:
+            full_command = [self.ldconsole, 'adb', '--index', self.id, '--command', f'exec-out {command}']
+            result = subprocess.run(
+                full_command,
+                capture_output=True,
+                creationflags=self._get_creation_flags()
+            )
+            return result.stdout
+        except Exception as e:
+            print(f"Error executing exec-out command: {e}")
+            return b""
+    
+    def capture_frame(self, capture_format='png'):
+        """
+        Chụp màn hình trực tiếp vào bộ nhớ, không ghi file lên sdcard hay máy tính
+        
+        Args:
+            capture_format: 'png' (nén trên thiết bị) hoặc 'raw' (RGBA, không nén)
+        
+        Returns:
+            numpy.ndarray: Ảnh BGR hoặc None nếu thất bại
+        """
+        data = self.exec_out(screencap_command(capture_format))
+        return decode_screencap(data, capture_format)
+    
     def capture_screenshot(self, output_file):
         """
         Chụp màn hình thiết bị
@@ -0,0 +1,230 @@
+# utils/digit_recognizer.py
+import os
+import sys
+import argparse
+
+import cv2
+import numpy as np
+
+# Kích thước chuẩn hóa của một ký tự (rộng, cao)
+GLYPH_SIZE = (12, 20)
+DIGITS = "0123456789"
+
+
+def _foreground(binary):
+    """Đưa ảnh nhị phân về dạng chữ trắng (255) trên nền đen (0)"""
+    if binary.ndim == 3:
+        binary = cv2.cvtColor(binary, cv2.COLOR_BGR2GRAY)
+    border = np.concatenate([binary[0, :], binary[-1, :], binary[:, 0], binary[:, -1]])
+    if np.median(border) >= 128:
+        binary = 255 - binary
+    return binary
+
+
+def segment_digits(binary, min_height_ratio=0.55):
+    """
+    Tách các ký tự số bằng connected components
+
+    Các thành phần quá thấp (dấu phẩy, nhiễu) bị bỏ qua; các thành phần
+    chồng nhau theo chiều ngang (ký tự bị gãy) được gộp lại.
+
+    Args:
+        binary: Ảnh nhị phân của một trường số
+        min_height_ratio: Chiều cao tối thiểu so với ký tự cao nhất
+
+    Returns:
+        list: Danh sách ảnh ký tự (chữ trắng trên nền đen), theo thứ tự trái sang phải
+    """
+    image = _foreground(binary)
+    count, _, stats, _ = cv2.connectedComponentsWithStats(image, connectivity=8)
+    if count <= 1:
+        return []
+
+    boxes = [tuple(stats[idx, :4]) for idx in range(1, count) if stats[idx, cv2.CC_STAT_AREA] >= 4]
+    if not boxes:
+        return []
+
+    max_height = max(box[3] for box in boxes)
+    boxes = sorted(box for box in boxes if box[3] >= max_height * min_height_ratio)
+
+    merged = []
+    for x, y, w, h in boxes:
+        if merged:
+            mx, my, mw, mh = merged[-1]
+            overlap = min(mx + mw, x + w) - max(mx, x)
+            if overlap > 0.5 * min(mw, w):
+                nx, ny = min(mx, x), min(my, y)
+                merged[-1] = (nx, ny, max(mx + mw, x + w) - nx, max(my + mh, y + h) - ny)
+                continue
+        merged.append((x, y, w, h))
+
+    # Độ rộng một ký tự ước lượng từ các thành phần không dính nhau
+    single_widths = [w for _, _, w, h in merged if w <= h]
+    unit = float(np.median(single_widths)) if single_widths else max_height * 0.7
+
+    glyphs = []
+    for x, y, w, h in merged:
+        glyphs.extend(_split_touching(image[y:y+h, x:x+w], unit))
+    return glyphs
+
+
+def _split_touching(glyph, unit):
+    """Tách thành phần quá rộng (nhiều ký tự dính nhau) tại các cột ít điểm ảnh nhất"""
+    w = glyph.shape[1]
+    parts = int(round(w / unit))
+    if parts <= 1:
+        return [glyph]
+
+    projection = (glyph > 0).sum(axis=0)
+    step = w / parts
+    cuts = [0]
+    for k in range(1, parts):
+        lo = int(k * step - step / 3)
+        hi = int(k * step + step / 3) + 1
+        cuts.append(lo + int(np.argmin(projection[lo:hi])))
+    cuts.append(w)
+    return [glyph[:, a:b] for a, b in zip(cuts, cuts[1:]) if b - a > unit / 4]
+
+
+def glyph_vector(glyph):
+    """Chuẩn hóa ảnh ký tự thành vector (trung bình 0, chuẩn 1)"""
+    resized = cv2.resize(glyph, GLYPH_SIZE, interpolation=cv2.INTER_AREA).astype(np.float32).ravel()
+    resized -= resized.mean()
+    norm = np.linalg.norm(resized)
+    return resized / norm if norm > 0 else resized
+
+
+class DigitRecognizer:
+    def __init__(self, labels=None, prototypes=None):
+        """
+        Nhận diện số theo mẫu cho font cố định của game
+
+        Mỗi ký tự được so khớp (tương quan chuẩn hóa) với bảng mẫu học từ
+        các ảnh đã gán nhãn; độ tin cậy là điểm khớp thấp nhất trong chuỗi.
+
+        Args:
+            labels: Danh sách nhãn của các mẫu
+            prototypes: Ma trận (số mẫu, số chiều) các vector mẫu
+        """
+        self.labels = list(labels) if labels is not None else []
+        self.prototypes = prototypes
+
+    @property
+    def is_ready(self):
+        return self.prototypes is not None and len(self.labels) > 0
+
+    def fit(self, samples):
+        """
+        Học bảng mẫu từ các ảnh trường số đã gán nhãn
+
+        Args:
+            samples: Danh sách (ảnh nhị phân, text) với text là giá trị đúng
+
+        Returns:
+            int: Số mẫu hợp lệ (số ký tự tách được khớp số chữ số)
+        """
+        vectors = {}
+        used = 0
+        for image, text in samples:
+            digits = [ch for ch in str(text) if ch in DIGITS]
+            glyphs = segment_digits(image)
+            if not digits or len(glyphs) != len(digits):
+                continue
+            used += 1
+            for glyph, digit in zip(glyphs, digits):
+                vectors.setdefault(digit, []).append(glyph_vector(glyph))
+
+        labels = sorted(vectors)
+        prototypes = []
+        for label in labels:
+            mean = np.mean(vectors[label], axis=0)
+            norm = np.linalg.norm(mean)
+            prototypes.append(mean / norm if norm > 0 else mean)
+
+        self.labels = labels
+        self.prototypes = np.array(prototypes, dtype=np.float32) if prototypes else None
+        return used
+
+    def recognize(self, binary):
+        """
+        Nhận diện số trong ảnh nhị phân của một trường
+
+        Args:
+            binary: Ảnh đã tiền xử lý
+
+        Returns:
+            tuple: (text, độ tin cậy 0..1); ('', 0.0) nếu không nhận diện được
+        """
+        if not self.is_ready or binary is None or binary.size == 0:
+            return "", 0.0
+
+        glyphs = segment_digits(binary)
+        if not glyphs:
+            return "", 0.0
+
+        vectors = np.stack([glyph_vector(glyph) for glyph in glyphs])
+        scores = vectors @ self.prototypes.T
+        best = scores.argmax(axis=1)
+        text = "".join(self.labels[idx] for idx in best)
+        confidence = float(scores[np.arange(len(best)), best].min())
+        return text, max(confidence, 0.0)
+
+    def save(self, path):
+        """Lưu bảng mẫu ra file .npz"""
+        np.savez_compressed(path, labels=np.array(self.labels), prototypes=self.prototypes)
+
+    @classmethod
+    def load(cls, path):
+        """
+        Nạp bảng mẫu từ file .npz
+
+        Returns:
+            DigitRecognizer: Bộ nhận diện, hoặc None nếu không nạp được
+        """
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            data = np.load(path)
+            return cls([str(label) for label in data['labels']], data['prototypes'])
+        except Exception as e:
+            print(f"Error loading digit atlas {path}: {e}")
+            return None
+
+
+def load_samples(samples_dir):
+    """
+    Đọc các ảnh mẫu tên dạng '<giá trị>_<bất kỳ>.png' trong thư mục
+
+    Returns:
+        list: Danh sách (ảnh, text)
+    """
+    samples = []
+    for filename in sorted(os.listdir(samples_dir)):
+        if not filename.lower().endswith('.png'):
+            continue
+        label = filename.split('_', 1)[0]
+        image = cv2.imread(os.path.join(samples_dir, filename), cv2.IMREAD_GRAYSCALE)
+        if image is not None and label.isdigit():
+            samples.append((image, label))
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Build the digit glyph atlas from labeled crops')
+    parser.add_argument('samples_dir', help='Directory of <value>_<id>.png crops')
+    parser.add_argument('--out', default=os.path.join('data', 'digit_atlas.npz'), help='Output atlas path')
+    args = parser.parse_args()
+
+    samples = load_samples(args.samples_dir)
+    recognizer = DigitRecognizer()
+    used = recognizer.fit(samples)
+    if not recognizer.is_ready:
+        print("No usable samples found")
+        sys.exit(1)
+
+    recognizer.save(args.out)
+    print(f"Built atlas from {used}/{len(samples)} samples, labels: {''.join(recognizer.labels)} -> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+# utils/frame.py
+import os
+import threading
+from collections import OrderedDict
+
+import cv2
+import numpy as np
+
+
+class Frame:
+    def __init__(self, image, source=None):
+        """
+        Ảnh chụp màn hình đã giải mã một lần, dùng chung cho mọi ROI
+
+        Ảnh xám của toàn khung hình chỉ được tính ở lần dùng đầu tiên; các
+        ROI trả về là view (không sao chép) trên ảnh BGR hoặc ảnh xám.
+
+        Args:
+            image: Ảnh BGR (numpy.ndarray)
+            source: Đường dẫn file gốc (nếu có)
+        """
+        self.image = image
+        self.source = source
+        self._gray = None
+
+    def __getstate__(self):
+        # Không gửi ảnh xám khi chuyển Frame sang tiến trình khác, bên nhận tự tính lại
+        state = self.__dict__.copy()
+        state['_gray'] = None
+        return state
+
+    @classmethod
+    def from_file(cls, filename):
+        """Giải mã file ảnh thành Frame, trả về None nếu không đọc được"""
+        if filename is None or not os.path.exists(filename):
+            print(f"Image file does not exist: {filename}")
+            return None
+
+        image = cv2.imread(filename)
+        if image is None:
+            print(f"Failed to load image: {filename}")
+            return None
+        return cls(image, filename)
+
+    @property
+    def shape(self):
+        return self.image.shape
+
+    @property
+    def gray(self):
+        """Ảnh xám của toàn khung hình (tính một lần)"""
+        if self._gray is None:
+            if self.image.ndim == 2:
+                self._gray = self.image
+            else:
+                self._gray = cv2.cvtColor(self.image, cv2.COLOR_BGR2GRAY)
+        return self._gray
+
+    def roi(self, roi, gray=True):
+        """
+        Cắt vùng quan tâm dưới dạng view
+
+        Args:
+            roi: Tuple (x, y, w, h)
+            gray: True để cắt trên ảnh xám, False để cắt trên ảnh BGR
+
+        Returns:
+            numpy.ndarray: View của vùng ảnh hoặc None nếu ROI không hợp lệ
+        """
+        x, y, w, h = roi
+        if x < 0 or y < 0 or w <= 0 or h <= 0:
+            print(f"Invalid ROI: {roi}")
+            return None
+
+        height, width = self.image.shape[:2]
+        if x >= width or y >= height:
+            print(f"ROI outside image bounds: {roi}, image size: {width}x{height}")
+            return None
+
+        # Điều chỉnh roi nếu nó vượt quá ranh giới ảnh
+        w = min(w, width - x)
+        h = min(h, height - y)
+
+        plane = self.gray if gray else self.image
+        return plane[y:y+h, x:x+w]
+
+
+class FrameCache:
+    def __init__(self, maxsize=4):
+        """
+        Bộ nhớ đệm LRU các Frame theo đường dẫn file
+
+        Giới hạn số khung hình giữ lại để bộ nhớ không tăng theo số governor.
+
+        Args:
+            maxsize: Số khung hình tối đa được giữ
+        """
+        self.maxsize = maxsize
+        self._frames = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, source):
+        """
+        Lấy Frame từ đường dẫn, ảnh trong bộ nhớ hoặc Frame có sẵn
+
+        Args:
+            source: Đường dẫn file, numpy.ndarray hoặc Frame
+
+        Returns:
+            Frame: Khung hình đã giải mã hoặc None nếu không đọc được
+        """
+        if isinstance(source, Frame) or source is None:
+            return source
+        if isinstance(source, np.ndarray):
+            return Frame(source)
+
+        with self._lock:
+            frame = self._frames.get(source)
+            if frame is not None:
+                self._frames.move_to_end(source)
+                return frame
+
+        frame = Frame.from_file(source)
+        if frame is None:
+            return None
+
+        with self._lock:
+            self._frames[source] = frame
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+        return frame
+
+    def put(self, source, frame):
+        """Đưa Frame đã giải mã sẵn vào bộ nhớ đệm theo đường dẫn"""
+        with self._lock:
+            self._frames[source] = frame
+            self._frames.move_to_end(source)
+            while len(self._frames) > self.maxsize:
+                self._frames.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._frames.clear()
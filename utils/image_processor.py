@@ -5,9 +5,13 @@ import numpy as np
 import pytesseract
 from datetime import datetime
 
+from utils.ocr_engine import get_ocr_engine
+
 class ImageProcessor:
-    def __init__(self, tesseract_path):
+    def __init__(self, tesseract_path, ocr_backend='auto'):
         pytesseract.pytesseract.tesseract_cmd = tesseract_path
+        self.tesseract_path = tesseract_path
+        self.ocr_backend = ocr_backend
     
     def capture_screenshot(self, device, screenshot_dir, prefix=""):
         """Capture screenshot to a specific directory with timestamp."""
@@ -38,4 +42,4 @@ class ImageProcessor:
     
     def read_text(self, image, config=""):
         """Extract text from image using OCR."""
-        return pytesseract.image_to_string(image, config=config).strip()
\ No newline at end of file
+        return get_ocr_engine(self.tesseract_path, self.ocr_backend).read(image, config)
\ No newline at end of file
@@ -0,0 +1,194 @@
+# utils/input_macro.py
+import time
+import asyncio
+import random
+
+
+def jitter_time(base_time, variation=0.1):
+    """
+    Tạo thời gian ngẫu nhiên gần base_time (giống GovernorScanner.randomize_time)
+
+    Args:
+        base_time: Thời gian cơ bản tính bằng giây
+        variation: Tỷ lệ dao động tối đa
+
+    Returns:
+        float: Thời gian chờ (tối thiểu 0.1 giây)
+    """
+    sleep_time = base_time + random.uniform(-variation, variation) * base_time
+    return max(sleep_time, 0.1)
+
+
+class InputMacro:
+    def __init__(self, name=""):
+        """
+        Chuỗi thao tác điều hướng (tap, swipe, sleep) được biên dịch thành
+        script shell chạy trên thiết bị trong một lần gọi
+
+        Các điểm capture() chia macro thành nhiều đoạn: mỗi đoạn là một lần
+        gọi shell, sau đó chụp màn hình trước khi chạy đoạn tiếp theo.
+
+        Args:
+            name: Tên macro (dùng khi in log)
+        """
+        self.name = name
+        self.steps = []
+
+    def tap(self, x, y):
+        """Thêm thao tác tap"""
+        self.steps.append(('tap', (x, y)))
+        return self
+
+    def swipe(self, x1, y1, x2, y2, duration_ms=None):
+        """Thêm thao tác swipe"""
+        self.steps.append(('swipe', (x1, y1, x2, y2, duration_ms)))
+        return self
+
+    def sleep(self, seconds, randomize=True):
+        """Thêm thời gian chờ (chạy trên thiết bị khi batch)"""
+        self.steps.append(('sleep', (seconds, randomize)))
+        return self
+
+    def wait(self, state, seconds):
+        """
+        Chờ màn hình chuyển sang trạng thái state
+
+        Khi chạy không có hàm wait, bước này tương đương sleep(seconds).
+        """
+        self.steps.append(('wait', (state, seconds)))
+        return self
+
+    def capture(self, label):
+        """Đánh dấu điểm chụp màn hình sau các bước hiện tại"""
+        self.steps.append(('capture', (label,)))
+        return self
+
+    def _step_command(self, kind, args):
+        if kind == 'tap':
+            return f"input tap {args[0]} {args[1]}"
+        if kind == 'swipe':
+            x1, y1, x2, y2, duration_ms = args
+            command = f"input swipe {x1} {y1} {x2} {y2}"
+            return f"{command} {duration_ms}" if duration_ms else command
+        if kind == 'sleep':
+            seconds, randomize = args
+            return f"sleep {jitter_time(seconds) if randomize else seconds:.2f}"
+        if kind == 'wait':
+            return f"sleep {jitter_time(args[1]):.2f}"
+        raise ValueError(f"Unknown macro step: {kind}")
+
+    def _segments(self, split_waits=False):
+        """Chia macro thành các đoạn (script, action) tại điểm chụp (và điểm chờ nếu split_waits)"""
+        segments = []
+        commands = []
+        for kind, args in self.steps:
+            if kind == 'capture' or (kind == 'wait' and split_waits):
+                segments.append(("; ".join(commands), (kind,) + args))
+                commands = []
+            else:
+                commands.append(self._step_command(kind, args))
+        if commands:
+            segments.append(("; ".join(commands), None))
+        return segments
+
+    def compile(self):
+        """
+        Biên dịch macro thành các đoạn script shell
+
+        Returns:
+            list: Danh sách (script, capture_label); capture_label là None với
+            đoạn cuối không có điểm chụp
+        """
+        return [(script, action[1] if action else None) for script, action in self._segments()]
+
+    def run(self, device, capture=None, batch=True, wait=None):
+        """
+        Chạy macro trên thiết bị
+
+        Args:
+            device: Thiết bị có phương thức shell()
+            capture: Hàm capture(label) trả về ảnh/đường dẫn tại mỗi điểm chụp
+            batch: True để gửi mỗi đoạn trong một lần gọi shell, False để gửi
+                từng lệnh và chờ phía Python như trước
+            wait: Hàm wait(state, seconds) chờ màn hình đạt trạng thái; trả về
+                ảnh đã chụp khi nhận ra trạng thái (dùng luôn cho điểm chụp
+                ngay sau đó) hoặc None
+
+        Returns:
+            dict: {label: kết quả của capture(label)}
+        """
+        frames = {}
+        # Ảnh chụp khi chờ trạng thái, dùng lại nếu chưa có thao tác nào sau đó
+        ready = None
+        if batch:
+            for script, action in self._segments(split_waits=wait is not None):
+                if script:
+                    device.shell(script)
+                    ready = None
+                if action is None:
+                    continue
+                if action[0] == 'wait':
+                    ready = wait(action[1], action[2])
+                elif capture:
+                    frames[action[1]] = ready if ready is not None else capture(action[1])
+                    ready = None
+            return frames
+
+        for kind, args in self.steps:
+            if kind == 'capture':
+                if capture:
+                    frames[args[0]] = ready if ready is not None else capture(args[0])
+                ready = None
+            elif kind == 'wait':
+                if wait is not None:
+                    ready = wait(args[0], args[1])
+                else:
+                    time.sleep(jitter_time(args[1]))
+            elif kind == 'sleep':
+                seconds, randomize = args
+                time.sleep(jitter_time(seconds) if randomize else seconds)
+            else:
+                device.shell(self._step_command(kind, args))
+                ready = None
+        return frames
+
+    async def run_async(self, device, capture=None, batch=True, wait=None):
+        """
+        Chạy macro trên thiết bị bất đồng bộ (xem run)
+
+        Args:
+            device: Thiết bị có coroutine shell()
+            capture: Coroutine capture(label) trả về ảnh tại mỗi điểm chụp
+            batch: True để gửi mỗi đoạn trong một lần gọi shell
+            wait: Coroutine wait(state, seconds) chờ màn hình đạt trạng thái
+
+        Returns:
+            dict: {label: kết quả của capture(label)}
+        """
+        frames = {}
+        ready = None
+        if batch:
+            segments = self._segments(split_waits=wait is not None)
+        else:
+            segments = [(self._step_command(kind, args) if kind not in ('capture', 'wait', 'sleep') else "",
+                         (kind,) + args if kind in ('capture', 'wait', 'sleep') else None)
+                        for kind, args in self.steps]
+
+        for script, action in segments:
+            if script:
+                await device.shell(script)
+                ready = None
+            if action is None:
+                continue
+            if action[0] == 'sleep':
+                seconds, randomize = action[1], action[2]
+                await asyncio.sleep(jitter_time(seconds) if randomize else seconds)
+            elif action[0] == 'wait':
+                if wait is not None:
+                    ready = await wait(action[1], action[2])
+                else:
+                    await asyncio.sleep(jitter_time(action[2]))
+            elif capture:
+                frames[action[1]] = ready if ready is not None else await capture(action[1])
+                ready = None
+        return frames
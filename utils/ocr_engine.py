@@ -0,0 +1,282 @@
+# utils/ocr_engine.py
+import os
+import shlex
+import threading
+
+import numpy as np
+import pytesseract
+
+try:
+    import tesserocr
+except ImportError:
+    tesserocr = None
+
+# Mặc định của pytesseract/tesseract CLI khi không truyền --psm
+DEFAULT_PSM = 3
+
+# Cấu hình dùng cho ảnh ghép nhiều trường số (mỗi dòng một trường)
+BATCH_DIGITS_CONFIG = "--psm 6 -c tessedit_char_whitelist=0123456789"
+
+
+def _normalize_background(image):
+    """Đưa ảnh nhị phân về dạng chữ tối trên nền sáng (dựa vào viền ảnh)"""
+    border = np.concatenate([image[0, :], image[-1, :], image[:, 0], image[:, -1]])
+    if np.median(border) < 128:
+        return 255 - image
+    return image
+
+
+def compose_batch(images, padding=12):
+    """
+    Ghép các ảnh ROI đã tiền xử lý thành một ảnh dọc, mỗi ROI một dòng
+
+    Args:
+        images: Danh sách ảnh xám/nhị phân (numpy.ndarray 2 chiều)
+        padding: Khoảng trắng giữa các dòng và quanh ảnh (pixel)
+
+    Returns:
+        numpy.ndarray: Ảnh ghép nền trắng
+    """
+    images = [_normalize_background(img) for img in images]
+    width = max(img.shape[1] for img in images) + 2 * padding
+    height = sum(img.shape[0] for img in images) + padding * (len(images) + 1)
+
+    composite = np.full((height, width), 255, dtype=np.uint8)
+    y = padding
+    for img in images:
+        h, w = img.shape[:2]
+        composite[y:y+h, padding:padding+w] = img
+        y += h + padding
+    return composite
+
+
+def parse_tesseract_config(config):
+    """
+    Tách chuỗi cấu hình kiểu CLI của tesseract
+
+    Args:
+        config: Chuỗi như "--psm 7 -c tessedit_char_whitelist=0123456789"
+
+    Returns:
+        tuple: (psm, {tên biến: giá trị})
+    """
+    psm = DEFAULT_PSM
+    variables = {}
+    tokens = shlex.split(config or "")
+    idx = 0
+    while idx < len(tokens):
+        token = tokens[idx]
+        if token == '--psm' and idx + 1 < len(tokens):
+            psm = int(tokens[idx + 1])
+            idx += 1
+        elif token == '-c' and idx + 1 < len(tokens):
+            name, _, value = tokens[idx + 1].partition('=')
+            variables[name] = value
+            idx += 1
+        idx += 1
+    return psm, variables
+
+
+class OcrEngine:
+    """Giao diện chung cho các backend OCR"""
+
+    name = "base"
+
+    def read(self, image, config=""):
+        """
+        Nhận diện text từ ảnh
+
+        Args:
+            image: Ảnh numpy (xám hoặc nhị phân)
+            config: Cấu hình kiểu CLI của tesseract
+
+        Returns:
+            str: Text nhận diện được (đã strip)
+        """
+        raise NotImplementedError
+
+    def read_batch(self, images, config=BATCH_DIGITS_CONFIG):
+        """
+        Nhận diện nhiều ROI cùng cấu hình trong một lần gọi OCR
+
+        Args:
+            images: Danh sách ảnh đã tiền xử lý
+            config: Cấu hình OCR cho ảnh ghép (nên dùng --psm 6)
+
+        Returns:
+            list: Text của từng ảnh theo thứ tự, hoặc None nếu số dòng
+            nhận diện được không khớp số ảnh
+        """
+        if not images:
+            return []
+
+        lines = [line.strip() for line in self.read(compose_batch(images), config).splitlines()]
+        lines = [line for line in lines if line]
+        if len(lines) != len(images):
+            return None
+        return lines
+
+    def close(self):
+        pass
+
+
+class PytesseractEngine(OcrEngine):
+    name = "pytesseract"
+
+    def __init__(self, tesseract_path=None):
+        """
+        Backend dự phòng: gọi tesseract.exe qua pytesseract cho mỗi lần đọc
+
+        Args:
+            tesseract_path: Đường dẫn đến tesseract.exe
+        """
+        if tesseract_path:
+            pytesseract.pytesseract.tesseract_cmd = tesseract_path
+
+    def read(self, image, config=""):
+        return pytesseract.image_to_string(image, config=config).strip()
+
+
+class TesserocrEngine(OcrEngine):
+    name = "tesserocr"
+
+    def __init__(self, tesseract_path=None, lang='eng'):
+        """
+        Backend giữ engine tesseract trong bộ nhớ qua C API (tesserocr)
+
+        Model chỉ được nạp một lần; ảnh numpy được truyền thẳng vào engine
+        mà không ghi file tạm hay tạo tiến trình mới.
+
+        Args:
+            tesseract_path: Đường dẫn đến tesseract.exe (để tìm thư mục tessdata)
+            lang: Ngôn ngữ OCR
+        """
+        if tesserocr is None:
+            raise ImportError("tesserocr is not installed")
+
+        kwargs = {'lang': lang}
+        tessdata = self._find_tessdata(tesseract_path)
+        if tessdata:
+            kwargs['path'] = tessdata
+        self.api = tesserocr.PyTessBaseAPI(**kwargs)
+        self._defaults = {}
+
+    def _find_tessdata(self, tesseract_path):
+        if not tesseract_path:
+            return None
+        tessdata = os.path.join(os.path.dirname(tesseract_path), 'tessdata')
+        return tessdata + os.sep if os.path.isdir(tessdata) else None
+
+    def _apply_config(self, config):
+        psm, variables = parse_tesseract_config(config)
+        self.api.SetPageSegMode(psm)
+
+        # Khôi phục các biến đã đổi ở lần đọc trước nhưng không có trong config này
+        for name, value in self._defaults.items():
+            if name not in variables:
+                self.api.SetVariable(name, value)
+        for name, value in variables.items():
+            if name not in self._defaults:
+                self._defaults[name] = self.api.GetVariableAsString(name) or ""
+            self.api.SetVariable(name, value)
+
+    def read(self, image, config=""):
+        image = np.ascontiguousarray(image)
+        if image.ndim == 2:
+            bytes_per_pixel = 1
+        else:
+            bytes_per_pixel = image.shape[2]
+        height, width = image.shape[:2]
+
+        self._apply_config(config)
+        self.api.SetImageBytes(image.tobytes(), width, height, bytes_per_pixel, width * bytes_per_pixel)
+        return self.api.GetUTF8Text().strip()
+
+    def close(self):
+        self.api.End()
+
+
+class FallbackOcrEngine(OcrEngine):
+    def __init__(self, primary, fallback):
+        """
+        Dùng backend chính, chuyển sang backend dự phòng nếu có lỗi
+
+        Args:
+            primary: Backend chính (ví dụ TesserocrEngine)
+            fallback: Backend dự phòng (PytesseractEngine)
+        """
+        self.primary = primary
+        self.fallback = fallback
+        self.name = primary.name
+
+    def read(self, image, config=""):
+        try:
+            return self.primary.read(image, config)
+        except Exception as e:
+            print(f"{self.primary.name} OCR error, falling back to {self.fallback.name}: {e}")
+            return self.fallback.read(image, config)
+
+    def close(self):
+        self.primary.close()
+
+
+_fallback_reported = False
+
+
+def create_ocr_engine(tesseract_path=None, backend='auto'):
+    """
+    Tạo OCR engine theo backend
+
+    Args:
+        tesseract_path: Đường dẫn đến tesseract.exe
+        backend: 'auto' (tesserocr nếu có, nếu không thì pytesseract),
+            'tesserocr' hoặc 'pytesseract'
+
+    Returns:
+        OcrEngine: Engine đã khởi tạo
+    """
+    global _fallback_reported
+    fallback = PytesseractEngine(tesseract_path)
+    if backend == 'pytesseract':
+        return fallback
+    if tesserocr is None:
+        if not _fallback_reported:
+            # 'auto' không có tesserocr: báo một lần thay vì lặng lẽ chạy pytesseract
+            _fallback_reported = True
+            print(f"OCR backend '{backend}': tesserocr is not installed, using pytesseract "
+                  f"(pip install -r requirements-optional.txt)")
+        return fallback
+
+    try:
+        return FallbackOcrEngine(TesserocrEngine(tesseract_path), fallback)
+    except Exception as e:
+        print(f"Could not start tesserocr engine, using pytesseract: {e}")
+        return fallback
+
+
+_local = threading.local()
+
+
+def get_ocr_engine(tesseract_path=None, backend='auto'):
+    """
+    Lấy OCR engine lâu dài của luồng hiện tại (tạo ở lần gọi đầu tiên)
+
+    Engine tesseract không an toàn khi dùng chung giữa các luồng nên mỗi
+    worker giữ một engine riêng.
+
+    Args:
+        tesseract_path: Đường dẫn đến tesseract.exe
+        backend: Backend OCR (xem create_ocr_engine)
+
+    Returns:
+        OcrEngine: Engine của luồng hiện tại
+    """
+    engines = getattr(_local, 'engines', None)
+    if engines is None:
+        engines = _local.engines = {}
+
+    key = (tesseract_path, backend)
+    engine = engines.get(key)
+    if engine is None:
+        engine = engines[key] = create_ocr_engine(tesseract_path, backend)
+    return engine
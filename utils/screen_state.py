@@ -0,0 +1,173 @@
+# utils/screen_state.py
+import os
+import sys
+import argparse
+
+import cv2
+
+from utils.frame import Frame
+
+SCREEN_STATES = ('rankings', 'profile', 'more_info', 'kvk_stats', 'kills')
+
+# Vùng neo (x, y, w, h) ở độ phân giải 1600x900: phần giao diện cố định của mỗi màn hình
+SCREEN_ANCHORS = {
+    'rankings': (560, 20, 480, 60),      # Tiêu đề bảng xếp hạng
+    'profile': (170, 775, 116, 29),      # Nút "More Info"
+    'more_info': (560, 20, 480, 60),     # Tiêu đề cửa sổ More Info
+    'kvk_stats': (1080, 280, 190, 50),   # Thanh tab của KvK Stats
+    'kills': (700, 410, 200, 215),       # Nhãn T1..T5 của bảng kills
+}
+
+
+class ScreenRecognizer:
+    def __init__(self, templates_dir=None, anchors=None, scale=0.5, threshold=0.8, margin=8):
+        """
+        Nhận diện màn hình hiện tại bằng template matching trên các vùng neo nhỏ
+
+        Mỗi trạng thái có một ảnh mẫu '<state>.png' (vùng neo cắt từ ảnh chụp
+        đúng màn hình đó, tạo bằng `python -m utils.screen_state`). Chỉ vùng
+        quanh neo được thu nhỏ và so khớp nên mỗi lần phân loại rất rẻ.
+
+        Args:
+            templates_dir: Thư mục chứa ảnh mẫu
+            anchors: {state: (x, y, w, h)} ghi đè SCREEN_ANCHORS
+            scale: Tỷ lệ thu nhỏ khi so khớp
+            threshold: Điểm khớp tối thiểu (TM_CCOEFF_NORMED)
+            margin: Độ lệch cho phép quanh vùng neo (pixel, độ phân giải gốc)
+        """
+        self.templates_dir = templates_dir
+        self.anchors = dict(SCREEN_ANCHORS)
+        if anchors:
+            self.anchors.update({state: tuple(roi) for state, roi in anchors.items()})
+        self.scale = scale
+        self.threshold = threshold
+        self.margin = margin
+        self.templates = {}
+        if templates_dir and os.path.isdir(templates_dir):
+            for state in self.anchors:
+                self._load_template(state)
+
+    def _template_path(self, state):
+        return os.path.join(self.templates_dir, f"{state}.png")
+
+    def _load_template(self, state):
+        path = self._template_path(state)
+        if not os.path.exists(path):
+            return
+        template = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+        if template is None:
+            print(f"Failed to load screen template: {path}")
+            return
+        self.templates[state] = self._downscale(template)
+
+    def _downscale(self, image):
+        if self.scale == 1.0:
+            return image
+        return cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    @property
+    def is_ready(self):
+        return bool(self.templates)
+
+    def can_detect(self, state):
+        """Có ảnh mẫu cho trạng thái này hay không"""
+        return state in self.templates
+
+    def score(self, frame, state):
+        """
+        Điểm khớp của khung hình với trạng thái
+
+        Args:
+            frame: Frame hoặc ảnh BGR
+            state: Tên trạng thái
+
+        Returns:
+            float: Điểm khớp (0 nếu không có mẫu hoặc không so khớp được)
+        """
+        template = self.templates.get(state)
+        if template is None or frame is None:
+            return 0.0
+        if not isinstance(frame, Frame):
+            frame = Frame(frame)
+
+        x, y, w, h = self.anchors[state]
+        window = frame.roi((max(x - self.margin, 0), max(y - self.margin, 0),
+                            w + 2 * self.margin, h + 2 * self.margin))
+        if window is None:
+            return 0.0
+        window = self._downscale(window)
+        if window.shape[0] < template.shape[0] or window.shape[1] < template.shape[1]:
+            return 0.0
+
+        result = cv2.matchTemplate(window, template, cv2.TM_CCOEFF_NORMED)
+        return float(result.max())
+
+    def is_state(self, frame, state):
+        return self.score(frame, state) >= self.threshold
+
+    def classify(self, frame, states=None):
+        """
+        Xác định màn hình hiện tại
+
+        Args:
+            frame: Frame hoặc ảnh BGR
+            states: Chỉ xét các trạng thái này (mặc định tất cả trạng thái có mẫu)
+
+        Returns:
+            tuple: (trạng thái hoặc None, điểm khớp tốt nhất)
+        """
+        best_state, best_score = None, 0.0
+        for state in states or self.templates:
+            score = self.score(frame, state)
+            if score > best_score:
+                best_state, best_score = state, score
+        if best_score < self.threshold:
+            return None, best_score
+        return best_state, best_score
+
+    def record(self, state, frame):
+        """
+        Lưu vùng neo của khung hình làm ảnh mẫu cho trạng thái
+
+        Args:
+            state: Tên trạng thái
+            frame: Frame hoặc ảnh BGR chụp đúng màn hình của trạng thái
+
+        Returns:
+            str: Đường dẫn ảnh mẫu hoặc None nếu thất bại
+        """
+        if not isinstance(frame, Frame):
+            frame = Frame(frame)
+        anchor = frame.roi(self.anchors[state])
+        if anchor is None:
+            return None
+
+        os.makedirs(self.templates_dir, exist_ok=True)
+        path = self._template_path(state)
+        if not cv2.imwrite(path, anchor):
+            print(f"Failed to save screen template: {path}")
+            return None
+        self.templates[state] = self._downscale(anchor)
+        return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Record a screen-state anchor template from a screenshot')
+    parser.add_argument('state', choices=SCREEN_STATES, help='Screen shown in the screenshot')
+    parser.add_argument('screenshot', help='Full 1600x900 screenshot of that screen')
+    parser.add_argument('--dir', default=os.path.join('data', 'screen_templates'), help='Templates directory')
+    args = parser.parse_args()
+
+    frame = Frame.from_file(args.screenshot)
+    if frame is None:
+        sys.exit(1)
+
+    recognizer = ScreenRecognizer(args.dir)
+    path = recognizer.record(args.state, frame)
+    if path is None:
+        sys.exit(1)
+    print(f"Saved {args.state} template -> {path} (self-match {recognizer.score(frame, args.state):.3f})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+# utils/screencap.py
+import cv2
+import numpy as np
+
+PNG_SIGNATURE = b'\x89PNG\r\n\x1a\n'
+
+
+def decode_png(data):
+    """
+    Giải mã dữ liệu PNG từ `screencap -p` thành ảnh BGR
+
+    Args:
+        data: Bytes nhận được từ `exec-out screencap -p`
+
+    Returns:
+        numpy.ndarray: Ảnh BGR hoặc None nếu dữ liệu không hợp lệ
+    """
+    if not data or len(data) < 100:
+        return None
+
+    # Một số phiên bản adb chạy qua pty chuyển '\n' thành '\r\n'
+    if not data.startswith(PNG_SIGNATURE) and data.startswith(b'\x89PNG\r\r\n'):
+        data = data.replace(b'\r\n', b'\n')
+
+    try:
+        buffer = np.frombuffer(data, dtype=np.uint8)
+        return cv2.imdecode(buffer, cv2.IMREAD_COLOR)
+    except Exception as e:
+        print(f"Error decoding screenshot: {e}")
+        return None
+
+
+# Định dạng pixel của `screencap` (android PixelFormat)
+PIXEL_FORMAT_RGBA_8888 = 1
+PIXEL_FORMAT_RGBX_8888 = 2
+PIXEL_FORMAT_BGRA_8888 = 5
+
+
+def parse_raw_header(data):
+    """
+    Đọc header của dữ liệu `screencap` dạng raw
+
+    Header gồm width, height, format (uint32 little-endian); từ Android 9
+    có thêm trường dataspace nên header dài 16 byte thay vì 12. Kích thước
+    header được xác định theo độ dài chính xác của dữ liệu; độ dài khác
+    (thiếu hoặc thừa byte) bị từ chối vì đọc lệch header cho ra ảnh sai.
+
+    Args:
+        data: Bytes nhận được từ `exec-out screencap`
+
+    Returns:
+        tuple: (width, height, pixel_format, header_size) hoặc None nếu không hợp lệ
+    """
+    if not data or len(data) < 12:
+        return None
+
+    width, height, pixel_format = np.frombuffer(data, dtype='<u4', count=3)
+    width, height, pixel_format = int(width), int(height), int(pixel_format)
+    payload = width * height * 4
+    if payload <= 0:
+        return None
+
+    for header_size in (16, 12):
+        if len(data) - header_size == payload:
+            return width, height, pixel_format, header_size
+
+    print(f"Raw screencap size mismatch: {len(data)} bytes for {width}x{height} "
+          f"(expected {payload + 16} or {payload + 12})")
+    return None
+
+
+def decode_raw(data):
+    """
+    Tạo view BGR (không sao chép) trên dữ liệu `screencap` dạng raw
+
+    Pixels được đọc bằng np.frombuffer và đảo thứ tự kênh bằng slicing,
+    nên mã cắt ROI + cvtColor(BGR2GRAY) hiện có dùng được trực tiếp mà chỉ
+    sao chép phần ROI.
+
+    Args:
+        data: Bytes nhận được từ `exec-out screencap`
+
+    Returns:
+        numpy.ndarray: View BGR (chỉ đọc) kích thước (height, width, 3) hoặc None
+    """
+    header = parse_raw_header(data)
+    if header is None:
+        print("Invalid raw screencap data")
+        return None
+
+    width, height, pixel_format, header_size = header
+    try:
+        pixels = np.frombuffer(data, dtype=np.uint8, count=width * height * 4, offset=header_size)
+        pixels = pixels.reshape(height, width, 4)
+        if pixel_format == PIXEL_FORMAT_BGRA_8888:
+            return pixels[:, :, :3]
+        # RGBA/RGBX -> BGR
+        return pixels[:, :, 2::-1]
+    except Exception as e:
+        print(f"Error decoding raw screenshot: {e}")
+        return None
+
+
+def decode_screencap(data, capture_format='png'):
+    """
+    Giải mã dữ liệu `screencap` theo định dạng đã chọn
+
+    Args:
+        data: Bytes nhận được từ thiết bị
+        capture_format: 'png' hoặc 'raw'
+
+    Returns:
+        numpy.ndarray: Ảnh BGR hoặc None nếu thất bại
+    """
+    if capture_format == 'raw':
+        return decode_raw(data)
+    return decode_png(data)
+
+
+def screencap_command(capture_format='png'):
+    """Lệnh screencap tương ứng với định dạng"""
+    return 'screencap' if capture_format == 'raw' else 'screencap -p'